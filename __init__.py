@@ -30,7 +30,7 @@ from vnpy.trader.constant import Direction, Offset
 from vnpy.trader.object import TickData, BarData, TradeData, OrderData
 from vnpy.trader.utility import BarGenerator, ArrayManager
 
-from .base import APP_NAME, StopOrder
+from .base import APP_NAME, StopOrder, OrderLeg
 from .engine import CtaEngine
 from .template import CtaTemplate, CtaSignal, TargetPosTemplate
 
@@ -1,8 +1,10 @@
 from collections import defaultdict
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import Callable, List, Dict, Optional, Type
 from functools import lru_cache, partial
 import traceback
+from logging import INFO
+from pathlib import Path
 
 import numpy as np
 from pandas import DataFrame, Series
@@ -33,9 +35,12 @@ from .base import (
     STOPORDER_PREFIX,
     StopOrder,
     StopOrderStatus,
-    INTERVAL_DELTA_MAP
+    INTERVAL_DELTA_MAP,
+    OrderLeg
 )
 from .template import CtaTemplate
+from .utility import BarAggregator
+from .recorder import load_tick_archive
 from .locale import _
 
 
@@ -61,6 +66,7 @@ class BacktestingEngine:
         self.annual_days: int = 240
         self.half_life: int = 120
         self.mode: BacktestingMode = BacktestingMode.BAR
+        self.tick_archive: str = ""                 # archive folder, "default" for trader folder
 
         self.strategy_class: Type[CtaTemplate] = None
         self.strategy: CtaTemplate = None
@@ -89,6 +95,9 @@ class BacktestingEngine:
         self.daily_results: Dict[date, DailyResult] = {}
         self.daily_df: DataFrame = None
 
+        self.bar_aggregator: Optional[BarAggregator] = None
+        self.bar_subscriptions: defaultdict = defaultdict(list)
+
     def clear_data(self) -> None:
         """
         Clear all data of last backtesting.
@@ -112,6 +121,9 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
 
+        self.bar_aggregator = None
+        self.bar_subscriptions.clear()
+
     def set_parameters(
         self,
         vt_symbol: str,
@@ -126,7 +138,8 @@ class BacktestingEngine:
         mode: BacktestingMode = BacktestingMode.BAR,
         risk_free: float = 0,
         annual_days: int = 240,
-        half_life: int = 120
+        half_life: int = 120,
+        tick_archive: str = ""
     ) -> None:
         """"""
         self.mode = mode
@@ -151,10 +164,15 @@ class BacktestingEngine:
         self.risk_free = risk_free
         self.annual_days = annual_days
         self.half_life = half_life
+        self.tick_archive = tick_archive
 
     def add_strategy(self, strategy_class: Type[CtaTemplate], setting: dict) -> None:
         """"""
         self.strategy_class = strategy_class
+
+        self.bar_aggregator = None
+        self.bar_subscriptions.clear()
+
         self.strategy = strategy_class(
             self, strategy_class.__name__, self.vt_symbol, setting
         )
@@ -172,6 +190,11 @@ class BacktestingEngine:
 
         self.history_data.clear()       # Clear previously loaded history data
 
+        if self.mode == BacktestingMode.TICK and self.tick_archive:
+            self.load_tick_archive()
+            if self.history_data:
+                return
+
         # Load 30 days of data each time and allow for progress update
         total_days: int = (self.end - self.start).days
         progress_days: int = max(int(total_days / 10), 1)
@@ -214,6 +237,27 @@ class BacktestingEngine:
 
         self.output(_("历史数据加载完成，数据量：{}").format(len(self.history_data)))
 
+    def load_tick_archive(self) -> None:
+        """
+        Load tick data from archive files recorded by CtaEngine.
+        """
+        folder: Optional[Path] = None
+        if self.tick_archive != "default":
+            folder = Path(self.tick_archive)
+
+        self.history_data = load_tick_archive(
+            self.symbol,
+            self.exchange,
+            self.start,
+            self.end,
+            folder
+        )
+
+        if self.history_data:
+            self.output(_("行情录制文件加载完成，数据量：{}").format(len(self.history_data)))
+        else:
+            self.output(_("行情录制文件无数据，从数据库加载"))
+
     def run_backtesting(self) -> None:
         """"""
         if self.mode == BacktestingMode.BAR:
@@ -602,6 +646,9 @@ class BacktestingEngine:
         self.cross_stop_order()
         self.strategy.on_bar(bar)
 
+        if self.bar_aggregator and self.interval == Interval.MINUTE:
+            self.bar_aggregator.update_bar(bar)
+
         self.update_daily_close(bar.close_price)
 
     def new_tick(self, tick: TickData) -> None:
@@ -611,6 +658,10 @@ class BacktestingEngine:
 
         self.cross_limit_order()
         self.cross_stop_order()
+
+        if self.bar_aggregator:
+            self.bar_aggregator.update_tick(tick)
+
         self.strategy.on_tick(tick)
 
         self.update_daily_close(tick.last_price)
@@ -802,6 +853,57 @@ class BacktestingEngine:
 
         return bars
 
+    def subscribe_bar(
+        self,
+        strategy: CtaTemplate,
+        callback: Callable,
+        window: int = 1,
+        interval: Interval = Interval.MINUTE,
+        daily_end: Optional[time] = None
+    ) -> None:
+        """"""
+        if not self.bar_aggregator:
+            self.bar_aggregator = BarAggregator(self.process_aggregated_bar)
+
+        # daily_end is only used by daily bar series
+        if interval != Interval.DAILY:
+            daily_end = None
+
+        self.bar_aggregator.add_window(window, interval, daily_end)
+
+        callbacks: list = self.bar_subscriptions[(window, interval, daily_end)]
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def process_aggregated_bar(self, key: tuple, bar: BarData) -> None:
+        """"""
+        for callback in self.bar_subscriptions.get(key, []):
+            # 1 minute bar is already pushed to on_bar in bar mode
+            if self.mode == BacktestingMode.BAR and callback == self.strategy.on_bar:
+                continue
+
+            callback(bar)
+
+    def replay_subscribed_bar(self, strategy: CtaTemplate, bars: List[BarData]) -> None:
+        """"""
+        if not self.bar_aggregator:
+            return
+
+        def on_bar(key: tuple, bar: BarData) -> None:
+            for callback in self.bar_subscriptions.get(key, []):
+                callback(bar)
+
+        aggregator: BarAggregator = BarAggregator(on_bar)
+        for key in self.bar_aggregator.window_generators.keys():
+            aggregator.add_window(*key)
+
+        for bar in bars:
+            aggregator.update_bar(bar)
+
+        # Continue bar series from history, only one strategy subscribes here
+        for key in aggregator.window_generators.keys():
+            self.bar_aggregator.copy_window_state(key, aggregator)
+
     def load_tick(self, vt_symbol: str, days: int, callback: Callable) -> List[TickData]:
         """"""
         self.callback = callback
@@ -839,6 +941,15 @@ class BacktestingEngine:
             vt_orderid: str = self.send_limit_order(direction, offset, price, volume)
         return [vt_orderid]
 
+    def send_orders(self, strategy: CtaTemplate, legs: List[OrderLeg]) -> List[list]:
+        """"""
+        return [
+            self.send_order(
+                strategy, leg.direction, leg.offset, leg.price, leg.volume, leg.stop, leg.lock, leg.net
+            )
+            for leg in legs
+        ]
+
     def send_stop_order(
         self,
         direction: Direction,
@@ -902,6 +1013,11 @@ class BacktestingEngine:
         else:
             self.cancel_limit_order(strategy, vt_orderid)
 
+    def cancel_orders(self, strategy: CtaTemplate, vt_orderids: List[str]) -> None:
+        """"""
+        for vt_orderid in vt_orderids:
+            self.cancel_order(strategy, vt_orderid)
+
     def cancel_stop_order(self, strategy: CtaTemplate, vt_orderid: str) -> None:
         """"""
         if vt_orderid not in self.active_stop_orders:
@@ -932,7 +1048,7 @@ class BacktestingEngine:
         for vt_orderid in stop_orderids:
             self.cancel_stop_order(strategy, vt_orderid)
 
-    def write_log(self, msg: str, strategy: CtaTemplate = None) -> None:
+    def write_log(self, msg: str, strategy: CtaTemplate = None, level: int = INFO) -> None:
         """
         Write log message.
         """
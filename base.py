@@ -30,6 +30,19 @@ class BacktestingMode(Enum):
     TICK = 2
 
 
+class TickPolicy(Enum):
+    ALL = _("逐笔推送")
+    LATEST = _("最新行情")
+    INTERVAL = _("定时采样")
+
+
+class BudgetPolicy(Enum):
+    LOG = _("记录")
+    THROTTLE = _("限流")
+    CONFLATE = _("合并行情")
+    STOP = _("停止策略")
+
+
 @dataclass
 class StopOrder:
     vt_symbol: str
@@ -46,9 +59,37 @@ class StopOrder:
     status: StopOrderStatus = StopOrderStatus.WAITING
 
 
+@dataclass
+class OrderLeg:
+    direction: Direction
+    offset: Offset
+    price: float
+    volume: float
+    stop: bool = False
+    lock: bool = False
+    net: bool = False
+
+
+@dataclass
+class CallbackBudget:
+    strategy_name: str
+    budget: float                       # milliseconds
+    policy: BudgetPolicy = BudgetPolicy.LOG
+    max_breaches: int = 3
+    breach_window: float = 60           # seconds
+    throttle_interval: float = 1        # seconds
+    breach_count: int = 0
+    last_breach: float = 0
+    overruns: Dict[str, int] = field(default_factory=dict)
+    max_elapsed: Dict[str, float] = field(default_factory=dict)
+    last_stack: str = ""
+
+
 EVENT_CTA_LOG = "eCtaLog"
 EVENT_CTA_STRATEGY = "eCtaStrategy"
 EVENT_CTA_STOPORDER = "eCtaStopOrder"
+EVENT_CTA_TICK = "eCtaTick"
+EVENT_CTA_PROCESS = "eCtaProcess"
 
 INTERVAL_DELTA_MAP: Dict[Interval, timedelta] = {
     Interval.TICK: timedelta(milliseconds=1),
@@ -3,12 +3,14 @@ from typing import List, Optional
 from ..Common.cache import make_cache
 from ..Common.CEnum import BI_DIR, BI_TYPE, DATA_FIELD, FX_TYPE, MACD_ALGO
 from ..Common.ChanException import CChanException, ErrCode
+from ..Common.snapshot import share_or_deepcopy
 from ..KLine.KLine import CKLine
+from ..KLine.KLine_MetricIndex import CKLine_MetricIndex
 from ..KLine.KLine_Unit import CKLine_Unit
 
 
 class CBi:
-    def __init__(self, begin_klc: CKLine, end_klc: CKLine, idx: int, is_sure: bool):
+    def __init__(self, begin_klc: CKLine, end_klc: CKLine, idx: int, is_sure: bool, metric_index: Optional[CKLine_MetricIndex] = None):
         # self.__begin_klc = begin_klc
         # self.__end_klc = end_klc
         self.__dir = None
@@ -31,6 +33,18 @@ class CBi:
         self.next: Optional[CBi] = None
         self.pre: Optional[CBi] = None
 
+        # 同级别笔共用的指标区间索引，计算背驰指标时按区间查询，不遍历笔内K线单元
+        self.metric_index = metric_index if metric_index is not None else CKLine_MetricIndex()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # 兼容没有指标区间索引时保存的对象，所属 CBiList 恢复时会换成同级别共用的索引
+        if not hasattr(self, "metric_index"):
+            self.metric_index = CKLine_MetricIndex()
+
+    def __deepcopy__(self, memo):
+        return share_or_deepcopy(self, memo)
+
     def clean_cache(self):
         self._memoize_cache = {}
 
@@ -207,30 +221,18 @@ class CBi:
 
     @make_cache
     def Cal_Rsi(self):
-        rsi_lst: List[float] = []
-        for klc in self.klc_lst:
-            rsi_lst.extend(klu.rsi for klu in klc.lst)
-        return 10000.0/(min(rsi_lst)+1e-7) if self.is_down() else max(rsi_lst)
+        rsi_max, rsi_min = self.metric_index.rsi_max_min(self.begin_klc.lst[0], self.end_klc.lst[-1])
+        return 10000.0/(rsi_min+1e-7) if self.is_down() else rsi_max
 
     @make_cache
     def Cal_MACD_area(self):
-        _s = 1e-7
-        for klc in self.klc_lst:
-            for klu in klc.lst:
-                _s += abs(klu.macd.macd)
-        return _s
+        return 1e-7 + self.metric_index.macd_area(self.begin_klc.lst[0], self.end_klc.lst[-1])
 
     @make_cache
     def Cal_MACD_peak(self):
-        peak = 1e-7
-        for klc in self.klc_lst:
-            for klu in klc.lst:
-                if abs(klu.macd.macd) > peak:
-                    if self.is_down() and klu.macd.macd < 0:
-                        peak = abs(klu.macd.macd)
-                    elif self.is_up() and klu.macd.macd > 0:
-                        peak = abs(klu.macd.macd)
-        return peak
+        # 与笔同向的 MACD 柱绝对值的最大值
+        _max, _min = self.metric_index.macd_max_min(self.begin_klc.lst[0], self.end_klc.lst[-1])
+        return max(1e-7, -_min) if self.is_down() else max(1e-7, _max)
 
     def Cal_MACD_half(self, is_reverse):
         if is_reverse:
@@ -240,53 +242,20 @@ class CBi:
 
     @make_cache
     def Cal_MACD_half_obverse(self):
-        _s = 1e-7
-        begin_klu = self.get_begin_klu()
-        peak_macd = begin_klu.macd.macd
-        for klc in self.klc_lst:
-            for klu in klc.lst:
-                if klu.idx < begin_klu.idx:
-                    continue
-                if klu.macd.macd*peak_macd > 0:
-                    _s += abs(klu.macd.macd)
-                else:
-                    break
-            else:  # 没有被break，继续找写一个KLC
-                continue
-            break
-        return _s
+        # 从笔的起点开始，与起点 MACD 柱同号的连续部分的面积
+        return 1e-7 + self.metric_index.macd_same_sign_area(self.get_begin_klu(), self.end_klc.lst[-1], from_end=False)
 
     @make_cache
     def Cal_MACD_half_reverse(self):
-        _s = 1e-7
-        begin_klu = self.get_end_klu()
-        peak_macd = begin_klu.macd.macd
-        for klc in self.klc_lst_re:
-            for klu in klc[::-1]:
-                if klu.idx > begin_klu.idx:
-                    continue
-                if klu.macd.macd*peak_macd > 0:
-                    _s += abs(klu.macd.macd)
-                else:
-                    break
-            else:  # 没有被break，继续找写一个KLC
-                continue
-            break
-        return _s
+        # 从笔的终点往前，与终点 MACD 柱同号的连续部分的面积
+        return 1e-7 + self.metric_index.macd_same_sign_area(self.begin_klc.lst[0], self.get_end_klu(), from_end=True)
 
     @make_cache
     def Cal_MACD_diff(self):
         """
         macd红绿柱最大值最小值之差
         """
-        _max, _min = float("-inf"), float("inf")
-        for klc in self.klc_lst:
-            for klu in klc.lst:
-                macd = klu.macd.macd
-                if macd > _max:
-                    _max = macd
-                if macd < _min:
-                    _min = macd
+        _max, _min = self.metric_index.macd_max_min(self.begin_klc.lst[0], self.end_klc.lst[-1])
         return _max-_min
 
     @make_cache
@@ -308,13 +277,9 @@ class CBi:
             return (end_klu.high-begin_klu.low)/begin_klu.low
 
     def Cal_MACD_trade_metric(self, metric: str, cal_avg=False) -> float:
-        _s = 0
-        for klc in self.klc_lst:
-            for klu in klc.lst:
-                metric_res = klu.trade_info.metric[metric]
-                if metric_res is None:
-                    return 0.0
-                _s += metric_res
+        _s = self.metric_index.trade_metric_sum(self.begin_klc.lst[0], self.end_klc.lst[-1], metric)
+        if _s is None:
+            return 0.0
         return _s / self.get_klu_cnt() if cal_avg else _s
 
     # def set_klc_lst(self, lst):
@@ -2,6 +2,7 @@ from typing import List, Optional, Union, overload
 
 from ..Common.CEnum import FX_TYPE, KLINE_DIR
 from ..KLine.KLine import CKLine
+from ..KLine.KLine_MetricIndex import CKLine_MetricIndex
 
 from .Bi import CBi
 from .BiConfig import CBiConfig
@@ -12,9 +13,18 @@ class CBiList:
         self.bi_list: List[CBi] = []
         self.last_end = None  # 最后一笔的尾部
         self.config = bi_conf
+        self.metric_index = CKLine_MetricIndex()  # 本级别所有笔共用的指标区间索引
 
         self.free_klc_lst = []  # 仅仅用作第一笔未画出来之前的缓存，为了获得更精准的结果而已，不加这块逻辑其实对后续计算没太大影响
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # 兼容没有指标区间索引时保存的对象，索引在第一次查询时从K线单元建立
+        if "metric_index" not in state:
+            self.metric_index = CKLine_MetricIndex()
+            for bi in self.bi_list:
+                bi.metric_index = self.metric_index
+
     def __str__(self):
         return "\n".join([str(bi) for bi in self.bi_list])
 
@@ -141,7 +151,7 @@ class CBiList:
         return False
 
     def add_new_bi(self, pre_klc, cur_klc, is_sure=True):
-        self.bi_list.append(CBi(pre_klc, cur_klc, idx=len(self.bi_list), is_sure=is_sure))
+        self.bi_list.append(CBi(pre_klc, cur_klc, idx=len(self.bi_list), is_sure=is_sure, metric_index=self.metric_index))
         if len(self.bi_list) >= 2:
             self.bi_list[-2].next = self.bi_list[-1]
             self.bi_list[-1].pre = self.bi_list[-2]
@@ -23,6 +23,23 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
         self.config = bs_point_config
         self.last_sure_pos = -1
 
+        # 上次过滤后保留的买卖点数量及当时的 last_sure_pos，last_sure_pos 不回退时这部分不会再被删除
+        self.kept_cnt = 0
+        self.kept_bsp1_cnt = 0
+        self.kept_pos = -1
+        self.new_keys: List[int] = []  # 上次过滤之后加入 bsp_dict 的 key
+        self.bi_idx_cnt: Dict[int, int] = {}  # bsp_dict 中各 bi.idx 的买卖点数量
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "kept_pos" not in state:
+            # 兼容增量计算之前保存的对象，kept_pos 取无穷大使下次计算时从 lst 完整重建 bsp_dict 和计数
+            self.kept_cnt = 0
+            self.kept_bsp1_cnt = 0
+            self.kept_pos = float("inf")
+            self.new_keys = []
+            self.bi_idx_cnt = {}
+
     def __iter__(self):
         yield from self.lst
 
@@ -39,9 +56,7 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
         return self.lst[index]
 
     def cal(self, bi_list: LINE_LIST_TYPE, seg_list: CSegListComm[LINE_TYPE]):
-        self.lst = [bsp for bsp in self.lst if bsp.klu.idx <= self.last_sure_pos]
-        self.bsp_dict = {bsp.bi.get_end_klu().idx: bsp for bsp in self.lst}
-        self.bsp1_lst = [bsp for bsp in self.bsp1_lst if bsp.klu.idx <= self.last_sure_pos]
+        self.remove_unsure_bsp()
 
         self.cal_seg_bs1point(seg_list, bi_list)
         self.cal_seg_bs2point(seg_list, bi_list)
@@ -49,9 +64,51 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
 
         self.update_last_pos(seg_list)
 
+    def remove_unsure_bsp(self):
+        # 删除 last_sure_pos 之后的买卖点，只检查上次保留之后新加入的部分
+        if self.last_sure_pos < self.kept_pos:
+            self.lst = [bsp for bsp in self.lst if bsp.klu.idx <= self.last_sure_pos]
+            self.bsp1_lst = [bsp for bsp in self.bsp1_lst if bsp.klu.idx <= self.last_sure_pos]
+
+            self.bsp_dict = {}
+            self.bi_idx_cnt = {}
+            for bsp in self.lst:
+                self.set_bsp_dict(bsp.bi.get_end_klu().idx, bsp)
+        else:
+            for key in self.new_keys:
+                self.pop_bsp_dict(key)
+
+            tail = [bsp for bsp in self.lst[self.kept_cnt:] if bsp.klu.idx <= self.last_sure_pos]
+            del self.lst[self.kept_cnt:]
+            self.lst.extend(tail)
+            for bsp in tail:
+                self.set_bsp_dict(bsp.bi.get_end_klu().idx, bsp)
+
+            tail = [bsp for bsp in self.bsp1_lst[self.kept_bsp1_cnt:] if bsp.klu.idx <= self.last_sure_pos]
+            del self.bsp1_lst[self.kept_bsp1_cnt:]
+            self.bsp1_lst.extend(tail)
+
+        self.new_keys = []
+        self.kept_pos = self.last_sure_pos
+        self.kept_cnt = len(self.lst)
+        self.kept_bsp1_cnt = len(self.bsp1_lst)
+
+    def set_bsp_dict(self, key: int, bsp: CBS_Point[LINE_TYPE]):
+        if old_bsp := self.bsp_dict.get(key):
+            self.bi_idx_cnt[old_bsp.bi.idx] -= 1
+        self.bsp_dict[key] = bsp
+        self.bi_idx_cnt[bsp.bi.idx] = self.bi_idx_cnt.get(bsp.bi.idx, 0) + 1
+
+    def pop_bsp_dict(self, key: int):
+        bsp = self.bsp_dict.pop(key)
+        self.bi_idx_cnt[bsp.bi.idx] -= 1
+
+    def bsp_exist_on_bi(self, bi_idx: int) -> bool:
+        return self.bi_idx_cnt.get(bi_idx, 0) > 0
+
     def update_last_pos(self, seg_list: CSegListComm):
         self.last_sure_pos = -1
-        for seg in seg_list[::-1]:
+        for seg in reversed(seg_list):
             if seg.is_sure:
                 self.last_sure_pos = seg.end_bi.get_begin_klu().idx
                 return
@@ -59,6 +116,17 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
     def seg_need_cal(self, seg: CSeg):
         return seg.end_bi.get_end_klu().idx > self.last_sure_pos
 
+    def first_cal_seg_idx(self, seg_list: CSegListComm) -> int:
+        # seg_need_cal 随线段序号单调，从尾部往前找到第一个需要计算的线段
+        idx = len(seg_list)
+        while idx > 0 and self.seg_need_cal(seg_list[idx-1]):
+            idx -= 1
+        return idx
+
+    def get_bsp1_bi_idx_dict(self) -> Dict[int, CBS_Point[LINE_TYPE]]:
+        # 保留下来的一类买卖点都在需要计算的线段之前，只有本轮新加入的可能被查到
+        return {bsp.bi.idx: bsp for bsp in self.bsp1_lst[self.kept_bsp1_cnt:]}
+
     def add_bs(
         self,
         bs_type: BSP_TYPE,
@@ -89,14 +157,13 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
             return
         if is_target_bsp:
             self.lst.append(bsp)
-            self.bsp_dict[bi.get_end_klu().idx] = bsp
+            self.set_bsp_dict(bi.get_end_klu().idx, bsp)
+            self.new_keys.append(bi.get_end_klu().idx)
         if bs_type in [BSP_TYPE.T1, BSP_TYPE.T1P]:
             self.bsp1_lst.append(bsp)
 
     def cal_seg_bs1point(self, seg_list: CSegListComm[LINE_TYPE], bi_list: LINE_LIST_TYPE):
-        for seg in seg_list:
-            if not self.seg_need_cal(seg):
-                continue
+        for seg in seg_list[self.first_cal_seg_idx(seg_list):]:
             self.cal_single_bs1point(seg, bi_list)
 
     def cal_single_bs1point(self, seg: CSeg[LINE_TYPE], bi_list: LINE_LIST_TYPE):
@@ -150,8 +217,8 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
         self.add_bs(bs_type=BSP_TYPE.T1P, bi=last_bi, relate_bsp1=None, is_target_bsp=is_target_bsp, feature_dict=feature_dict)
 
     def cal_seg_bs2point(self, seg_list: CSegListComm[LINE_TYPE], bi_list: LINE_LIST_TYPE):
-        bsp1_bi_idx_dict = {bsp.bi.idx: bsp for bsp in self.bsp1_lst}
-        for seg in seg_list:
+        bsp1_bi_idx_dict = self.get_bsp1_bi_idx_dict()
+        for seg in seg_list[self.first_cal_seg_idx(seg_list):]:
             config = self.config.GetBSConfig(seg.is_down())
             if BSP_TYPE.T2 not in config.target_types and BSP_TYPE.T2S not in config.target_types:
                 continue
@@ -177,7 +244,7 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
                 return
             bsp2_bi = bi_list[1]
             break_bi = bi_list[0]
-        if BSP_CONF.bsp2_follow_1 and bsp1_bi_idx not in [bsp.bi.idx for bsp in self.bsp_dict.values()]:  # check bsp2_follow_1
+        if BSP_CONF.bsp2_follow_1 and not self.bsp_exist_on_bi(bsp1_bi_idx):  # check bsp2_follow_1
             return
         retrace_rate = bsp2_bi.amp()/break_bi.amp()
         bsp2_flag = retrace_rate <= BSP_CONF.max_bs2_rate
@@ -235,10 +302,8 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
             bias += 2
 
     def cal_seg_bs3point(self, seg_list: CSegListComm[LINE_TYPE], bi_list: LINE_LIST_TYPE):
-        bsp1_bi_idx_dict = {bsp.bi.idx: bsp for bsp in self.bsp1_lst}
-        for seg in seg_list:
-            if not self.seg_need_cal(seg):
-                continue
+        bsp1_bi_idx_dict = self.get_bsp1_bi_idx_dict()
+        for seg in seg_list[self.first_cal_seg_idx(seg_list):]:
             config = self.config.GetBSConfig(seg.is_down())
             if BSP_TYPE.T3A not in config.target_types and BSP_TYPE.T3B not in config.target_types:
                 continue
@@ -255,7 +320,7 @@ class CBSPointList(Generic[LINE_TYPE, LINE_LIST_TYPE]):
                 bsp1_bi, real_bsp1 = None, None
                 bsp1_bi_idx = -1
                 BSP_CONF = self.config.GetBSConfig(seg.is_up())
-            if BSP_CONF.bsp3_follow_1 and bsp1_bi_idx not in [bsp.bi.idx for bsp in self.bsp_dict.values()]:
+            if BSP_CONF.bsp3_follow_1 and not self.bsp_exist_on_bi(bsp1_bi_idx):
                 continue
             if next_seg:
                 self.treat_bsp3_after(seg_list, next_seg, BSP_CONF, bi_list, real_bsp1, bsp1_bi_idx, next_seg_idx)
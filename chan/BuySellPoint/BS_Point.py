@@ -4,6 +4,7 @@ from typing import Dict, Generic, List, Optional, TypeVar, Union
 from ..Bi.Bi import CBi  # 表示走势段或笔的类
 from ..ChanModel.Features import CFeatures  # 特征类，用于管理买卖点的特征
 from ..Common.CEnum import BSP_TYPE  # 表示买卖点类型的枚举
+from ..Common.snapshot import share_or_deepcopy  # 快照时共享已确定的买卖点
 from ..Seg.Seg import CSeg  # 表示分段的类
 
 # 声明泛型变量，LINE_TYPE可以是CBi或CSeg类型
@@ -48,6 +49,9 @@ class CBS_Point(Generic[LINE_TYPE]):
         # 初始化通用特征
         self.init_common_feature()
 
+    def __deepcopy__(self, memo):
+        return share_or_deepcopy(self, memo)
+
     def add_type(self, bs_type: BSP_TYPE):
         """
         添加买卖点类型。
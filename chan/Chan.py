@@ -13,6 +13,7 @@ from .ChanConfig import CChanConfig
 from .Common.CEnum import AUTYPE, DATA_SRC, KL_TYPE
 from .Common.ChanException import CChanException, ErrCode
 from .Common.CTime import CTime
+from .Common.snapshot import SNAPSHOT_KEY
 from .Common.func_util import check_kltype_order, kltype_lte_day
 
 # 从 DataAPI 模块导入公共股票 API 类
@@ -109,17 +110,25 @@ class CChan:
         obj.g_kl_iter = copy.deepcopy(self.g_kl_iter, memo)
 
         # 拷贝属性 klu_cache 和 klu_last_t（如果存在）
+        # 缓存中的 K 线单元还没有加入任何级别，生成快照时也要复制，否则会被两边同时加载
         if hasattr(self, "klu_cache"):
-            obj.klu_cache = copy.deepcopy(self.klu_cache, memo)
+            if SNAPSHOT_KEY in memo:
+                obj.klu_cache = [klu and klu.copy_unit(memo) for klu in self.klu_cache]
+            else:
+                obj.klu_cache = copy.deepcopy(self.klu_cache, memo)
         if hasattr(self, "klu_last_t"):
             obj.klu_last_t = copy.deepcopy(self.klu_last_t, memo)
 
-        # 深拷贝 K 线数据并保持子父关系
+        # 深拷贝 K 线数据并保持子父关系，生成快照时只复制各级别分界之后的尾部
+        snapshot_pos = memo.get(SNAPSHOT_KEY)
         obj.kl_datas = {}
         for kl_type, ckline in self.kl_datas.items():
-            obj.kl_datas[kl_type] = copy.deepcopy(ckline, memo)
+            if snapshot_pos is None:
+                obj.kl_datas[kl_type] = copy.deepcopy(ckline, memo)
+            else:
+                obj.kl_datas[kl_type] = ckline.copy_tail(memo, snapshot_pos[kl_type])
         for kl_type, ckline in self.kl_datas.items():
-            for klc in ckline:
+            for klc in ckline.lst[0 if snapshot_pos is None else snapshot_pos[kl_type][0]:]:
                 for klu in klc.lst:
                     assert id(klu) in memo
                     if klu.sup_kl:
@@ -129,6 +138,45 @@ class CChan:
                     ]
         return obj
 
+    def snapshot(self) -> "CChan":
+        """
+        生成写时复制的快照，用于从当前位置分支推演，或交给绘图线程只读使用。
+
+        之后的计算不会再修改的K线、笔、线段、中枢和买卖点在快照和当前对象之间共享，只复制仍可能变化的尾部，
+        开销与尾部长度成正比而不是与历史长度成正比。快照和当前对象都可以继续 trigger_load，互不影响。
+        共享部分最后一个元素的 next 仍指向当前对象的尾部，遍历时请使用各个列表。
+
+        返回：
+            CChan: 快照对象。
+        """
+        snapshot_pos = {kl_type: ckline.get_snapshot_pos() for kl_type, ckline in self.kl_datas.items()}
+        self.align_snapshot_pos(snapshot_pos)
+        return copy.deepcopy(self, {SNAPSHOT_KEY: snapshot_pos})
+
+    def align_snapshot_pos(self, snapshot_pos: Dict[KL_TYPE, List[int]]):
+        """
+        对齐相邻级别的快照分界：复制的父级别 K 线单元的子 K 线单元都要复制，复制的子级别 K 线单元的父 K 线单元也要复制，
+        否则共享部分的 sup_kl、sub_kl_list 会指向另一方的尾部。分界只会前移，直到不再变化。
+
+        参数：
+            snapshot_pos: 各级别 get_snapshot_pos 的结果，原地修改其中的合并 K 线分界。
+        """
+        changed = True
+        while changed:
+            changed = False
+            for lv, sub_lv in zip(self.lv_list[:-1], self.lv_list[1:]):
+                ckline, sub_ckline = self.kl_datas[lv], self.kl_datas[sub_lv]
+                klc_begin, sub_klc_begin = snapshot_pos[lv][0], snapshot_pos[sub_lv][0]
+                for klu in ckline.klu_iter(klc_begin):
+                    if klu.sub_kl_list:
+                        sub_klc_begin = min(sub_klc_begin, klu.sub_kl_list[0].klc.idx)
+                        break
+                if sub_klc_begin < len(sub_ckline) and (sup_kl := sub_ckline[sub_klc_begin].lst[0].sup_kl):
+                    klc_begin = min(klc_begin, sup_kl.klc.idx)
+                if klc_begin != snapshot_pos[lv][0] or sub_klc_begin != snapshot_pos[sub_lv][0]:
+                    snapshot_pos[lv][0], snapshot_pos[sub_lv][0] = klc_begin, sub_klc_begin
+                    changed = True
+
     def do_init(self):
         """
         初始化 K 线数据字典 `kl_datas`。
@@ -350,47 +398,7 @@ class CChan:
         Raises:
             CChanException: 如果数据源类型无效或无法加载时，抛出异常。
         """
-        _dict = {}  # 存储数据源到类的映射
-        if self.data_src == DATA_SRC.BAO_STOCK:
-            from DataAPI.BaoStockAPI import CBaoStock
-
-            _dict[DATA_SRC.BAO_STOCK] = CBaoStock
-        elif self.data_src == DATA_SRC.CCXT:
-            from DataAPI.ccxt import CCXT
-
-            _dict[DATA_SRC.CCXT] = CCXT
-        elif self.data_src == DATA_SRC.CSV:
-            from DataAPI.csvAPI import CSV_API
-
-            _dict[DATA_SRC.CSV] = CSV_API
-
-        # 如果数据源在映射字典中，返回对应的类
-        if self.data_src in _dict:
-            return _dict[self.data_src]
-
-        assert isinstance(self.data_src, str)  # 确保数据源类型为字符串
-
-        # 如果数据源不包含 "custom:"，抛出数据源类型错误
-        if self.data_src.find("custom:") < 0:
-            raise CChanException("load src type error", ErrCode.SRC_DATA_TYPE_ERR)
-
-        # 解析自定义模块和类名称，并导入
-        # package_info = self.data_src.split(":")[1]
-        # package_name, cls_name = package_info.split(".")
-        # exec(f"from DataAPI.{package_name} import {cls_name}")  # 动态导入模块
-        # return eval(cls_name)  # 返回对应的类
-    
-        # 从数据源字符串中提取包信息
-        package_info = self.data_src.split(":")[1]  # 以冒号为分隔符，获取数据源的包信息部分
-        # 将包信息分解为包名称和类名称
-        package_name, cls_name = package_info.split(".")  # 以点号为分隔符，获取模块名称和类名称
-        # 动态导入指定的数据 API 模块
-        module = importlib.import_module(f".DataAPI.{package_name}", package=__package__)  
-        # 使用 importlib 动态导入 DataAPI 目录下指定的模块，`..`表示上级目录，`package=__package__`确保包的上下文正确
-        # 获取模块中指定名称的类
-        cls = getattr(module, cls_name)  # 从导入的模块中获取指定的类
-        # 返回该类
-        return cls  # 返回动态导入的类以供后续使用
+        return get_stock_api(self.data_src)
 
     def load(self, step=False):
         """
@@ -588,11 +596,7 @@ class CChan:
 
         如果父级和子级的时间不一致，则记录不一致的信息，并在需要时抛出异常。
         """
-        if (
-            parent_klu.time.year != sub_klu.time.year
-            or parent_klu.time.month != sub_klu.time.month
-            or parent_klu.time.day != sub_klu.time.day
-        ):
+        if parent_klu.time.epoch // 86400 != sub_klu.time.epoch // 86400:  # 不在同一天
             # 记录不一致的详细信息
             self.kl_inconsistent_detail[str(parent_klu.time)].append(sub_klu.time)
             if self.conf.print_warning:
@@ -667,3 +671,48 @@ class CChan:
         assert len(self.lv_list) == 1  # 确保只有一个级别
         # 默认返回最高级别的 BSP 列表
         return sorted(self[0].bs_point_lst.lst, key=lambda x: x.klu.time)
+
+
+def get_stock_api(data_src: Union[DATA_SRC, str]):
+    """根据数据源返回对应的股票 API 类，见 CChan.GetStockAPI。"""
+    _dict = {}  # 存储数据源到类的映射
+    if data_src == DATA_SRC.BAO_STOCK:
+        from DataAPI.BaoStockAPI import CBaoStock
+
+        _dict[DATA_SRC.BAO_STOCK] = CBaoStock
+    elif data_src == DATA_SRC.CCXT:
+        from DataAPI.ccxt import CCXT
+
+        _dict[DATA_SRC.CCXT] = CCXT
+    elif data_src == DATA_SRC.CSV:
+        from .DataAPI.csvAPI import CSV_API
+
+        _dict[DATA_SRC.CSV] = CSV_API
+
+    # 如果数据源在映射字典中，返回对应的类
+    if data_src in _dict:
+        return _dict[data_src]
+
+    assert isinstance(data_src, str)  # 确保数据源类型为字符串
+
+    # 如果数据源不包含 "custom:"，抛出数据源类型错误
+    if data_src.find("custom:") < 0:
+        raise CChanException("load src type error", ErrCode.SRC_DATA_TYPE_ERR)
+
+    # 解析自定义模块和类名称，并导入
+    # package_info = data_src.split(":")[1]
+    # package_name, cls_name = package_info.split(".")
+    # exec(f"from DataAPI.{package_name} import {cls_name}")  # 动态导入模块
+    # return eval(cls_name)  # 返回对应的类
+
+    # 从数据源字符串中提取包信息
+    package_info = data_src.split(":")[1]  # 以冒号为分隔符，获取数据源的包信息部分
+    # 将包信息分解为包名称和类名称
+    package_name, cls_name = package_info.split(".")  # 以点号为分隔符，获取模块名称和类名称
+    # 动态导入指定的数据 API 模块
+    module = importlib.import_module(f".DataAPI.{package_name}", package=__package__)  
+    # 使用 importlib 动态导入 DataAPI 目录下指定的模块，`..`表示上级目录，`package=__package__`确保包的上下文正确
+    # 获取模块中指定名称的类
+    cls = getattr(module, cls_name)  # 从导入的模块中获取指定的类
+    # 返回该类
+    return cls  # 返回动态导入的类以供后续使用
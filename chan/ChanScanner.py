@@ -0,0 +1,242 @@
+"""
+多标的缠论扫描：把标的列表分片交给进程池，每个进程只初始化一次数据源，
+逐个标的计算 CChan 后把各级别最新的买卖点、笔、线段、中枢状态按列返回。
+
+用法：
+    scanner = CChanScanner(CChanConfig({...}), [KL_TYPE.K_DAY, KL_TYPE.K_30M], data_src=DATA_SRC.CSV)
+    for chunk in scanner.scan(code_list):  # 每完成一个分片返回一块按列组织的结果
+        ...
+    table = scanner.scan_table(code_list)  # 或等全部完成后合并为一张表，行按 code_list 顺序排列
+"""
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+from typing import Dict, Iterable, Iterator, List, Optional, Type, Union
+
+from .BuySellPoint.BSPointList import CBSPointList
+from .Chan import CChan, get_stock_api
+from .ChanConfig import CChanConfig
+from .Common.CEnum import AUTYPE, DATA_SRC, KL_TYPE
+from .DataAPI.CommonStockAPI import CCommonStockApi
+from .KLine.KLine_List import CKLine_List
+
+# 结果表的列，每个标的的每个级别一行；计算失败的标的只有一行，lv 为 None，error 为异常信息
+SCAN_COLUMNS = [
+    "code",
+    "lv",
+    "klu_cnt",  # K线数量
+    "last_time",  # 最后一根K线的时间
+    "bi_cnt",
+    "last_bi_dir",
+    "last_bi_is_sure",
+    "seg_cnt",
+    "last_seg_dir",
+    "last_seg_is_sure",
+    "zs_cnt",
+    "last_zs_low",
+    "last_zs_high",
+    "last_zs_begin_time",
+    "last_zs_end_time",
+    "bsp_type",  # 最近一个笔买卖点的类型，如 "2,3b"
+    "bsp_is_buy",
+    "bsp_time",
+    "bsp_klu_ago",  # 最近一个笔买卖点距离最后一根K线的K线数，0 表示就在最后一根
+    "seg_bsp_type",  # 最近一个线段买卖点
+    "seg_bsp_is_buy",
+    "seg_bsp_time",
+    "seg_bsp_klu_ago",
+    "error",
+]
+
+# 进程内已初始化的数据源类，由 set_worker_stock_api 设置
+_worker_stockapi_cls: Optional[Type[CCommonStockApi]] = None
+
+
+class CScanChan(CChan):
+    """扫描进程中使用的 CChan，数据源已在进程启动时初始化，单个标的加载时不再重复 do_init/do_close。"""
+
+    def GetStockAPI(self):
+        if _worker_stockapi_cls is None:
+            return super(CScanChan, self).GetStockAPI()
+        return _worker_stockapi_cls
+
+
+def set_worker_stock_api(stockapi_cls: Optional[Type[CCommonStockApi]]):
+    """设置进程内已初始化的数据源，CScanChan 加载单个标的时使用不会重复初始化、关闭的子类。"""
+    global _worker_stockapi_cls
+    if stockapi_cls is None:
+        _worker_stockapi_cls = None
+        return
+    _worker_stockapi_cls = type(stockapi_cls.__name__, (stockapi_cls,), {
+        "do_init": classmethod(lambda cls: None),
+        "do_close": classmethod(lambda cls: None),
+    })
+
+
+def init_scan_worker(data_src: Union[DATA_SRC, str]):
+    """进程池初始化函数：初始化一次数据源，进程退出时关闭。"""
+    stockapi_cls = get_stock_api(data_src)
+    stockapi_cls.do_init()
+    Finalize(None, stockapi_cls.do_close, exitpriority=10)
+    set_worker_stock_api(stockapi_cls)
+
+
+def new_scan_table() -> Dict[str, list]:
+    return {column: [] for column in SCAN_COLUMNS}
+
+
+def concat_scan_table(table_lst: Iterable[Dict[str, list]]) -> Dict[str, list]:
+    """把多块按列组织的结果合并为一张表。"""
+    res = new_scan_table()
+    for table in table_lst:
+        for column in SCAN_COLUMNS:
+            res[column].extend(table[column])
+    return res
+
+
+def add_bsp_columns(row: dict, prefix: str, bsp_list: CBSPointList, last_klu_idx: int):
+    bsp_lst = bsp_list.getLastestBspList()
+    bsp = bsp_lst[0] if bsp_lst else None
+    row[f"{prefix}_type"] = bsp and bsp.type2str()
+    row[f"{prefix}_is_buy"] = bsp and bsp.is_buy
+    row[f"{prefix}_time"] = bsp and str(bsp.klu.time)
+    row[f"{prefix}_klu_ago"] = bsp and last_klu_idx - bsp.klu.idx
+
+
+def get_scan_row(code: str, lv: KL_TYPE, kl_list: CKLine_List) -> dict:
+    """提取一个级别当前的笔、线段、中枢和最近的买卖点。"""
+    row: dict = dict.fromkeys(SCAN_COLUMNS)
+    row["code"] = code
+    row["lv"] = lv.name
+    if len(kl_list) == 0:
+        row["klu_cnt"] = 0
+        return row
+    last_klu = kl_list[-1][-1]
+    row["klu_cnt"] = last_klu.idx + 1
+    row["last_time"] = str(last_klu.time)
+
+    row["bi_cnt"] = len(kl_list.bi_list)
+    if len(kl_list.bi_list):
+        row["last_bi_dir"] = kl_list.bi_list[-1].dir.name
+        row["last_bi_is_sure"] = kl_list.bi_list[-1].is_sure
+
+    row["seg_cnt"] = len(kl_list.seg_list)
+    if len(kl_list.seg_list):
+        row["last_seg_dir"] = kl_list.seg_list[-1].dir.name
+        row["last_seg_is_sure"] = kl_list.seg_list[-1].is_sure
+
+    row["zs_cnt"] = len(kl_list.zs_list)
+    if len(kl_list.zs_list):
+        zs = kl_list.zs_list[-1]
+        row["last_zs_low"] = zs.low
+        row["last_zs_high"] = zs.high
+        row["last_zs_begin_time"] = str(zs.begin.time)
+        row["last_zs_end_time"] = str(zs.end.time)
+
+    add_bsp_columns(row, "bsp", kl_list.bs_point_lst, last_klu.idx)
+    add_bsp_columns(row, "seg_bsp", kl_list.seg_bs_point_lst, last_klu.idx)
+    return row
+
+
+def scan_codes(
+    code_lst: List[str],
+    config: CChanConfig,
+    lv_list: List[KL_TYPE],
+    data_src: Union[DATA_SRC, str],
+    begin_time=None,
+    end_time=None,
+    autype: AUTYPE = AUTYPE.QFQ,
+) -> Dict[str, list]:
+    """依次计算一批标的，返回按列组织的结果；单个标的出错时记录在 error 列，不影响其他标的。"""
+    table = new_scan_table()
+    for code in code_lst:
+        try:
+            chan = CScanChan(
+                code=code,
+                begin_time=begin_time,
+                end_time=end_time,
+                data_src=data_src,
+                lv_list=list(lv_list),
+                config=copy.deepcopy(config),
+                autype=autype,
+            )
+            if chan.conf.trigger_step:
+                for _ in chan.step_load():
+                    ...
+            rows = [get_scan_row(code, lv, chan[lv]) for lv in chan.lv_list]
+        except Exception as e:
+            rows = [dict.fromkeys(SCAN_COLUMNS)]
+            rows[0]["code"] = code
+            rows[0]["error"] = f"{type(e).__name__}: {e}"
+        for row in rows:
+            for column in SCAN_COLUMNS:
+                table[column].append(row[column])
+    return table
+
+
+class CChanScanner:
+    """
+    多进程扫描多个标的。
+
+    :param config: 每个标的使用的 CChanConfig（各标的使用独立的拷贝）。
+    :param lv_list: K 线级别列表，顺序从高到低。
+    :param data_src: 数据来源，与 CChan 相同。
+    :param max_workers: 进程数，默认为 CPU 核数；为 1 时在当前进程中计算。
+    :param chunk_size: 每个分片的标的数，默认让每个进程分到约 4 个分片。
+    """
+
+    def __init__(
+        self,
+        config: CChanConfig,
+        lv_list: List[KL_TYPE],
+        data_src: Union[DATA_SRC, str] = DATA_SRC.BAO_STOCK,
+        begin_time=None,
+        end_time=None,
+        autype: AUTYPE = AUTYPE.QFQ,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ):
+        self.config = config
+        self.lv_list = lv_list
+        self.data_src = data_src
+        self.begin_time = begin_time
+        self.end_time = end_time
+        self.autype = autype
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def split_chunks(self, code_lst: List[str]) -> List[List[str]]:
+        chunk_size = self.chunk_size or max(1, -(-len(code_lst) // (self.max_workers * 4)))
+        return [code_lst[i:i+chunk_size] for i in range(0, len(code_lst), chunk_size)]
+
+    def scan(self, code_lst: Iterable[str]) -> Iterator[Dict[str, list]]:
+        """按分片完成的先后返回按列组织的结果。"""
+        chunks = self.split_chunks(list(code_lst))
+        args = (self.config, self.lv_list, self.data_src, self.begin_time, self.end_time, self.autype)
+        if self.max_workers == 1:
+            stockapi_cls = get_stock_api(self.data_src)
+            stockapi_cls.do_init()
+            try:
+                for chunk in chunks:
+                    set_worker_stock_api(stockapi_cls)
+                    try:
+                        res = scan_codes(chunk, *args)
+                    finally:
+                        set_worker_stock_api(None)
+                    yield res
+            finally:
+                stockapi_cls.do_close()
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_scan_worker, initargs=(self.data_src,)) as executor:
+            futures = [executor.submit(scan_codes, chunk, *args) for chunk in chunks]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def scan_table(self, code_lst: Iterable[str]) -> Dict[str, list]:
+        """扫描全部标的并合并为一张表，行按 code_lst 的顺序排列。"""
+        code_lst = list(code_lst)
+        table = concat_scan_table(self.scan(code_lst))
+        code_pos = {code: pos for pos, code in enumerate(code_lst)}
+        order = sorted(range(len(table["code"])), key=lambda i: code_pos[table["code"][i]])
+        return {column: [values[i] for i in order] for column, values in table.items()}
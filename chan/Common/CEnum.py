@@ -185,6 +185,7 @@ class DATA_FIELD:
 
     FIELD_TIMESTAMP = "timestamp"  # 时间戳
     FIELD_TIME = "time_key"  # 时间键
+    FIELD_DATETIME = "datetime"  # 日期时间字符串，读取后转为 FIELD_TIME
     FIELD_OPEN = "open"  # 开盘价
     FIELD_HIGH = "high"  # 最高价
     FIELD_LOW = "low"  # 最低价
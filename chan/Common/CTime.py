@@ -1,7 +1,21 @@
 from datetime import datetime, timedelta
 
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+ONE_MILLISECOND = timedelta(milliseconds=1)
+AUTO_DAY_OFFSET = 23 * 3600 + 59 * 60  # auto 时 00:00 视为当天 23:59
+
 
 class CTime:
+    """
+    K线时间。
+
+    内部只保存一个整数 epoch：把年月日时分秒当作 UTC 换算出的秒数（与本机时区无关），比较时直接比较整数；
+    年月日等字段、字符串和本地时区的毫秒时间戳 ts 在第一次用到时计算并缓存。
+    创建后不再修改，拷贝时直接共享同一个对象。
+    """
+    __slots__ = ("epoch", "auto", "cmp_key", "_fields", "_str", "_ts")
+
     def __init__(self, year, month, day, hour, minute, second=0, auto=False):
         """
         初始化 CTime 类的实例。
@@ -14,14 +28,100 @@ class CTime:
         :param second: 秒，默认为0
         :param auto: 是否自适应对天的理解，默认为 False
         """
-        self.year = year
-        self.month = month
-        self.day = day
-        self.hour = hour
-        self.minute = minute
-        self.second = second
+        ordinal = datetime(year, month, day, hour, minute, second).toordinal()  # 同时检查各字段是否合法
+        self.set_epoch((ordinal - EPOCH_ORDINAL) * 86400 + hour * 3600 + minute * 60 + second, auto)
+        self._fields = (year, month, day, hour, minute, second)
+
+    def set_epoch(self, epoch: int, auto: bool):
+        self.epoch = epoch
         self.auto = auto  # 自适应对天的理解
-        self.set_timestamp()  # 设置时间戳
+        # 比较用的秒数，当小时和分钟均为0且 auto 为 True 时按当天的23:59比较
+        self.cmp_key = epoch + AUTO_DAY_OFFSET if auto and epoch % 86400 < 60 else epoch
+        self._fields = None
+        self._str = None
+        self._ts = None
+
+    @classmethod
+    def from_epoch(cls, epoch: int, auto=False) -> "CTime":
+        """由 epoch 秒数（把时间当作 UTC 换算）创建。"""
+        obj = cls.__new__(cls)
+        obj.set_epoch(int(epoch), auto)
+        return obj
+
+    @classmethod
+    def from_datetime(cls, dt: datetime, auto=False) -> "CTime":
+        """由 datetime 创建，带时区的 datetime 取其当地时间，秒以下的部分舍去。"""
+        obj = cls.__new__(cls)
+        obj.set_epoch((dt.toordinal() - EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second, auto)
+        return obj
+
+    @classmethod
+    def from_datetime64(cls, value, auto=False) -> "CTime":
+        """由 numpy.datetime64 创建，秒以下的部分舍去。"""
+        return cls.from_epoch(value.astype("datetime64[s]").astype("int64"), auto)
+
+    def __reduce__(self):
+        return self.__class__.from_epoch, (self.epoch, self.auto)
+
+    def __setstate__(self, state):
+        # 兼容旧版本按年月日等字段保存的对象
+        slots = state[1] if isinstance(state, tuple) else state
+        self.__init__(
+            slots["year"], slots["month"], slots["day"], slots["hour"], slots["minute"], slots["second"], slots["auto"]
+        )
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def get_fields(self) -> tuple:
+        """返回 (年, 月, 日, 时, 分, 秒)。"""
+        if self._fields is None:
+            days, seconds = divmod(self.epoch, 86400)
+            date = datetime.fromordinal(days + EPOCH_ORDINAL)
+            hour, seconds = divmod(seconds, 3600)
+            minute, second = divmod(seconds, 60)
+            self._fields = (date.year, date.month, date.day, hour, minute, second)
+        return self._fields
+
+    @property
+    def year(self):
+        return self.get_fields()[0]
+
+    @property
+    def month(self):
+        return self.get_fields()[1]
+
+    @property
+    def day(self):
+        return self.get_fields()[2]
+
+    @property
+    def hour(self):
+        return self.get_fields()[3]
+
+    @property
+    def minute(self):
+        return self.get_fields()[4]
+
+    @property
+    def second(self):
+        return self.get_fields()[5]
+
+    @property
+    def ts(self) -> int:
+        """
+        本地时区的毫秒时间戳。
+        当小时和分钟均为0且 auto 为 True 时，时间戳为当天的23:59。
+        """
+        if self._ts is None:
+            year, month, day, hour, minute, second = self.get_fields()
+            if hour == 0 and minute == 0 and self.auto:
+                hour, minute = 23, 59
+            self._ts = int(datetime(year, month, day, hour, minute, second).timestamp() * 1000)
+        return self._ts
 
     def __str__(self):
         """
@@ -29,10 +129,13 @@ class CTime:
 
         :return: 格式为 "YYYY/MM/DD" 或 "YYYY/MM/DD HH:MM" 的字符串
         """
-        if self.hour == 0 and self.minute == 0:
-            return f"{self.year:04}/{self.month:02}/{self.day:02}"
-        else:
-            return f"{self.year:04}/{self.month:02}/{self.day:02} {self.hour:02}:{self.minute:02}:{self.second:02}"
+        if self._str is None:
+            year, month, day, hour, minute, second = self.get_fields()
+            if hour == 0 and minute == 0:
+                self._str = f"{year:04}/{month:02}/{day:02}"
+            else:
+                self._str = f"{year:04}/{month:02}/{day:02} {hour:02}:{minute:02}:{second:02}"
+        return self._str
 
     def to_str(self):
         """
@@ -49,7 +152,8 @@ class CTime:
         :param splt: 分隔符，默认为空字符串
         :return: 日期字符串
         """
-        return f"{self.year:04}{splt}{self.month:02}{splt}{self.day:02}"
+        year, month, day = self.get_fields()[:3]
+        return f"{year:04}{splt}{month:02}{splt}{day:02}"
 
     def toDate(self):
         """
@@ -57,42 +161,36 @@ class CTime:
 
         :return: CTime 对象
         """
-        return CTime(self.year, self.month, self.day, 0, 0, auto=False)
-    
+        return CTime.from_epoch(self.epoch - self.epoch % 86400)
 
     def to_datetime(self):
         """
         将 CTime 对象转换为 datetime 对象。
-        
+
         :return: datetime 对象
         """
-        return datetime(self.year, self.month, self.day, self.hour, self.minute, self.second)
+        return datetime(*self.get_fields())
 
-    def set_timestamp(self):
-        """
-        设置时间戳（ts），用于比较两个 CTime 对象。
-        当小时和分钟均为0且 auto 为 True 时，时间戳为前一天的23:59。
-        """
-        if self.hour == 0 and self.minute == 0 and self.auto:
-            date = datetime(self.year, self.month, self.day, 23, 59, self.second)
-        else:
-            date = datetime(
-                self.year, self.month, self.day, self.hour, self.minute, self.second
-            )
-        self.ts = int(date.timestamp() * 1000)
+    def datetime_cmp_key(self, other: datetime):
+        """返回 (本对象, other) 用于比较的毫秒数，不带时区的 datetime 不经过本地时区换算。"""
+        if other.tzinfo is None:
+            return self.cmp_key * 1000, (other - EPOCH) // ONE_MILLISECOND
+        return self.ts, int(other.timestamp() * 1000)
 
     def __gt__(self, other):
-        if isinstance(other, datetime):
-            return self.ts > int(other.timestamp() * 1000)
-        elif isinstance(other, CTime):
-            return self.ts > other.ts
+        if isinstance(other, CTime):
+            return self.cmp_key > other.cmp_key
+        elif isinstance(other, datetime):
+            key, other_key = self.datetime_cmp_key(other)
+            return key > other_key
         return NotImplemented
 
     def __lt__(self, other):
-        if isinstance(other, datetime):
-            return self.ts < int(other.timestamp() * 1000)
-        elif isinstance(other, CTime):
-            return self.ts < other.ts
+        if isinstance(other, CTime):
+            return self.cmp_key < other.cmp_key
+        elif isinstance(other, datetime):
+            key, other_key = self.datetime_cmp_key(other)
+            return key < other_key
         return NotImplemented
 
     def __add__(self, other):
@@ -0,0 +1,567 @@
+"""
+CChan 检查点文件格式（version 1，小端）：
+
+    header   <4sHHQ>：magic、版本号、保留字段、meta 长度
+    meta     JSON：代码、级别、各段的 [typecode, 偏移, 元素个数]（偏移相对数据区开头）
+    数据区   按 8 字节对齐的列，段名为 "<级别>.<表>.<列>"，以及保存其余状态的 "state" 段
+
+K线单元、合并K线按列保存，加载时直接由列重建，不经过 pickle；笔、线段、中枢、买卖点另外保存一份只读的索引表，
+可以通过 CChanCheckpoint.column 内存映射后直接分析。其余状态（笔、线段、中枢、买卖点对象本身，指标模型等）
+放在 state 段中，其中所有链式对象都以 persistent id 引用，pickle 时不会沿 pre/next 递归。
+"""
+import array
+import gc
+import io
+import json
+import math
+import mmap
+import pickle
+import struct
+import sys
+from datetime import datetime
+from typing import Dict, List
+
+from ..Bi.Bi import CBi
+from ..BuySellPoint.BS_Point import CBS_Point
+from ..Chan import CChan
+from ..KLine.KLine import CKLine
+from ..KLine.KLine_List import CKLine_List
+from ..KLine.KLine_Unit import EMPTY_DEMARK, EMPTY_SUB_KL, EMPTY_TREND, CKLine_Unit
+from ..KLine.TradeInfo import CTradeInfo
+from ..Math.BOLL import BOLL_Metric
+from ..Math.KDJ import KDJ_Item
+from ..Math.MACD import CMACD, CMACD_item
+from ..Seg.Seg import CSeg
+from ..ZS.ZS import CZS
+from .CEnum import BI_DIR, BI_TYPE, BSP_TYPE, FX_TYPE, KL_TYPE, KLINE_DIR, TRADE_INFO_LST
+from .ChanException import CChanException, ErrCode
+from .CTime import CTime
+
+FILE_MAGIC: bytes = b"CHCK"
+FILE_VERSION: int = 1
+FILE_HEADER: struct.Struct = struct.Struct("<4sHHQ")
+CHECKPOINT_SUFFIX: str = ".chk"
+
+# 可选指标对应的列，未配置的指标不写入
+INDICATOR_FIELDS: Dict[str, tuple] = {
+    "macd": ("fast_ema", "slow_ema", "DIF", "DEA", "macd"),
+    "boll": ("theta", "UP", "DOWN", "MID"),
+    "kdj": ("k", "d", "j"),
+}
+BSP_TYPE_LST: List[BSP_TYPE] = list(BSP_TYPE)
+
+# persistent id 中各类链式对象的种类，以及对应的 CKLine_List 属性
+LINE_KINDS: Dict[str, tuple] = {
+    "bi": (CBi, "bi_list", "bi_list"),
+    "seg": (CSeg, "seg_list", "lst"),
+    "segseg": (CSeg, "segseg_list", "lst"),
+    "zs": (CZS, "zs_list", "zs_lst"),
+    "segzs": (CZS, "segzs_list", "zs_lst"),
+}
+BSP_KINDS: Dict[str, str] = {
+    "bsp": "bs_point_lst",
+    "segbsp": "seg_bs_point_lst",
+}
+
+
+def align8(size: int) -> int:
+    return size + (-size % 8)
+
+
+def to_little_endian(arr: array.array) -> array.array:
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+def get_bsp_objects(bsp_list) -> list:
+    """返回买卖点列表中的全部买卖点，lst、bsp1_lst 和 bsp_dict 中同一个买卖点只出现一次。"""
+    bsps = {}
+    for bsp in bsp_list.lst + bsp_list.bsp1_lst + list(bsp_list.bsp_dict.values()):
+        bsps.setdefault(id(bsp), bsp)
+    return list(bsps.values())
+
+
+class CStatePickler(pickle.Pickler):
+    def __init__(self, file, refs: Dict[int, tuple]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.refs = refs
+
+    def persistent_id(self, obj):
+        return self.refs.get(id(obj))
+
+
+class CStateUnpickler(pickle.Unpickler):
+    def __init__(self, file, objs: Dict[tuple, list]):
+        super().__init__(file)
+        self.objs = objs
+
+    def persistent_load(self, pid):
+        kind, lv_idx, pos = pid
+        return self.objs[kind, lv_idx][pos]
+
+
+class CCheckpointWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.sections: Dict[str, list] = {}
+
+    def add(self, name: str, typecode: str, values):
+        arr = to_little_endian(array.array(typecode, values))
+        self.data += b"\0" * (align8(len(self.data)) - len(self.data))
+        self.sections[name] = [typecode, len(self.data), len(arr)]
+        self.data += arr.tobytes()
+
+    def add_bytes(self, name: str, buf: bytes):
+        self.data += b"\0" * (align8(len(self.data)) - len(self.data))
+        self.sections[name] = ["B", len(self.data), len(buf)]
+        self.data += buf
+
+    def write(self, path, meta: dict):
+        meta["sections"] = self.sections
+        meta_buf = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        header = FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, 0, len(meta_buf))
+        if hasattr(path, "write"):
+            self.write_file(path, header, meta_buf)
+        else:
+            with open(path, "wb") as f:
+                self.write_file(f, header, meta_buf)
+
+    def write_file(self, f, header: bytes, meta_buf: bytes):
+        f.write(header)
+        f.write(meta_buf)
+        f.write(b"\0" * (align8(len(header) + len(meta_buf)) - len(header) - len(meta_buf)))
+        f.write(self.data)
+
+
+def save_chan_checkpoint(chan: CChan, path):
+    """
+    把 CChan 保存为检查点文件，用 load_chan_checkpoint 加载后可以继续 trigger_load。
+
+    尚未读完的数据迭代器（g_kl_iter）和 pickle.dump 时一样需要能被 pickle，trigger_load 传入的列表迭代器可以。
+
+    Args:
+        chan (CChan): 需要保存的 CChan 对象。
+        path: 文件路径，一般以 CHECKPOINT_SUFFIX 结尾；也可以是以二进制方式打开的文件对象（如 io.BytesIO）。
+    """
+    writer = CCheckpointWriter()
+    refs: Dict[int, tuple] = {}
+    levels = []
+    kl_states = {}
+    objects = []
+    for lv_idx, lv in enumerate(chan.lv_list):
+        kl_list = chan.kl_datas[lv]
+        prefix = f"{lv.name}."
+        klu_lst = [klu for klc in kl_list.lst for klu in klc.lst]
+        klu_pos = {id(klu): pos for pos, klu in enumerate(klu_lst)}
+        for pos, klu in enumerate(klu_lst):
+            refs[id(klu)] = ("klu", lv_idx, pos)
+        for pos, klc in enumerate(kl_list.lst):
+            refs[id(klc)] = ("klc", lv_idx, pos)
+        level = {
+            "kl_type": lv.name,
+            "klu_cnt": len(klu_lst),
+            "klc_cnt": len(kl_list.lst),
+            "trade_info": [],
+            "indicators": [],
+        }
+        write_klu_columns(writer, prefix, klu_lst, level, lv_idx, refs)
+        if lv_idx > 0:
+            sup_pos = {id(klu): pos for pos, klu in enumerate(chan.kl_datas[chan.lv_list[lv_idx-1]].klu_iter())}
+            writer.add(prefix + "klu.sup", "q", [sup_pos.get(id(klu.sup_kl), -1) for klu in klu_lst])
+        write_klc_columns(writer, prefix, kl_list.lst, klu_pos)
+
+        # macd_info 与各K线单元的 macd 是同一批对象，整体按列重建
+        level["macd_info"] = []
+        for model_idx, metric_model in enumerate(kl_list.metric_model_lst):
+            if isinstance(metric_model, CMACD) and "macd" in level["indicators"] and len(metric_model.macd_info) == len(klu_lst) \
+                    and all(item is klu.macd for item, klu in zip(metric_model.macd_info, klu_lst)):
+                refs[id(metric_model.macd_info)] = ("macd_info", lv_idx, model_idx)
+                level["macd_info"].append(model_idx)
+
+        for kind, (_, attr, lst_attr) in LINE_KINDS.items():
+            lines = getattr(getattr(kl_list, attr), lst_attr)
+            level[kind + "_cnt"] = len(lines)
+            for pos, line in enumerate(lines):
+                refs[id(line)] = (kind, lv_idx, pos)
+            objects.extend(lines)
+        for kind, attr in BSP_KINDS.items():
+            bsps = get_bsp_objects(getattr(kl_list, attr))
+            level[kind + "_cnt"] = len(bsps)
+            for pos, bsp in enumerate(bsps):
+                refs[id(bsp)] = (kind, lv_idx, pos)
+            objects.extend(bsps)
+        write_index_tables(writer, prefix, kl_list)
+
+        kl_states[lv_idx] = {
+            "state": {key: value for key, value in vars(kl_list).items() if key != "lst"},
+            "timestamp": {pos: klu.timestamp for pos, klu in enumerate(klu_lst) if klu.timestamp is not None},
+            "demark": {pos: klu.demark for pos, klu in enumerate(klu_lst) if klu.demark is not EMPTY_DEMARK},
+            "trend": {pos: klu.trend for pos, klu in enumerate(klu_lst) if klu.trend},
+        }
+        levels.append(level)
+
+    chan_state = {key: value for key, value in vars(chan).items() if key != "kl_datas"}
+    buf = io.BytesIO()
+    CStatePickler(buf, refs).dump({
+        "chan": chan_state,
+        "kl_datas": kl_states,
+        "objects": [vars(obj) for obj in objects],
+    })
+    writer.add_bytes("state", buf.getvalue())
+    writer.write(path, {
+        "code": chan.code,
+        "lv_list": [lv.name for lv in chan.lv_list],
+        "levels": levels,
+        "enums": {
+            enum_cls.__name__: {item.name: item.value for item in enum_cls}
+            for enum_cls in (KLINE_DIR, FX_TYPE, BI_DIR, BI_TYPE)
+        },
+        "bsp_types": [bsp_type.value for bsp_type in BSP_TYPE_LST],
+    })
+
+
+def get_klu_time(klu: CKLine_Unit) -> CTime:
+    """K线单元的时间；直接用 datetime 创建的K线单元（如 vnpy 策略传入的 bar.datetime）按 CTime 保存。"""
+    if isinstance(klu.time, CTime):
+        return klu.time
+    if isinstance(klu.time, datetime):
+        return CTime.from_datetime(klu.time)
+    raise CChanException(f"unsupported klu time type: {type(klu.time).__name__}", ErrCode.PARA_ERROR)
+
+
+def write_klu_columns(writer: CCheckpointWriter, prefix: str, klu_lst: List[CKLine_Unit], level: dict, lv_idx: int, refs: Dict[int, tuple]):
+    times = [get_klu_time(klu) for klu in klu_lst]
+    writer.add(prefix + "klu.date", "i", [t.year * 10000 + t.month * 100 + t.day for t in times])
+    writer.add(prefix + "klu.hms", "i", [t.hour * 10000 + t.minute * 100 + t.second for t in times])
+    writer.add(prefix + "klu.auto", "b", [t.auto for t in times])
+    writer.add(prefix + "klu.ts", "q", [t.ts for t in times])
+    writer.add(prefix + "klu.epoch", "q", [t.epoch for t in times])
+    for field in ("open", "high", "low", "close"):
+        writer.add(prefix + "klu." + field, "d", [getattr(klu, field) for klu in klu_lst])
+    writer.add(prefix + "klu.idx", "q", [klu.idx for klu in klu_lst])
+    writer.add(prefix + "klu.limit_flag", "b", [klu.limit_flag for klu in klu_lst])
+
+    # 成交量等交易信息缺失时记为 NaN，加载时还原为 None
+    for metric_idx, metric in enumerate(TRADE_INFO_LST):
+        values = [klu.trade_info.values[metric_idx] for klu in klu_lst]
+        if any(value is not None for value in values):
+            writer.add(prefix + "klu." + metric, "d", [math.nan if value is None else value for value in values])
+            level["trade_info"].append(metric)
+
+    for name, fields in INDICATOR_FIELDS.items():
+        if not klu_lst or not hasattr(klu_lst[0], name):
+            continue
+        level["indicators"].append(name)
+        items = [getattr(klu, name) for klu in klu_lst]
+        for field in fields:
+            writer.add(f"{prefix}klu.{name}_{field}", "d", [getattr(item, field) for item in items])
+        for pos, item in enumerate(items):
+            refs[id(item)] = (name, lv_idx, pos)
+    if klu_lst and hasattr(klu_lst[0], "rsi"):
+        level["indicators"].append("rsi")
+        writer.add(prefix + "klu.rsi", "d", [klu.rsi for klu in klu_lst])
+
+
+def write_klc_columns(writer: CCheckpointWriter, prefix: str, klc_lst: List[CKLine], klu_pos: Dict[int, int]):
+    def time_pos(klc, t):
+        for klu in klc.lst:
+            if klu.time is t:
+                return klu_pos[id(klu)]
+        return -1
+
+    writer.add(prefix + "klc.begin", "q", [klu_pos[id(klc.lst[0])] for klc in klc_lst])
+    writer.add(prefix + "klc.idx", "q", [klc.idx for klc in klc_lst])
+    writer.add(prefix + "klc.dir", "b", [klc.dir.value for klc in klc_lst])
+    writer.add(prefix + "klc.fx", "b", [klc.fx.value for klc in klc_lst])
+    writer.add(prefix + "klc.high", "d", [klc.high for klc in klc_lst])
+    writer.add(prefix + "klc.low", "d", [klc.low for klc in klc_lst])
+    writer.add(prefix + "klc.time_begin", "q", [time_pos(klc, klc.time_begin) for klc in klc_lst])
+    writer.add(prefix + "klc.time_end", "q", [time_pos(klc, klc.time_end) for klc in klc_lst])
+    # try_add 合并后记录的最后一根K线单元的时间，没有合并过时为 -1
+    writer.add(prefix + "klc.last_time", "q", [time_pos(klc, klc._time_end) if hasattr(klc, "_time_end") else -1 for klc in klc_lst])
+
+
+def write_index_tables(writer: CCheckpointWriter, prefix: str, kl_list):
+    """写入笔、线段、中枢、买卖点的只读索引表，只用于分析，加载 CChan 时不使用。"""
+    bi_lst = kl_list.bi_list.bi_list
+    writer.add(prefix + "bi.begin_klc", "q", [bi.begin_klc.idx for bi in bi_lst])
+    writer.add(prefix + "bi.end_klc", "q", [bi.end_klc.idx for bi in bi_lst])
+    writer.add(prefix + "bi.dir", "b", [bi.dir.value for bi in bi_lst])
+    writer.add(prefix + "bi.type", "b", [bi.type.value for bi in bi_lst])
+    writer.add(prefix + "bi.is_sure", "b", [bi.is_sure for bi in bi_lst])
+    writer.add(prefix + "bi.seg_idx", "q", [-1 if bi.seg_idx is None else bi.seg_idx for bi in bi_lst])
+    for kind in ("seg", "segseg"):
+        seg_lst = getattr(kl_list, kind + "_list").lst
+        writer.add(f"{prefix}{kind}.start", "q", [seg.start_bi.idx for seg in seg_lst])
+        writer.add(f"{prefix}{kind}.end", "q", [seg.end_bi.idx for seg in seg_lst])
+        writer.add(f"{prefix}{kind}.dir", "b", [seg.dir.value for seg in seg_lst])
+        writer.add(f"{prefix}{kind}.is_sure", "b", [seg.is_sure for seg in seg_lst])
+    for kind in ("zs", "segzs"):
+        zs_lst = getattr(kl_list, kind + "_list").zs_lst
+        writer.add(f"{prefix}{kind}.begin_bi", "q", [zs.begin_bi.idx for zs in zs_lst])
+        writer.add(f"{prefix}{kind}.end_bi", "q", [zs.end_bi.idx for zs in zs_lst])
+        writer.add(f"{prefix}{kind}.begin_klu", "q", [zs.begin.idx for zs in zs_lst])
+        writer.add(f"{prefix}{kind}.end_klu", "q", [zs.end.idx for zs in zs_lst])
+        writer.add(f"{prefix}{kind}.low", "d", [zs.low for zs in zs_lst])
+        writer.add(f"{prefix}{kind}.high", "d", [zs.high for zs in zs_lst])
+        writer.add(f"{prefix}{kind}.is_sure", "b", [zs.is_sure for zs in zs_lst])
+    for kind, attr in BSP_KINDS.items():
+        bsp_lst = getattr(kl_list, attr).lst
+        writer.add(f"{prefix}{kind}.bi", "q", [bsp.bi.idx for bsp in bsp_lst])
+        writer.add(f"{prefix}{kind}.klu", "q", [bsp.klu.idx for bsp in bsp_lst])
+        writer.add(f"{prefix}{kind}.is_buy", "b", [bsp.is_buy for bsp in bsp_lst])
+        # 按 bsp_types 的顺序组成的位掩码
+        writer.add(f"{prefix}{kind}.types", "I", [sum(1 << BSP_TYPE_LST.index(t) for t in bsp.type) for bsp in bsp_lst])
+
+
+class CChanCheckpoint:
+    """
+    以只读内存映射的方式打开检查点文件，传入 bytes 时直接读取内存中的检查点内容。
+
+    column 返回直接指向文件内容的 memoryview，不复制数据，适合只读分析；load_chan 重建可以继续计算的 CChan。
+    """
+
+    def __init__(self, path):
+        if isinstance(path, (bytes, bytearray)):
+            self.file = None
+            self.buf = bytes(path)
+            path = "<bytes>"
+        else:
+            self.file = open(path, "rb")
+            try:
+                self.buf = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            except Exception:
+                self.file.close()
+                raise
+        try:
+            magic, version, _, meta_len = FILE_HEADER.unpack_from(self.buf, 0)
+            if magic != FILE_MAGIC:
+                raise CChanException(f"{path} is not a chan checkpoint", ErrCode.SRC_DATA_FORMAT_ERROR)
+            if version > FILE_VERSION:
+                raise CChanException(f"checkpoint version {version} of {path} is not supported", ErrCode.SRC_DATA_FORMAT_ERROR)
+            self.meta: dict = json.loads(bytes(self.buf[FILE_HEADER.size:FILE_HEADER.size + meta_len]).decode("utf-8"))
+        except Exception:
+            self.close()
+            raise
+        self.version: int = version
+        self.data_offset: int = align8(FILE_HEADER.size + meta_len)
+        self.lv_list: List[KL_TYPE] = [KL_TYPE[name] for name in self.meta["lv_list"]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.file is None:
+            self.buf = None
+            return
+        if self.buf is not None:
+            self.buf.close()
+            self.buf = None
+        self.file.close()
+
+    def has_column(self, lv: KL_TYPE, name: str) -> bool:
+        return f"{lv.name}.{name}" in self.meta["sections"]
+
+    def column(self, lv: KL_TYPE, name: str):
+        """
+        返回某个级别的一列数据，比如 column(KL_TYPE.K_DAY, "klu.close")、column(KL_TYPE.K_DAY, "bi.end_klc")。
+
+        Returns:
+            小端机器上是指向文件内容的只读 memoryview，文件关闭后不能再使用；其他机器上是转换字节序后的 array。
+        """
+        return self.section(f"{lv.name}.{name}")
+
+    def section(self, name: str):
+        if name not in self.meta["sections"]:
+            raise CChanException(f"checkpoint has no section {name}", ErrCode.PARA_ERROR)
+        typecode, offset, count = self.meta["sections"][name]
+        begin = self.data_offset + offset
+        if typecode == "B":
+            return memoryview(self.buf)[begin:begin + count]
+        size = array.array(typecode).itemsize
+        view = memoryview(self.buf)[begin:begin + size * count].cast(typecode)
+        if sys.byteorder == "little":
+            return view
+        arr = array.array(typecode, view.tobytes())
+        arr.byteswap()
+        return arr
+
+    def load_chan(self) -> CChan:
+        """
+        重建 CChan，和保存前一样可以继续 trigger_load。
+
+        Returns:
+            CChan: 重建的 CChan 对象。
+        """
+        # 一次性创建大量对象时暂停垃圾回收，否则分代回收会反复扫描刚创建的K线单元
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self.rebuild_chan()
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def rebuild_chan(self) -> CChan:
+        # persistent id 为 (种类, 级别序号, 序号)，按 (种类, 级别序号) 存放可以被引用的对象列表
+        objs: Dict[tuple, list] = {}
+        shells = []
+        for lv_idx, lv in enumerate(self.lv_list):
+            level = self.meta["levels"][lv_idx]
+            klu_lst = objs["klu", lv_idx] = self.load_units(lv, level)
+            if lv_idx > 0:
+                sup_lst = objs["klu", lv_idx-1]
+                for klu, sup_pos in zip(klu_lst, self.column(lv, "klu.sup")):
+                    if sup_pos >= 0:
+                        sup_kl = sup_lst[sup_pos]
+                        klu.sup_kl = sup_kl
+                        sup_kl.add_children(klu)
+            objs["klc", lv_idx] = self.load_klcs(lv, klu_lst)
+            for name in INDICATOR_FIELDS:
+                if name in level["indicators"]:
+                    objs[name, lv_idx] = [getattr(klu, name) for klu in klu_lst]
+            objs["macd_info", lv_idx] = {model_idx: objs["macd", lv_idx][:] for model_idx in level["macd_info"]}
+            # 先创建空对象，state 中对它们的引用都指向这些对象，再按保存时的顺序填充属性
+            for kind, (cls, _, _) in LINE_KINDS.items():
+                objs[kind, lv_idx] = [cls.__new__(cls) for _ in range(level[kind + "_cnt"])]
+                shells.extend(objs[kind, lv_idx])
+            for kind in BSP_KINDS:
+                objs[kind, lv_idx] = [CBS_Point.__new__(CBS_Point) for _ in range(level[kind + "_cnt"])]
+                shells.extend(objs[kind, lv_idx])
+
+        state = CStateUnpickler(io.BytesIO(self.section("state")), objs).load()
+        for shell, obj_state in zip(shells, state["objects"]):
+            shell.__dict__.update(obj_state)
+
+        chan: CChan = CChan.__new__(CChan)
+        chan.__dict__.update(state["chan"])
+        chan.kl_datas = {}
+        for lv_idx, lv in enumerate(self.lv_list):
+            kl_state = state["kl_datas"][lv_idx]
+            kl_list = chan.kl_datas[lv] = CKLine_List.__new__(CKLine_List)
+            kl_list.__dict__.update(kl_state["state"])
+            kl_list.lst = objs["klc", lv_idx]
+            klu_lst = objs["klu", lv_idx]
+            for pos, value in kl_state["timestamp"].items():
+                klu_lst[pos].timestamp = value
+            for pos, value in kl_state["demark"].items():
+                klu_lst[pos].demark = value
+            for pos, value in kl_state["trend"].items():
+                klu_lst[pos].trend = value
+        return chan
+
+    def load_units(self, lv: KL_TYPE, level: dict) -> List[CKLine_Unit]:
+        n = level["klu_cnt"]
+        col = lambda name: self.column(lv, "klu." + name)  # noqa: E731
+        trade_cols = [
+            [None if value != value else value for value in col(metric)] if metric in level["trade_info"] else [None] * n
+            for metric in TRADE_INFO_LST
+        ]
+        trade_info_lst = list(zip(*trade_cols)) if trade_cols else [()] * n
+
+        new_unit, new_time, new_trade_info = CKLine_Unit.__new__, CTime.__new__, CTradeInfo.__new__
+        klu_lst: List[CKLine_Unit] = []
+        pre = None
+        if self.has_column(lv, "klu.epoch"):
+            epoch_col = col("epoch")
+        else:  # 早期的检查点没有 epoch 列，由日期和时分秒换算
+            epoch_col = [
+                CTime(date // 10000, date // 100 % 100, date % 100, hms // 10000, hms // 100 % 100, hms % 100).epoch
+                for date, hms in zip(col("date"), col("hms"))
+            ]
+        for epoch, auto, _open, high, low, close, idx, limit_flag, trade_values in zip(
+            epoch_col, col("auto"), col("open"), col("high"), col("low"), col("close"),
+            col("idx"), col("limit_flag"), trade_info_lst,
+        ):
+            t = new_time(CTime)
+            t.set_epoch(epoch, bool(auto))
+            trade_info = new_trade_info(CTradeInfo)
+            trade_info.values = trade_values
+
+            klu = new_unit(CKLine_Unit)
+            klu.kl_type, klu.timestamp, klu.time = lv, None, t
+            klu.open, klu.high, klu.low, klu.close = _open, high, low, close
+            klu.trade_info, klu.demark, klu.trend = trade_info, EMPTY_DEMARK, EMPTY_TREND
+            klu.sub_kl_list, klu.sup_kl, klu.limit_flag = EMPTY_SUB_KL, None, limit_flag
+            klu.set_idx(idx)
+            klu.pre, klu.next = pre, None
+            if pre is not None:
+                pre.next = klu
+            pre = klu
+            klu_lst.append(klu)
+
+        indicator_col = lambda name: [col(f"{name}_{field}") for field in INDICATOR_FIELDS[name]]  # noqa: E731
+        if "macd" in level["indicators"]:
+            new_item = CMACD_item.__new__
+            for klu, (fast_ema, slow_ema, dif, dea, macd) in zip(klu_lst, zip(*indicator_col("macd"))):
+                klu.macd = item = new_item(CMACD_item)
+                item.fast_ema, item.slow_ema, item.DIF, item.DEA, item.macd = fast_ema, slow_ema, dif, dea, macd
+        if "boll" in level["indicators"]:
+            new_item = BOLL_Metric.__new__
+            for klu, (theta, up, down, mid) in zip(klu_lst, zip(*indicator_col("boll"))):
+                klu.boll = item = new_item(BOLL_Metric)
+                item.theta, item.UP, item.DOWN, item.MID = theta, up, down, mid
+        if "kdj" in level["indicators"]:
+            new_item = KDJ_Item.__new__
+            for klu, (k, d, j) in zip(klu_lst, zip(*indicator_col("kdj"))):
+                klu.kdj = item = new_item(KDJ_Item)
+                item.k, item.d, item.j = k, d, j
+        if "rsi" in level["indicators"]:
+            for klu, value in zip(klu_lst, col("rsi")):
+                klu.rsi = value
+        return klu_lst
+
+    def load_klcs(self, lv: KL_TYPE, klu_lst: List[CKLine_Unit]) -> List[CKLine]:
+        col = lambda name: self.column(lv, "klc." + name)  # noqa: E731
+        kline_dir = {item.value: item for item in KLINE_DIR}
+        fx_type = {item.value: item for item in FX_TYPE}
+        begins = list(col("begin")) + [len(klu_lst)]
+        klc_lst: List[CKLine] = []
+        new_klc = CKLine.__new__
+        pre = None
+        for pos, (idx, _dir, fx, high, low, time_begin, time_end, last_time) in enumerate(zip(
+            col("idx"), col("dir"), col("fx"), col("high"), col("low"), col("time_begin"), col("time_end"), col("last_time"),
+        )):
+            units = klu_lst[begins[pos]:begins[pos+1]]
+            klc = new_klc(CKLine)
+            klc.__dict__ = {
+                "_CKLine_Combiner__time_begin": klu_lst[time_begin].time,
+                "_CKLine_Combiner__time_end": klu_lst[time_end].time,
+                "_CKLine_Combiner__high": high,
+                "_CKLine_Combiner__low": low,
+                "_CKLine_Combiner__lst": units,
+                "_CKLine_Combiner__dir": kline_dir[_dir],
+                "_CKLine_Combiner__fx": fx_type[fx],
+                "_CKLine_Combiner__pre": pre,
+                "_CKLine_Combiner__next": None,
+                "idx": idx,
+                "kl_type": lv,
+                "_memoize_cache": {},
+            }
+            if last_time >= 0:
+                klc._time_end = klu_lst[last_time].time
+            if pre is not None:
+                pre.__dict__["_CKLine_Combiner__next"] = klc
+            for klu in units:
+                klu.set_klc(klc)
+            pre = klc
+            klc_lst.append(klc)
+        return klc_lst
+
+
+def load_chan_checkpoint(path) -> CChan:
+    """
+    从检查点文件加载 CChan。
+
+    Args:
+        path: save_chan_checkpoint 写入的文件路径，或写入 io.BytesIO 得到的 bytes。
+
+    Returns:
+        CChan: 可以继续 trigger_load 的 CChan 对象。
+    """
+    with CChanCheckpoint(path) as checkpoint:
+        return checkpoint.load_chan()
@@ -24,6 +24,19 @@ def has_overlap(l1, h1, l2, h2, equal=False):
     return h2 >= l1 and h1 >= l2 if equal else h2 > l1 and h1 > l2
 
 
+def set_slots_state(obj, state):
+    """
+    恢复使用 __slots__ 的对象，用于各类的 __setstate__。
+
+    新版本 pickle 的状态为 (None, 槽位字典)，旧版本（类还没有 __slots__ 时）为实例的 __dict__，
+    两者的键都是属性名（私有属性为改名后的 _类名__属性），逐个赋值即可。
+    """
+    if isinstance(state, tuple):
+        state = state[1]
+    for name, value in (state or {}).items():
+        setattr(obj, name, value)
+
+
 def str2float(s):
     try:
         return float(s)
@@ -0,0 +1,26 @@
+import copy
+
+# 生成快照时写入 deepcopy 的 memo，值为各级别的分界位置（见 CChan.snapshot）
+# 需要复制的尾部对象会预先登记在 memo 中，其余走到 __deepcopy__ 的K线、笔、线段、中枢、买卖点都属于共享部分
+SNAPSHOT_KEY = "chan_snapshot"
+
+
+def share_or_deepcopy(obj, memo):
+    # 快照时原样返回共享对象，否则与默认的 deepcopy 行为一致
+    if SNAPSHOT_KEY in memo:
+        return obj
+    new_obj = obj.__class__.__new__(obj.__class__)
+    memo[id(obj)] = new_obj
+    new_obj.__dict__.update(copy.deepcopy(obj.__dict__, memo))
+    return new_obj
+
+
+def register_shell(obj, memo):
+    # 先为尾部对象登记空对象，之后再填充属性，避免沿 pre/next 链深度递归
+    shell = obj.__class__.__new__(obj.__class__)
+    memo[id(obj)] = shell
+    return shell
+
+
+def fill_shell(obj, memo):
+    memo[id(obj)].__dict__.update(copy.deepcopy(obj.__dict__, memo))
@@ -1,6 +1,10 @@
 import json
+import os
 import pickle
 
+# 检查点文件的后缀，与 Common.checkpoint.CHECKPOINT_SUFFIX 相同
+CHECKPOINT_SUFFIX = ".chk"
+
 
 def load_config(file_path):
     """加载配置文件"""
@@ -10,7 +14,12 @@ def load_config(file_path):
 
 
 def save_chan_instance(chan, file_path):
-    """保存 CChan 实例到指定路径"""
+    """保存 CChan 实例到指定路径，路径以 CHECKPOINT_SUFFIX 结尾时保存为检查点文件，否则使用 pickle"""
+    if str(file_path).endswith(CHECKPOINT_SUFFIX):
+        from ..Common.checkpoint import save_chan_checkpoint
+
+        save_chan_checkpoint(chan, file_path)
+        return
     with open(file_path, "wb") as f:
         pickle.dump(chan, f)
         # pickle.dump(list(chan), f)
@@ -18,10 +27,10 @@ def save_chan_instance(chan, file_path):
 
 def load_chan_instance(file_path):
     """
-    从指定的pickle文件中加载CChan实例。
+    从指定的pickle文件中加载CChan实例，路径以 CHECKPOINT_SUFFIX 结尾时按检查点文件加载。
 
     Args:
-        file_path (str): pickle文件的路径。
+        file_path (str): pickle文件或检查点文件的路径。
 
     Returns:
         CChan: 加载的CChan实例。
@@ -33,6 +42,10 @@ def load_chan_instance(file_path):
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"指定的pickle文件不存在: {file_path}")
+    if str(file_path).endswith(CHECKPOINT_SUFFIX):
+        from ..Common.checkpoint import load_chan_checkpoint
+
+        return load_chan_checkpoint(file_path)
 
     try:
         with open(file_path, "rb") as f:
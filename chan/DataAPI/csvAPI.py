@@ -1,97 +1,14 @@
 import os
-import csv
 from datetime import datetime, timedelta
 
-from Common.CEnum import AUTYPE, DATA_FIELD, KL_TYPE  # 数据字段和K线类型枚举
-from Common.ChanException import CChanException, ErrCode  # 自定义异常类和错误码
-from Common.CTime import CTime  # 时间处理类
-from Common.func_util import kltype_lt_day, str2float  # 字符串转浮点数的工具函数
-from KLine.KLine_Unit import CKLine_Unit  # 自定义的K线数据单元类
+from ..Common.CEnum import AUTYPE, DATA_FIELD, KL_TYPE  # 数据字段和K线类型枚举
+from ..Common.ChanException import CChanException, ErrCode  # 自定义异常类和错误码
+from ..Common.CTime import CTime  # 时间处理类
+from ..Common.func_util import kltype_lt_day  # K线级别判断的工具函数
+from ..KLine.KLine_Unit import CKLine_Unit  # 自定义的K线数据单元类
 
 from .CommonStockAPI import CCommonStockApi  # 从当前目录导入基类 CCommonStockApi
-
-
-# 工具函数：将CSV中的一行数据解析为字典格式
-def create_item_dict(data, column_name):
-    """
-    将一行CSV数据转换为字典，键为列名，值为对应的数据。
-    - 如果列名是时间列，则进行时间解析。
-    - 否则，将字符串数据转为浮点数。
-
-    :param data: list，每行数据值的列表
-    :param column_name: list，对应列名的列表
-    :return: dict，将数据转换为以列名为键的数据字典
-    """
-    time_index = None
-    time_key = None
-
-    # 检查是否存在时间列
-    for i, col_name in enumerate(column_name):
-        if col_name == DATA_FIELD.FIELD_TIME:
-            time_key = DATA_FIELD.FIELD_TIME
-            time_index = i
-        elif col_name == DATA_FIELD.FIELD_DATETIME:
-            time_key = DATA_FIELD.FIELD_TIME
-            time_index = i
-            # 更新列名以反映时间字段的变化
-            column_name[i] = DATA_FIELD.FIELD_TIME
-
-    if time_index is not None:
-        data[time_index] = parse_time_column(data[time_index])
-
-    # 将其他非时间字段转换为浮点数
-    for i, value in enumerate(data):
-        if i != time_index:
-            data[i] = str2float(value)
-
-    # 使用 zip 将列名和数据值组合成字典
-    return dict(zip(column_name, data))
-
-
-# 工具函数：解析时间字符串为 CTime 对象
-def parse_time_column(inp):
-    """
-    将时间字符串解析为 CTime 对象。根据时间格式的不同，做出不同的解析。
-    支持以下格式：
-    - 10位格式：YYYY-MM-DD
-    - 17位格式：YYYYMMDDHHMM00000
-    - 19位格式：YYYY-MM-DD HH:MM:SS
-    - 新增格式：YYYY/MM/DD HH:MM
-
-    :param inp: str，时间字符串
-    :return: CTime 对象，表示解析后的时间
-    """
-    # 根据时间字符串的长度和格式，解析不同格式的时间
-    if len(inp) == 10:  # 格式 YYYY-MM-DD
-        year = int(inp[:4])
-        month = int(inp[5:7])
-        day = int(inp[8:10])
-        hour = minute = 0  # 没有时间信息，默认为 0
-    elif len(inp) == 17:  # 格式 YYYYMMDDHHMM00000
-        year = int(inp[:4])
-        month = int(inp[4:6])
-        day = int(inp[6:8])
-        hour = int(inp[8:10])
-        minute = int(inp[10:12])
-        second = int(inp[12:14])
-    elif len(inp) == 19 and " " in inp:  # 格式 YYYY-MM-DD HH:MM:SS
-        year = int(inp[:4])
-        month = int(inp[5:7])
-        day = int(inp[8:10])
-        hour = int(inp[11:13])
-        minute = int(inp[14:16])
-        second = int(inp[17:19])
-    elif len(inp) == 16 and "/" in inp:  # 新增格式 YYYY/MM/DD HH:MM
-        year = int(inp[:4])
-        month = int(inp[5:7])
-        day = int(inp[8:10])
-        hour = int(inp[11:13])
-        minute = int(inp[14:16])
-    else:
-        # 如果时间格式不符合预期，抛出异常
-        raise Exception(f"unknown time column from csv:{inp}")
-    # 返回解析后的 CTime 对象
-    return CTime(year, month, day, hour, minute, second)
+from .csvCache import load_csv_columns  # CSV 列数据的二进制缓存
 
 
 # CSV数据处理API类，继承自 CCommonStockApi
@@ -104,6 +21,7 @@ class CSV_API(CCommonStockApi):
         end_time=None,
         autype=None,
         file_path=None,
+        use_cache=True,
     ):
         """
         CSV_API 的初始化方法，用于设定CSV文件处理的基本配置。
@@ -114,6 +32,7 @@ class CSV_API(CCommonStockApi):
         :param end_time: str，结束日期，格式为 "YYYY-MM-DD" 或其他支持的格式
         :param autype: str，复权类型（默认不使用）
         :param file_path: str，CSV 文件的完整路径。如果未提供，将根据 `code` 和当前文件位置构造路径
+        :param use_cache: bool，是否在 CSV 文件旁读写二进制列缓存（<文件名>.colcache），源文件大小或修改时间变化时自动重建
         """
 
         # 定义CSV文件中的列名
@@ -139,6 +58,7 @@ class CSV_API(CCommonStockApi):
         # 调用父类的初始化方法，传入相关参数
         super(CSV_API, self).__init__(code, k_type, begin_time, end_time, autype)
         self.headers_exist = True  # 第一行是否是标题，如果是数据，设置为False
+        self.use_cache = use_cache
 
         # 尝试将 begin_time 字符串转换为 datetime 对象，如果 begin_time 为空，则设置为 None
         try:
@@ -198,7 +118,6 @@ class CSV_API(CCommonStockApi):
         # 生成文件名
         filename = f"{self.code.replace('/', '_')}_{self.k_type.name}.csv"
         full_path = os.path.join(self.file_path, filename)
-        oneDayTimestamp = int(86400000)
 
         # 如果CSV文件不存在，抛出异常
         if not os.path.exists(full_path):
@@ -206,73 +125,35 @@ class CSV_API(CCommonStockApi):
                 f"file not exist: {full_path}", ErrCode.SRC_DATA_NOT_FOUND
             )
 
-        # 计算时间戳（毫秒）
-        # begin_timestamp_ms = (
-        #     int(self.begin_datetime.timestamp() * 1000) if self.begin_time else None
-        # )
-        # end_timestamp_ms = (
-        #     int(self.end_datetime.timestamp() * 1000) + oneDayTimestamp
-        #     if self.end_time
-        #     else None
-        # )
-
-        kl_units = []
-
-        # 逐行读取CSV文件内容
-        with open(full_path, "r", encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for line_number, row in enumerate(reader):
-                # 如果第一行为表头，并且当前行为第一行，则跳过
-                if self.headers_exist and line_number == 0:
-                    continue
-
-                # 如果数据长度与预期的列数不一致，抛出异常
-                if len(row) != len(self.columns):
-                    raise CChanException(
-                        f"file format error: {full_path}",
-                        ErrCode.SRC_DATA_FORMAT_ERROR,
-                    )
-
-                # 提取时间戳字段并转换为整数
-                try:
-                    current_datetime_str = row[self.datetime_idx]
-                    current_datetime = datetime.strptime(
-                        current_datetime_str, "%Y-%m-%d %H:%M:%S"
-                    )
-                except:
-                    print(
-                        f"时间解析错误: {row[self.datetime_idx]}，跳过第 {line_number} 行"
-                    )
-                    continue
-
-                # 如果指定了开始时间，并且当前数据时间戳小于开始时间戳，则跳过该条数据
-                if (
-                    self.begin_time is not None
-                    and current_datetime < self.begin_datetime
-                ):
-                    # print(f"当前时间{current_datetime}小于开始时间，跳过第 {line_number} 行")
-                    continue
-
-                # 如果指定了结束时间，并且当前数据时间戳大于结束时间戳，则跳过该条数据
-                if self.end_time is not None and current_datetime > self.end_datetime:
-                    # print(f"当前时间{current_datetime}大于结束时间，跳过第 {line_number} 行")
-                    continue
+        # 按列读入整个文件（优先使用二进制列缓存），时间范围在已排序的时间列上二分查找
+        try:
+            data = load_csv_columns(
+                full_path, self.columns, self.datetime_idx, self.headers_exist, self.use_cache
+            )
+        except ValueError as ve:
+            # 如果数据长度与预期的列数不一致，抛出异常
+            raise CChanException(
+                f"file format error: {full_path}", ErrCode.SRC_DATA_FORMAT_ERROR
+            ) from ve
 
-                # 将每行数据转换为 CKLine_Unit 对象，并添加到列表中
+        with data:
+            begin, end = data.row_range(
+                self.begin_datetime if self.begin_time is not None else None,
+                self.end_datetime if self.end_time is not None else None,
+            )
+            value_cols = list(data.values.items())
+            times = data.times
+            for idx in range(begin, end):
+                kl_dict = {name: col[idx] for name, col in value_cols}
+                # 缓存中的时间与 CTime.epoch 的约定相同，都是把文件中的时间当作 UTC 换算的秒数
+                kl_dict[DATA_FIELD.FIELD_TIME] = CTime.from_epoch(times[idx])
+                # 将每行数据转换为 CKLine_Unit 对象
                 try:
-                    kl_unit = CKLine_Unit(create_item_dict(row, self.columns))
-                    kl_units.append(kl_unit)
-                    # print(f"当前时间{current_time}符合，成功创建第 {line_number} 行")
+                    kl_unit = CKLine_Unit(kl_dict)
                 except CChanException as ce:
-                    print(f"CKLine_Unit 创建错误: {ce}，跳过第 {line_number} 行")
+                    print(f"CKLine_Unit 创建错误: {ce}，跳过时间为 {kl_dict[DATA_FIELD.FIELD_TIME]} 的数据")
                     continue
-
-        # 按时间升序排序
-        kl_units.sort(key=lambda klu: klu.time.ts)  # 假设 klu.time.ts 是时间戳
-
-        # 生成排序后的K线数据
-        for klu in kl_units:
-            yield klu
+                yield kl_unit
 
     # 空方法，用于设置基础信息，留待子类重写或扩展
     def SetBasciInfo(self):
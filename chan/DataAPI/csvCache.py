@@ -0,0 +1,234 @@
+"""
+CSV 行情文件的二进制列缓存（version 1，小端），保存在 CSV 文件旁的 <文件名>.colcache：
+
+    header   <4sHHQ>：magic、版本号、保留字段、meta 长度
+    meta     JSON：源文件的大小和 mtime_ns、解析参数、各列的 [typecode, 偏移, 元素个数]（偏移相对数据区开头）
+    数据区   按 8 字节对齐的列：时间列为 int64 秒数（把文件中的时间当作 UTC 换算，与本机时区无关），其余列为 float64
+
+缓存中的行已按时间稳定排序。读取时按源文件的大小、mtime_ns 和解析参数校验，不一致就重新解析 CSV 并重写缓存；
+缓存以只读内存映射打开，时间范围在时间列上二分查找，只有范围内的行会被读取。
+"""
+import array
+import bisect
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from ..Common.func_util import str2float
+
+CACHE_MAGIC: bytes = b"CHCV"
+CACHE_VERSION: int = 1
+CACHE_HEADER: struct.Struct = struct.Struct("<4sHHQ")
+CACHE_SUFFIX: str = ".colcache"
+TIME_COLUMN: str = "__time__"
+TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
+
+def align8(size: int) -> int:
+    return size + (-size % 8)
+
+
+def datetime_to_epoch(dt: datetime) -> int:
+    """不带时区的 datetime 按 UTC 换算为秒数，只用于排序和比较。"""
+    return (dt - EPOCH) // ONE_SECOND
+
+
+def parse_datetime(inp: str) -> datetime:
+    # "YYYY-MM-DD HH:MM:SS" 走 fromisoformat，比 strptime 快一个数量级；其余写法仍交给 strptime 判断
+    if len(inp) == 19 and inp[10] == " ":
+        try:
+            return datetime.fromisoformat(inp)
+        except ValueError:
+            pass
+    return datetime.strptime(inp, TIME_FORMAT)
+
+
+def to_float_array(values) -> array.array:
+    try:
+        return array.array("d", map(float, values))
+    except ValueError:
+        return array.array("d", map(str2float, values))
+
+
+class CCsvColumns:
+    """
+    一个 CSV 文件按列读出的内容：times 为按时间排序的秒数，values 为各价格、成交量列。
+
+    从缓存打开时各列是指向内存映射的 memoryview，close 之后不能再使用。
+    """
+
+    def __init__(self, times, values: Dict[str, object]):
+        self.times = times
+        self.values = values
+        self.buf: Optional[mmap.mmap] = None
+        self.file = None
+        self.views: List[memoryview] = []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def row_range(self, begin: Optional[datetime], end: Optional[datetime]):
+        """返回时间在闭区间 [begin, end] 内的行号范围 [lo, hi)，begin、end 为 None 表示不限。"""
+        lo = 0 if begin is None else bisect.bisect_left(self.times, datetime_to_epoch(begin))
+        hi = len(self.times) if end is None else bisect.bisect_right(self.times, datetime_to_epoch(end))
+        return lo, max(lo, hi)
+
+    def close(self):
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        if self.buf is not None:
+            self.buf.close()
+            self.buf = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def parse_csv_columns(full_path: str, columns: List[str], datetime_idx: int, headers_exist: bool) -> CCsvColumns:
+    """
+    一次读入整个 CSV 文件并按列转换。
+
+    列数不对时抛出 ValueError（由调用方转换成对应的异常），时间无法解析的行打印提示后跳过，数值无法解析时记为 0。
+    """
+    with open(full_path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    first_line = 1 if headers_exist else 0
+    col_cnt = len(columns)
+    times = array.array("q")
+    kept_rows = []
+    for line_number in range(first_line, len(rows)):
+        row = rows[line_number]
+        if len(row) != col_cnt:
+            raise ValueError(f"line {line_number} has {len(row)} columns")
+        try:
+            dt = parse_datetime(row[datetime_idx])
+        except Exception:
+            print(f"时间解析错误: {row[datetime_idx]}，跳过第 {line_number} 行")
+            continue
+        times.append(datetime_to_epoch(dt))
+        kept_rows.append(row)
+
+    col_values = list(zip(*kept_rows)) if kept_rows else [()] * col_cnt
+    values = {name: to_float_array(col_values[idx]) for idx, name in enumerate(columns) if idx != datetime_idx}
+
+    if any(times[i] > times[i+1] for i in range(len(times) - 1)):
+        order = sorted(range(len(times)), key=times.__getitem__)  # 稳定排序，同一时间保持文件中的顺序
+        times = array.array("q", [times[i] for i in order])
+        values = {name: array.array("d", [col[i] for i in order]) for name, col in values.items()}
+    return CCsvColumns(times, values)
+
+
+def get_cache_meta(full_path: str, columns: List[str], datetime_idx: int, headers_exist: bool) -> dict:
+    stat = os.stat(full_path)
+    return {
+        "src_size": stat.st_size,
+        "src_mtime_ns": stat.st_mtime_ns,
+        "columns": list(columns),
+        "datetime_idx": datetime_idx,
+        "headers_exist": headers_exist,
+    }
+
+
+def write_csv_cache(cache_path: str, meta: dict, data: CCsvColumns):
+    buf = bytearray()
+    sections = {}
+    for name, typecode, arr in [(TIME_COLUMN, "q", data.times)] + [(name, "d", col) for name, col in data.values.items()]:
+        arr = array.array(typecode, arr)
+        if sys.byteorder != "little":
+            arr.byteswap()
+        buf += b"\0" * (align8(len(buf)) - len(buf))
+        sections[name] = [typecode, len(buf), len(arr)]
+        buf += arr.tobytes()
+    meta = dict(meta, sections=sections)
+    meta_buf = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, 0, len(meta_buf))
+    # 先写临时文件再替换，其他进程不会读到写了一半的缓存
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(meta_buf)
+            f.write(b"\0" * (align8(len(header) + len(meta_buf)) - len(header) - len(meta_buf)))
+            f.write(buf)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def open_csv_cache(cache_path: str, meta: dict) -> Optional[CCsvColumns]:
+    """以内存映射打开缓存，缓存不存在、版本不同或与源文件不一致时返回 None。"""
+    try:
+        f = open(cache_path, "rb")
+    except OSError:
+        return None
+    res = CCsvColumns(None, {})
+    res.file = f
+    try:
+        if os.fstat(f.fileno()).st_size < CACHE_HEADER.size:
+            res.close()
+            return None
+        res.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, meta_len = CACHE_HEADER.unpack_from(res.buf, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            res.close()
+            return None
+        cache_meta = json.loads(bytes(res.buf[CACHE_HEADER.size:CACHE_HEADER.size + meta_len]).decode("utf-8"))
+        sections = cache_meta.pop("sections")
+        if cache_meta != meta:
+            res.close()
+            return None
+        data_offset = align8(CACHE_HEADER.size + meta_len)
+        base = memoryview(res.buf)
+        res.views.append(base)
+        for name, (typecode, offset, count) in sections.items():
+            size = array.array(typecode).itemsize
+            begin = data_offset + offset
+            view = base[begin:begin + size * count]
+            res.views.append(view)
+            if sys.byteorder == "little":
+                col = view.cast(typecode)
+                res.views.append(col)
+            else:
+                col = array.array(typecode, view.tobytes())
+                col.byteswap()
+            if name == TIME_COLUMN:
+                res.times = col
+            else:
+                res.values[name] = col
+        return res
+    except Exception:
+        res.close()
+        return None
+
+
+def load_csv_columns(full_path: str, columns: List[str], datetime_idx: int, headers_exist: bool = True, use_cache: bool = True) -> CCsvColumns:
+    """读取 CSV 文件的列数据，优先使用有效的二进制缓存，没有时解析 CSV 并尝试写入缓存（写入失败不影响结果）。"""
+    if not use_cache:
+        return parse_csv_columns(full_path, columns, datetime_idx, headers_exist)
+    cache_path = full_path + CACHE_SUFFIX
+    meta = get_cache_meta(full_path, columns, datetime_idx, headers_exist)
+    cached = open_csv_cache(cache_path, meta)
+    if cached is not None:
+        return cached
+    data = parse_csv_columns(full_path, columns, datetime_idx, headers_exist)
+    try:
+        write_csv_cache(cache_path, meta, data)
+    except OSError:
+        pass
+    return data
@@ -0,0 +1,130 @@
+"""
+比较 BOLL / KDJ / RSI / 均线等滑动窗口指标的旧实现（每根K线重新切片求和、求极值）
+与基于 Math.RollingWindow 的新实现，在不同窗口长度下的单根耗时和结果差异。
+
+运行方式（在仓库根目录下）：
+    python -m chan.Debug.metric_benchmark [K线数量]
+"""
+import math
+import random
+import sys
+import time
+
+from ..Common.CEnum import TREND_TYPE
+from ..Math.BOLL import BollModel
+from ..Math.KDJ import KDJ
+from ..Math.RSI import RSI
+from ..Math.TrendModel import CTrendModel
+
+
+class OldBoll:
+    def __init__(self, N):
+        self.N = N
+        self.arr = []
+
+    def add(self, value):
+        self.arr.append(value)
+        if len(self.arr) > self.N:
+            self.arr = self.arr[-self.N:]
+        ma = sum(self.arr)/len(self.arr)
+        theta = math.sqrt(sum((x-ma)**2 for x in self.arr) / len(self.arr))
+        return theta if theta != 0 else 1e-7
+
+
+class OldKDJ:
+    def __init__(self, period):
+        self.arr = []
+        self.period = period
+        self.pre_k, self.pre_d = 50, 50
+
+    def add(self, high, low, close):
+        self.arr.append({'high': high, 'low': low})
+        if len(self.arr) > self.period:
+            self.arr.pop(0)
+        hn = max([x['high'] for x in self.arr])
+        ln = min([x['low'] for x in self.arr])
+        rsv = 100 * (close - ln) / (hn - ln) if hn != ln else 0.0
+        self.pre_k = 2 / 3 * self.pre_k + 1 / 3 * rsv
+        self.pre_d = 2 / 3 * self.pre_d + 1 / 3 * self.pre_k
+        return self.pre_k
+
+
+class OldRSI:
+    def __init__(self, period):
+        self.close_arr = []
+        self.period = period
+        self.diff = []
+        self.up = []
+        self.down = []
+
+    def add(self, close):
+        self.close_arr.append(close)
+        if len(self.close_arr) == 1:
+            return 50.0
+        self.diff.append(self.close_arr[-1] - self.close_arr[-2])
+        if len(self.diff) < self.period:
+            self.up.append(sum(x for x in self.diff if x > 0)/self.period)
+            self.down.append(sum(-x for x in self.diff if x < 0)/self.period)
+        else:
+            upval = max(self.diff[-1], 0.0)
+            downval = max(-self.diff[-1], 0.0)
+            self.up.append((self.up[-1] * (self.period - 1) + upval) / self.period)
+            self.down.append((self.down[-1] * (self.period - 1) + downval) / self.period)
+        rs = self.up[-1] / self.down[-1] if self.down[-1] != 0 else 0
+        return 100.0 - 100.0 / (1.0 + rs)
+
+
+class OldTrend:
+    def __init__(self, func, T):
+        self.func = func
+        self.T = T
+        self.arr = []
+
+    def add(self, value):
+        self.arr.append(value)
+        if len(self.arr) > self.T:
+            self.arr = self.arr[-self.T:]
+        return self.func(self.arr)
+
+
+def gen_klu(n, seed=0):
+    random.seed(seed)
+    price = 100.0
+    res = []
+    for _ in range(n):
+        close = price + random.gauss(0, 1)
+        res.append((max(price, close) + abs(random.gauss(0, 0.5)), min(price, close) - abs(random.gauss(0, 0.5)), close))
+        price = close
+    return res
+
+
+def timing(func, data):
+    t = time.perf_counter()
+    res = [func(*item) for item in data]
+    return (time.perf_counter() - t) / len(data) * 1e6, res
+
+
+def max_diff(old_res, new_res):
+    return max(abs(a - b) for a, b in zip(old_res, new_res))
+
+
+def main(n):
+    data = gen_klu(n)
+    closes = [(close,) for _, _, close in data]
+    print(f"{'指标':<8}{'窗口':>6}{'旧实现(us/根)':>16}{'新实现(us/根)':>16}{'最大差异':>12}")
+    for N in (5, 20, 60, 250, 1000):
+        cases = [
+            ("BOLL", OldBoll(N).add, closes, lambda m=BollModel(N): (lambda c: m.add(c).theta)),
+            ("KDJ", OldKDJ(N).add, data, lambda m=KDJ(N): (lambda h, l, c: m.add(h, l, c).k)),
+            ("RSI", OldRSI(N).add, closes, lambda m=RSI(N): m.add),
+            ("MEAN", OldTrend(lambda arr: sum(arr)/len(arr), N).add, closes, lambda m=CTrendModel(TREND_TYPE.MEAN, N): m.add),
+            ("MAX", OldTrend(max, N).add, closes, lambda m=CTrendModel(TREND_TYPE.MAX, N): m.add),
+        ]
+        for name, old_func, inp, new_factory in cases:
+            old_cost, old_res = timing(old_func, inp)
+            new_cost, new_res = timing(new_factory(), inp)
+            print(f"{name:<8}{N:>6}{old_cost:>16.2f}{new_cost:>16.2f}{max_diff(old_res, new_res):>12.2e}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
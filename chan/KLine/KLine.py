@@ -2,6 +2,7 @@ from ..Combiner.KLine_Combiner import CKLine_Combiner
 from ..Common.CEnum import FX_CHECK_METHOD, FX_TYPE, KLINE_DIR
 from ..Common.ChanException import CChanException, ErrCode
 from ..Common.func_util import has_overlap
+from ..Common.snapshot import share_or_deepcopy
 from ..KLine.KLine_Unit import CKLine_Unit
 
 
@@ -13,6 +14,9 @@ class CKLine(CKLine_Combiner[CKLine_Unit]):
         self.kl_type = kl_unit.kl_type
         kl_unit.set_klc(self)
 
+    def __deepcopy__(self, memo):
+        return share_or_deepcopy(self, memo)
+
     def __str__(self):
         fx_token = ""
         if self.fx == FX_TYPE.TOP:
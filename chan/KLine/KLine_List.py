@@ -7,13 +7,16 @@ from ..BuySellPoint.BSPointList import CBSPointList
 from ..ChanConfig import CChanConfig
 from ..Common.CEnum import KLINE_DIR, SEG_TYPE
 from ..Common.ChanException import CChanException, ErrCode
+from ..Common.snapshot import SNAPSHOT_KEY, fill_shell, register_shell
+from ..Math.Demark import CDemarkEngine
 from ..Seg.Seg import CSeg
 from ..Seg.SegConfig import CSegConfig
+from ..Seg.SegListChan import CSegListChan
 from ..Seg.SegListComm import CSegListComm
 from ..ZS.ZSList import CZSList
 
 from .KLine import CKLine
-from .KLine_Unit import CKLine_Unit
+from .KLine_Unit import CKLine_Unit, set_metric_batch
 
 
 def get_seglist_instance(seg_config: CSegConfig, lv) -> CSegListComm:
@@ -85,6 +88,13 @@ class CKLine_List:
         self.metric_model_lst = conf.GetMetricModel()  # 指标模型列表
 
         self.step_calculation = self.need_cal_step_by_step()  # 是否需要逐步计算
+        self.metric_pending_klu: List[CKLine_Unit] = []  # 非逐步计算时尚未计算指标的K线单元
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # 兼容批量计算指标之前保存的对象，其K线单元的指标都已算好
+        if "metric_pending_klu" not in state:
+            self.metric_pending_klu = []
 
     def __deepcopy__(self, memo):
         """实现深拷贝方法，用于复制K线列表实例及其相关数据。
@@ -95,38 +105,96 @@ class CKLine_List:
         Returns:
             new_obj: 新的K线列表实例。
         """
+        # 全部K线、笔、线段、中枢和买卖点都按尾部复制，先登记再填充，不会沿 pre/next 链深度递归
+        return self.copy_tail(memo, [0, 0, 0, 0])
+
+    def get_snapshot_pos(self) -> List[int]:
+        """计算快照的分界位置，分界之前的元素之后不会再被修改，可以在快照之间共享。
+
+        新K线只会改动最后几根合并K线和最后几笔；最后一个确定线段之后的线段会重新生成，
+        线段内中枢未确定的线段会重新划分中枢，需要计算的线段上的中枢和买卖点会重新生成。
+        分界取这些范围的并集，并保证复制部分沿 next 遍历到的合并K线也都在复制范围内。
+
+        Returns:
+            List[int]: 需要复制的第一根合并K线、第一笔、第一个线段、第一个线段的线段的序号。
+        """
+        if not isinstance(self.seg_list, CSegListChan):
+            return [0, 0, 0, 0]  # 其他线段算法每次都会重算全部线段，不共享
+        segseg_begin = get_seg_snapshot_begin(self.segseg_list, self.segzs_list, self.seg_bs_point_lst)
+        seg_begin = get_seg_snapshot_begin(self.seg_list, self.zs_list, self.bs_point_lst)
+        seg_begin = min(seg_begin, get_line_snapshot_begin(self.seg_list, self.segseg_list, self.segzs_list, self.seg_bs_point_lst))
+        bi_begin = get_line_snapshot_begin(self.bi_list, self.seg_list, self.zs_list, self.bs_point_lst)
+
+        # 最后一根共享笔的结束K线不能是之后还会合并、更新分型的K线
+        while bi_begin > 0 and self.bi_list[bi_begin].begin_klc.idx > len(self.lst) - 4:
+            bi_begin -= 1
+        if bi_begin < len(self.bi_list):
+            klc_begin = max(min(self.bi_list[bi_begin].begin_klc.idx, len(self.lst) - 3), 0)
+        else:
+            klc_begin = 0  # 第一笔出现之前
+
+        # Demark 中未结束的序列还会更新，引用这些序列的K线单元需要复制
+        for metric_model in self.metric_model_lst:
+            if isinstance(metric_model, CDemarkEngine):
+                for series in metric_model.series:
+                    while klc_begin > 0 and self.lst[klc_begin].lst[0].idx > series.kl_list[0].idx:
+                        klc_begin -= 1
+        return [klc_begin, bi_begin, seg_begin, segseg_begin]
+
+    def copy_tail(self, memo, pos: List[int]):
+        """复制分界之后的尾部，分界之前的K线、笔、线段、中枢和买卖点与原对象共享。
+
+        用于 CChan.snapshot，各级别之间的父子K线单元链接由 CChan 重新建立；
+        分界全为 0 时即为完整的深拷贝。
+
+        Args:
+            memo: deepcopy 的 memo，生成快照时包含 SNAPSHOT_KEY。
+            pos (List[int]): get_snapshot_pos 返回并按父子级别对齐后的分界位置。
+
+        Returns:
+            new_obj: 新的K线列表实例。
+        """
+        klc_begin, bi_begin, seg_begin, segseg_begin = pos
         new_obj = CKLine_List(self.kl_type, self.config)
         memo[id(self)] = new_obj
-        for klc in self.lst:
-            klus_new = []
-            for klu in klc.lst:
-                new_klu = copy.deepcopy(klu, memo)  # 深拷贝K线单元
-                memo[id(klu)] = new_klu
-                if klu.pre is not None:
-                    new_klu.set_pre_klu(memo[id(klu.pre)])  # 设置前一根K线单元
-                klus_new.append(new_klu)
-
-            new_klc = CKLine(klus_new[0], idx=klc.idx, _dir=klc.dir)  # 创建新的K线
-            new_klc.set_fx(klc.fx)  # 设置分型
-            new_klc.kl_type = klc.kl_type  # 设置K线类型
-            for idx, klu in enumerate(klus_new):
-                klu.set_klc(new_klc)  # 设置当前K线单元的K线
-                if idx != 0:
-                    new_klc.add(klu)  # 添加K线单元到新K线中
-            memo[id(klc)] = new_klc  # 存储拷贝的K线对象
-            if new_obj.lst:
-                new_obj.lst[-1].set_next(new_klc)  # 设置下一根K线
-                new_klc.set_pre(new_obj.lst[-1])  # 设置前一根K线
-            new_obj.lst.append(new_klc)  # 将新K线添加到列表中
-        new_obj.bi_list = copy.deepcopy(self.bi_list, memo)  # 深拷贝笔列表
-        new_obj.seg_list = copy.deepcopy(self.seg_list, memo)  # 深拷贝线段列表
-        new_obj.segseg_list = copy.deepcopy(self.segseg_list, memo)  # 深拷贝线段的线段列表
-        new_obj.zs_list = copy.deepcopy(self.zs_list, memo)  # 深拷贝中枢列表
-        new_obj.segzs_list = copy.deepcopy(self.segzs_list, memo)  # 深拷贝线段的中枢列表
-        new_obj.bs_point_lst = copy.deepcopy(self.bs_point_lst, memo)  # 深拷贝买卖点列表
-        new_obj.metric_model_lst = copy.deepcopy(self.metric_model_lst, memo)  # 深拷贝指标模型列表
-        new_obj.step_calculation = copy.deepcopy(self.step_calculation, memo)  # 深拷贝逐步计算标志
-        new_obj.seg_bs_point_lst = copy.deepcopy(self.seg_bs_point_lst, memo)  # 深拷贝线段的买卖点列表
+
+        # 先登记全部尾部对象，再统一填充属性，尾部之间的引用通过 memo 指向复制后的对象
+        zs_begin = get_zs_snapshot_begin(self.zs_list, bi_begin)
+        segzs_begin = get_zs_snapshot_begin(self.segzs_list, seg_begin)
+        tail = self.lst[klc_begin:] + self.bi_list[bi_begin:] + self.seg_list[seg_begin:] + self.segseg_list[segseg_begin:]
+        tail += self.zs_list[zs_begin:] + self.segzs_list[segzs_begin:]
+        tail += get_bsp_snapshot_tail(self.bs_point_lst, bi_begin) + get_bsp_snapshot_tail(self.seg_bs_point_lst, seg_begin)
+        for obj in tail:
+            register_shell(obj, memo)
+        klu_lst = list(self.klu_iter(klc_begin))
+        for klu in klu_lst:
+            klu.copy_unit(memo)
+        for klu in klu_lst:
+            new_klu = memo[id(klu)]
+            new_klu.pre = memo.get(id(klu.pre), klu.pre)  # 第一根指向共享部分
+            new_klu.next = memo.get(id(klu.next), klu.next)
+            new_klu.set_klc(memo[id(klu.klc)])
+        for obj in tail:
+            fill_shell(obj, memo)
+
+        new_obj.lst = self.lst[:klc_begin] + [memo[id(klc)] for klc in self.lst[klc_begin:]]
+        new_obj.bi_list = copy_with_tail(self.bi_list, self.bi_list.bi_list, bi_begin, memo)
+        new_obj.seg_list = copy_with_tail(self.seg_list, self.seg_list.lst, seg_begin, memo)
+        new_obj.segseg_list = copy_with_tail(self.segseg_list, self.segseg_list.lst, segseg_begin, memo)
+        new_obj.zs_list = copy_with_tail(self.zs_list, self.zs_list.zs_lst, zs_begin, memo)
+        new_obj.segzs_list = copy_with_tail(self.segzs_list, self.segzs_list.zs_lst, segzs_begin, memo)
+        new_obj.bs_point_lst = copy_bsp_list(self.bs_point_lst, memo)
+        new_obj.seg_bs_point_lst = copy_bsp_list(self.seg_bs_point_lst, memo)
+
+        # 快照时按K线追加的指标序列元素不会再修改，只复制列表本身；Demark 未结束的序列还会更新，需要深拷贝
+        if SNAPSHOT_KEY in memo:
+            for metric_model in self.metric_model_lst:
+                for value in vars(metric_model).values():
+                    if isinstance(value, list) and not (isinstance(metric_model, CDemarkEngine) and value is metric_model.series):
+                        memo[id(value)] = value[:]
+        new_obj.metric_model_lst = copy.deepcopy(self.metric_model_lst, memo)
+        new_obj.step_calculation = self.step_calculation
+        new_obj.metric_pending_klu = copy.deepcopy(self.metric_pending_klu, memo)
         return new_obj
 
     @overload
@@ -171,6 +239,7 @@ class CKLine_List:
         8. 计算线段线段和笔的买卖点。
         """
         if not self.step_calculation:  # 如果不需要逐步计算
+            self.cal_pending_metric()  # 先批量计算累积的K线单元指标
             self.bi_list.try_add_virtual_bi(self.lst[-1])  # 尝试添加虚拟笔
         # 计算bi_list的线段seg
         cal_seg(self.bi_list, self.seg_list)
@@ -199,6 +268,15 @@ class CKLine_List:
         """
         return self.config.trigger_step
 
+    def cal_pending_metric(self):
+        """批量计算非逐步计算模式下累积的K线单元指标。
+
+        笔和线段的构建只依赖K线高低点，指标直到计算买卖点时才会用到，
+        所以非逐步计算时把整段K线单元的指标放到这里一次算完，结果与逐根计算相同。
+        """
+        set_metric_batch(self.metric_pending_klu, self.metric_model_lst)
+        self.metric_pending_klu = []
+
     def add_single_klu(self, klu: CKLine_Unit):
         """添加单个K线单元并更新K线、线段及中枢信息。
 
@@ -208,7 +286,10 @@ class CKLine_List:
         Args:
             klu (CKLine_Unit): 新加入的K线单元。
         """
-        klu.set_metric(self.metric_model_lst)  # 设置指标模型
+        if self.step_calculation:
+            klu.set_metric(self.metric_model_lst)  # 设置指标模型
+        else:
+            self.metric_pending_klu.append(klu)  # 非逐步计算时指标留到 cal_seg_and_zs 中批量计算
 
         # 如果K线列表为空，直接将klu添加为第一根K线
         if len(self.lst) == 0:
@@ -261,7 +342,7 @@ def cal_seg(bi_list, seg_list: CSegListComm):
     
     begin_seg: CSeg = seg_list[-1]  # 从最后一个线段开始
     # 从后往前查找已确认的线段，如果找到超过2个已确认的线段，则停止查找
-    for seg in seg_list[::-1]:
+    for seg in reversed(seg_list):
         if seg.is_sure:
             sure_seg_cnt += 1
         else:
@@ -272,7 +353,7 @@ def cal_seg(bi_list, seg_list: CSegListComm):
 
     cur_seg: CSeg = seg_list[-1]  # 当前线段
     # 反向遍历bi_list，为每根bi分配对应的seg_idx
-    for bi in bi_list[::-1]:
+    for bi in reversed(bi_list):
         if bi.seg_idx is not None and bi.idx < begin_seg.start_bi.idx:
             break  # 如果bi的索引小于起始线段的开始索引，停止
         if bi.idx > cur_seg.end_bi.idx:
@@ -295,13 +376,13 @@ def update_zs_in_seg(bi_list, seg_list, zs_list):
         zs_list (list): 中枢列表。
     """
     sure_seg_cnt = 0  # 已确认的线段数量
-    for seg in seg_list[::-1]:  # 从后往前遍历线段列表
+    for seg in reversed(seg_list):  # 从后往前遍历线段列表
         if seg.ele_inside_is_sure:
             break  # 如果当前线段的中枢已确认，停止遍历
         if seg.is_sure:
             sure_seg_cnt += 1  # 增加已确认线段计数
         seg.clear_zs_lst()  # 清空线段中的中枢列表
-        for zs in zs_list[::-1]:  # 从后往前遍历中枢列表
+        for zs in reversed(zs_list):  # 从后往前遍历中枢列表
             if zs.end.idx < seg.start_bi.get_begin_klu().idx:
                 break  # 如果中枢的结束索引小于线段的开始索引，停止遍历
             if zs.is_inside(seg):
@@ -315,3 +396,80 @@ def update_zs_in_seg(bi_list, seg_list, zs_list):
         if sure_seg_cnt > 2:
             if not seg.ele_inside_is_sure:
                 seg.ele_inside_is_sure = True  # 如果已确认超过两个线段，标记线段内的中枢为已确认
+
+
+def get_seg_dirty_begin(seg_list: CSegListComm, zs_list: CZSList, bsp_list: CBSPointList) -> int:
+    """返回之后会重新生成的第一个线段的序号。
+
+    包括 do_init 可能删除的最后一个确定线段，以及中枢和买卖点需要重新计算的线段。
+    此前的确定线段不会再变，cal_seg 回看时给其中的笔重设的 seg_idx 也与原来相同。
+
+    Args:
+        seg_list (CSegListComm): 线段列表。
+        zs_list (CZSList): 该线段列表对应的中枢列表。
+        bsp_list (CBSPointList): 该线段列表对应的买卖点列表。
+    """
+    begin = 0
+    for seg in reversed(seg_list):
+        if seg.is_sure:
+            begin = seg.idx
+            break
+    return min(begin, zs_list.first_cal_seg_idx(seg_list), bsp_list.first_cal_seg_idx(seg_list))
+
+
+def get_seg_snapshot_begin(seg_list: CSegListComm, zs_list: CZSList, bsp_list: CBSPointList) -> int:
+    """返回需要复制的第一个线段的序号：重新生成的线段及其前一个线段（会改写 next），
+    以及 update_zs_in_seg 中会重新划分中枢的线段内中枢未确定的线段。
+    """
+    begin = max(get_seg_dirty_begin(seg_list, zs_list, bsp_list) - 1, 0)
+    while begin > 0 and not seg_list[begin-1].ele_inside_is_sure:
+        begin -= 1
+    return begin
+
+
+def get_line_snapshot_begin(line_list, seg_list: CSegListComm, zs_list: CZSList, bsp_list: CBSPointList) -> int:
+    """返回之后的计算可能修改或沿 next 遍历的第一笔（或第一个线段）的序号。
+
+    Args:
+        line_list: 笔列表，或作为线段的线段的组成部分的线段列表。
+        seg_list (CSegListComm): 由 line_list 生成的线段列表。
+        zs_list (CZSList): 由 line_list 生成的中枢列表。
+        bsp_list (CBSPointList): 由 line_list 生成的买卖点列表。
+    """
+    if len(seg_list) == 0:
+        return 0  # 没有线段时每次都会重设所有笔的 seg_idx
+    dirty_seg = seg_list[get_seg_dirty_begin(seg_list, zs_list, bsp_list)]
+    begin = min(len(line_list) - 3, dirty_seg.start_bi.idx)  # update_peak 会修改倒数第二笔
+    if zs_list.config.zs_algo == "over_seg":
+        begin = min(begin, zs_list[-1].end_bi.idx + 1 if len(zs_list) else 0)
+    return max(begin, 0)
+
+
+def get_zs_snapshot_begin(zs_list: CZSList, bi_begin: int) -> int:
+    """返回需要复制的第一个中枢的序号：最后一个中枢可能延伸或被合并，
+    结束于分界前一笔的中枢也会在 update_zs_in_seg 中重设 bi_in/bi_out。
+    """
+    begin = len(zs_list) - 1
+    while begin > 0 and zs_list[begin-1].end_bi.idx >= bi_begin - 1:
+        begin -= 1
+    return max(begin, 0)
+
+
+def get_bsp_snapshot_tail(bsp_list: CBSPointList, bi_begin: int) -> list:
+    """返回落在需要复制的笔上的买卖点，同一个买卖点可能同时在 lst 和 bsp1_lst 中。"""
+    return list({id(bsp): bsp for bsp in bsp_list.lst + bsp_list.bsp1_lst if bsp.bi.idx >= bi_begin}.values())
+
+
+def copy_with_tail(container, lst: list, begin: int, memo):
+    """深拷贝笔、线段或中枢列表，lst 中 begin 之前共享，之后替换为已登记的复制对象。"""
+    memo[id(lst)] = lst[:begin] + [memo[id(item)] for item in lst[begin:]]
+    return copy.deepcopy(container, memo)
+
+
+def copy_bsp_list(bsp_list: CBSPointList, memo):
+    """深拷贝买卖点列表，共享的买卖点保持原对象。"""
+    memo[id(bsp_list.lst)] = [memo.get(id(bsp), bsp) for bsp in bsp_list.lst]
+    memo[id(bsp_list.bsp1_lst)] = [memo.get(id(bsp), bsp) for bsp in bsp_list.bsp1_lst]
+    memo[id(bsp_list.bsp_dict)] = {key: memo.get(id(bsp), bsp) for key, bsp in bsp_list.bsp_dict.items()}
+    memo[id(bsp_list.bi_idx_cnt)] = dict(bsp_list.bi_idx_cnt)
+    return copy.deepcopy(bsp_list, memo)
@@ -0,0 +1,167 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+from ..Common.CEnum import TRADE_INFO_LST
+from ..Math.RangeQuery import CPrefixSum, CRangeExtreme
+from .KLine_Unit import CKLine_Unit
+
+MACD_FEATURE = "macd"
+RSI_FEATURE = "rsi"
+TRADE_FEATURE = "trade"
+
+
+class CKLine_MetricIndex:
+    """
+    同一级别K线单元指标的区间索引，按 klu.idx 查询一段K线单元的 MACD 面积、峰值、
+    同号区间和成交量等，供笔的背驰指标使用，不必每次遍历笔内所有K线单元。
+
+    K线单元的指标计算后不再变化，所以索引只需在末尾追加：查询时从区间末尾的K线单元沿 pre
+    往回找到尚未索引的部分补上。各类指标分别计数，在第一次用到时单独从头建立；
+    先取出全部指标值再写入，取值失败（如未配置 cal_rsi 时查询 RSI）时该指标不登记，其他指标不受影响。
+    索引可以随时从K线单元重新建立，pickle 时不保存内容。
+    """
+
+    def __init__(self):
+        self.begin_idx: Optional[int] = None  # 第一根K线单元的 idx
+        self.cnt: Dict[str, int] = {}  # 已建立的各类指标索引的K线单元个数
+        for feature in (MACD_FEATURE, RSI_FEATURE, TRADE_FEATURE):
+            self.reset_feature(feature)
+
+    def reset_feature(self, feature: str):
+        if feature == MACD_FEATURE:
+            self.macd_abs_sum = CPrefixSum()
+            self.macd_max = CRangeExtreme(is_max=True)
+            self.macd_min = CRangeExtreme(is_max=False)
+            self.macd_run_id: List[int] = []  # MACD 同号区间编号，符号变化或为 0 时加一
+            self.last_macd = 0.0
+        elif feature == RSI_FEATURE:
+            self.rsi_max = CRangeExtreme(is_max=True)
+            self.rsi_min = CRangeExtreme(is_max=False)
+        elif feature == TRADE_FEATURE:
+            self.trade_sum: Dict[str, CPrefixSum] = {metric: CPrefixSum() for metric in TRADE_INFO_LST}
+            self.trade_none_cnt: Dict[str, CPrefixSum] = {metric: CPrefixSum() for metric in TRADE_INFO_LST}
+
+    def __deepcopy__(self, memo):
+        obj = CKLine_MetricIndex.__new__(CKLine_MetricIndex)
+        obj.begin_idx = self.begin_idx
+        obj.cnt = dict(self.cnt)
+        obj.macd_abs_sum = self.macd_abs_sum.copy()
+        obj.macd_max = self.macd_max.copy()
+        obj.macd_min = self.macd_min.copy()
+        obj.macd_run_id = self.macd_run_id[:]
+        obj.last_macd = self.last_macd
+        obj.rsi_max = self.rsi_max.copy()
+        obj.rsi_min = self.rsi_min.copy()
+        obj.trade_sum = {metric: prefix_sum.copy() for metric, prefix_sum in self.trade_sum.items()}
+        obj.trade_none_cnt = {metric: prefix_sum.copy() for metric, prefix_sum in self.trade_none_cnt.items()}
+        memo[id(self)] = obj
+        return obj
+
+    def __reduce__(self):
+        return self.__class__, ()
+
+    def __setstate__(self, state):
+        # 兼容保存了 features 集合的对象，内容同样在查询时重新建立
+        self.__init__()
+
+    def update(self, end_klu: CKLine_Unit, feature: str):
+        """确保 end_klu 及之前的K线单元都已按 feature 建立索引。"""
+        cnt = self.cnt.get(feature)
+        if cnt is None:
+            stop_idx = self.begin_idx  # 新的指标从第一根K线单元开始建立
+        elif end_klu.idx < self.begin_idx + cnt:
+            return
+        else:
+            stop_idx = self.begin_idx + cnt
+        new_klu_lst: List[CKLine_Unit] = []
+        klu: Optional[CKLine_Unit] = end_klu
+        while klu is not None and (stop_idx is None or klu.idx >= stop_idx):
+            new_klu_lst.append(klu)
+            klu = klu.pre
+        new_klu_lst.reverse()
+
+        values = self.get_values(new_klu_lst, feature)
+        if cnt is None:
+            self.reset_feature(feature)
+            if self.begin_idx is None:
+                self.begin_idx = new_klu_lst[0].idx
+            cnt = 0
+        self.append_values(values, feature)
+        self.cnt[feature] = cnt + len(values)
+
+    def get_values(self, klu_lst: List[CKLine_Unit], feature: str) -> list:
+        if feature == MACD_FEATURE:
+            return [klu.macd.macd for klu in klu_lst]
+        elif feature == RSI_FEATURE:
+            return [klu.rsi for klu in klu_lst]
+        return [klu.trade_info.values for klu in klu_lst]
+
+    def append_values(self, values: list, feature: str):
+        if feature == MACD_FEATURE:
+            for macd in values:
+                self.macd_abs_sum.append(abs(macd))
+                self.macd_max.append(macd)
+                self.macd_min.append(macd)
+                if not self.macd_run_id:
+                    self.macd_run_id.append(0)
+                elif macd * self.last_macd > 0:
+                    self.macd_run_id.append(self.macd_run_id[-1])
+                else:
+                    self.macd_run_id.append(self.macd_run_id[-1] + 1)
+                self.last_macd = macd
+        elif feature == RSI_FEATURE:
+            for rsi in values:
+                self.rsi_max.append(rsi)
+                self.rsi_min.append(rsi)
+        else:
+            for trade_values in values:
+                for metric, value in zip(TRADE_INFO_LST, trade_values):
+                    self.trade_sum[metric].append(0.0 if value is None else value)
+                    self.trade_none_cnt[metric].append(1 if value is None else 0)
+
+    def pos(self, klu: CKLine_Unit) -> int:
+        return klu.idx - self.begin_idx
+
+    def macd_area(self, begin_klu: CKLine_Unit, end_klu: CKLine_Unit) -> float:
+        """区间内 MACD 柱绝对值之和。"""
+        self.update(end_klu, MACD_FEATURE)
+        return self.macd_abs_sum.query(self.pos(begin_klu), self.pos(end_klu))
+
+    def macd_max_min(self, begin_klu: CKLine_Unit, end_klu: CKLine_Unit):
+        """区间内 MACD 柱的最大值和最小值。"""
+        self.update(end_klu, MACD_FEATURE)
+        begin, end = self.pos(begin_klu), self.pos(end_klu)
+        return self.macd_max.query(begin, end), self.macd_min.query(begin, end)
+
+    def macd_same_sign_area(self, begin_klu: CKLine_Unit, end_klu: CKLine_Unit, from_end: bool) -> float:
+        """
+        从区间一端开始，与该端 MACD 柱同号的连续部分的绝对值之和；该端 MACD 柱为 0 时返回 0。
+
+        from_end 为 False 时从 begin_klu 往后，为 True 时从 end_klu 往前。
+        """
+        self.update(end_klu, MACD_FEATURE)
+        begin, end = self.pos(begin_klu), self.pos(end_klu)
+        start = end if from_end else begin
+        if self.macd_max.arr[start] == 0:
+            return 0.0
+        run_id = self.macd_run_id[start]
+        if from_end:
+            begin = bisect_left(self.macd_run_id, run_id, begin, end + 1)
+        else:
+            end = bisect_right(self.macd_run_id, run_id, begin, end + 1) - 1
+        return self.macd_abs_sum.query(begin, end)
+
+    def rsi_max_min(self, begin_klu: CKLine_Unit, end_klu: CKLine_Unit):
+        """区间内 RSI 的最大值和最小值。"""
+        self.update(end_klu, RSI_FEATURE)
+        begin, end = self.pos(begin_klu), self.pos(end_klu)
+        return self.rsi_max.query(begin, end), self.rsi_min.query(begin, end)
+
+    def trade_metric_sum(self, begin_klu: CKLine_Unit, end_klu: CKLine_Unit, metric: str) -> Optional[float]:
+        """区间内成交量等交易指标之和，有K线单元缺少该指标时返回 None。"""
+        self.update(end_klu, TRADE_FEATURE)
+        begin, end = self.pos(begin_klu), self.pos(end_klu)
+        if self.trade_none_cnt[metric].query(begin, end) > 0:
+            return None
+        return self.trade_sum[metric].query(begin, end)
+
@@ -1,10 +1,13 @@
 import copy
-from typing import Dict, Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 # 从 Common 模块导入枚举类型和异常类
 from ..Common.CEnum import DATA_FIELD, TRADE_INFO_LST, TREND_TYPE
 from ..Common.ChanException import CChanException, ErrCode
 from ..Common.CTime import CTime
+from ..Common.func_util import set_slots_state
+from ..Common.snapshot import SNAPSHOT_KEY
 
 # 从 Math 模块导入各种技术指标类
 from ..Math.BOLL import BOLL_Metric, BollModel
@@ -17,12 +20,48 @@ from ..Math.TrendModel import CTrendModel
 # 从同级目录导入交易信息类
 from .TradeInfo import CTradeInfo
 
+if TYPE_CHECKING:
+    from ..KLine.KLine import CKLine
+
+
+# 未计算指标或没有子级时所有 K 线单元共用的空对象（只读）
+EMPTY_DEMARK = CDemarkIndex()
+EMPTY_TREND: dict = {}
+EMPTY_SUB_KL: tuple = ()
+
 
 class CKLine_Unit:
     """
     CKLine_Unit 类用于表示单个 K 线单元，包含价格信息、技术指标和关联的其他 K 线单元。
+
+    加载长周期的分钟数据时会创建数百万个实例，因此使用 __slots__ 去掉每个实例的 __dict__，
+    未配置的指标（macd、boll、rsi、kdj）对应的槽位保持未赋值。
     """
 
+    __slots__ = (
+        "kl_type",
+        "timestamp",
+        "time",
+        "close",
+        "open",
+        "high",
+        "low",
+        "trade_info",
+        "demark",
+        "sub_kl_list",
+        "sup_kl",
+        "__klc",
+        "trend",
+        "limit_flag",
+        "pre",
+        "next",
+        "__idx",
+        "macd",
+        "boll",
+        "rsi",
+        "kdj",
+    )
+
     def __init__(self, kl_dict, autofix=False):
         """
         初始化 CKLine_Unit 对象。
@@ -41,8 +80,9 @@ class CKLine_Unit:
             else None
         )
 
-        # 设置时间对象
-        self.time: CTime = kl_dict[DATA_FIELD.FIELD_TIME]
+        # 设置时间对象，直接传入 datetime（如 vnpy 的 bar.datetime）时转换为 CTime
+        time = kl_dict[DATA_FIELD.FIELD_TIME]
+        self.time: CTime = CTime.from_datetime(time) if isinstance(time, datetime) else time
 
         # 设置开盘、收盘、最高、最低价
         self.close = kl_dict[DATA_FIELD.FIELD_CLOSE]
@@ -56,21 +96,18 @@ class CKLine_Unit:
         # 初始化交易信息
         self.trade_info = CTradeInfo(kl_dict)
 
-        # 初始化 DeMark 指标
-        self.demark: CDemarkIndex = CDemarkIndex()
+        # 初始化 DeMark 指标，计算 DeMark 时会被替换为新的对象
+        self.demark: CDemarkIndex = EMPTY_DEMARK
 
-        # 初始化子级 K 线列表和父级 K 线引用
-        self.sub_kl_list = []  # 次级别 KLU 列表
+        # 初始化子级 K 线列表和父级 K 线引用，添加第一个子级时才创建列表
+        self.sub_kl_list = EMPTY_SUB_KL  # 次级别 KLU 列表
         self.sup_kl: Optional[CKLine_Unit] = None  # 指向更高级别 KLU
 
-        # 延迟导入 CKLine 类，避免循环导入
-        from ..KLine.KLine import CKLine
-
         # 初始化指向 KLine 对象的引用
-        self.__klc: Optional[CKLine] = None  # 指向 KLine
+        self.__klc: Optional["CKLine"] = None  # 指向 KLine
 
-        # 初始化趋势字典，存储不同类型的趋势指标
-        self.trend: Dict[TREND_TYPE, Dict[int, float]] = {}  # int -> float
+        # 初始化趋势字典，存储不同类型的趋势指标，写入第一个指标时才创建字典
+        self.trend: Dict[TREND_TYPE, Dict[int, float]] = EMPTY_TREND  # int -> float
 
         # 设置涨停和跌停标志，0 表示普通，-1 表示跌停，1 表示涨停
         self.limit_flag = 0  # 0:普通 -1:跌停，1:涨停
@@ -82,6 +119,10 @@ class CKLine_Unit:
         # 设置索引为 -1，后续可能会被更新
         self.set_idx(-1)
 
+    def __setstate__(self, state):
+        # 兼容加上 __slots__ 之前按 __dict__ 保存的对象（含 _CKLine_Unit__klc、_CKLine_Unit__idx）
+        set_slots_state(self, state)
+
     def __deepcopy__(self, memo):
         """
         实现深拷贝方法，确保所有嵌套对象也被正确拷贝。
@@ -92,6 +133,21 @@ class CKLine_Unit:
         返回：
             CKLine_Unit: 深拷贝后的 CKLine_Unit 对象。
         """
+        # 生成快照时需要复制的K线单元已经登记在 memo 中，走到这里的属于共享部分
+        if SNAPSHOT_KEY in memo:
+            return self
+        return self.copy_unit(memo)
+
+    def copy_unit(self, memo):
+        """
+        复制价格、交易信息和各指标，前后K线单元、所属 KLine 以及父子级别的链接由调用方重新建立。
+
+        参数：
+            memo (dict): 缓存字典，避免重复拷贝。
+
+        返回：
+            CKLine_Unit: 复制得到的 CKLine_Unit 对象。
+        """
         # 创建一个新的字典，只包含基础价格和时间字段
         _dict = {
             DATA_FIELD.FIELD_TIME: self.time,
@@ -110,15 +166,20 @@ class CKLine_Unit:
         obj = CKLine_Unit(_dict)
 
         # 深拷贝 DeMark 指标和趋势指标
-        obj.demark = copy.deepcopy(self.demark, memo)
-        obj.trend = copy.deepcopy(self.trend, memo)
+        if self.demark is not EMPTY_DEMARK:
+            obj.demark = copy.deepcopy(self.demark, memo)
+        if self.trend:
+            obj.trend = copy.deepcopy(self.trend, memo)
 
-        # 复制涨停标志
+        # 复制级别和涨停标志
+        obj.kl_type = self.kl_type
         obj.limit_flag = self.limit_flag
 
-        # 深拷贝技术指标（如果存在）
-        obj.macd = copy.deepcopy(self.macd, memo)
-        obj.boll = copy.deepcopy(self.boll, memo)
+        # 深拷贝技术指标（如果存在），klu_cache 中尚未加载的K线单元还没有计算指标
+        if hasattr(self, "macd"):
+            obj.macd = copy.deepcopy(self.macd, memo)
+        if hasattr(self, "boll"):
+            obj.boll = copy.deepcopy(self.boll, memo)
         if hasattr(self, "rsi"):
             obj.rsi = copy.deepcopy(self.rsi, memo)
         if hasattr(self, "kdj"):
@@ -188,10 +249,10 @@ class CKLine_Unit:
             autofix (bool): 如果为 True，自动修复异常数据，否则抛出异常。
         """
         # 检查最低价是否为所有价格中的最小值
-        if self.low > min([self.low, self.open, self.high, self.close]):
+        if self.low > min(self.low, self.open, self.high, self.close):
             if autofix:
                 self.low = min(
-                    [self.low, self.open, self.high, self.close]
+                    self.low, self.open, self.high, self.close
                 )  # 自动修复最低价
             else:
                 # 抛出自定义异常，提示数据无效
@@ -200,10 +261,10 @@ class CKLine_Unit:
                     ErrCode.KL_DATA_INVALID,
                 )
         # 检查最高价是否为所有价格中的最大值
-        if self.high < max([self.low, self.open, self.high, self.close]):
+        if self.high < max(self.low, self.open, self.high, self.close):
             if autofix:
                 self.high = max(
-                    [self.low, self.open, self.high, self.close]
+                    self.low, self.open, self.high, self.close
                 )  # 自动修复最高价
             else:
                 # 抛出自定义异常，提示数据无效
@@ -219,7 +280,10 @@ class CKLine_Unit:
         参数：
             child (CKLine_Unit): 需要添加的子级 K 线单元。
         """
-        self.sub_kl_list.append(child)
+        if self.sub_kl_list:
+            self.sub_kl_list.append(child)
+        else:
+            self.sub_kl_list = [child]
 
     def set_parent(self, parent: "CKLine_Unit"):
         """
@@ -270,6 +334,8 @@ class CKLine_Unit:
                 self.macd: CMACD_item = metric_model.add(self.close)
             elif isinstance(metric_model, CTrendModel):
                 # 计算并设置趋势指标
+                if not self.trend:
+                    self.trend = {}
                 if metric_model.type not in self.trend:
                     self.trend[metric_model.type] = {}
                 self.trend[metric_model.type][metric_model.T] = metric_model.add(
@@ -330,3 +396,39 @@ class CKLine_Unit:
             return
         pre_klu.next = self  # 将当前 K 线单元设置为前一个 K 线单元的下一个
         self.pre = pre_klu  # 将前一个 K 线单元设置为当前的前一个
+
+
+def set_metric_batch(klu_lst: List[CKLine_Unit], metric_model_lst: list) -> None:
+    """
+    按指标模型一次性计算一批 K 线单元的技术指标，结果与逐根调用 set_metric 完全一致。
+
+    参数：
+        klu_lst (List[CKLine_Unit]): 按时间顺序排列、尚未计算指标的 K 线单元列表。
+        metric_model_lst (list): 技术指标模型列表，计算后模型状态与逐根计算相同。
+    """
+    if not klu_lst:
+        return
+    closes = [klu.close for klu in klu_lst]
+    for metric_model in metric_model_lst:
+        if isinstance(metric_model, CMACD):
+            for klu, item in zip(klu_lst, metric_model.add_batch(closes)):
+                klu.macd = item
+        elif isinstance(metric_model, CTrendModel):
+            for klu, value in zip(klu_lst, metric_model.add_batch(closes)):
+                if not klu.trend:
+                    klu.trend = {}
+                klu.trend.setdefault(metric_model.type, {})[metric_model.T] = value
+        elif isinstance(metric_model, BollModel):
+            for klu, item in zip(klu_lst, metric_model.add_batch(closes)):
+                klu.boll = item
+        elif isinstance(metric_model, CDemarkEngine):
+            # Demark 序列依赖逐根状态，仍按顺序更新
+            for klu in klu_lst:
+                klu.demark = metric_model.update(idx=klu.idx, close=klu.close, high=klu.high, low=klu.low)
+        elif isinstance(metric_model, RSI):
+            for klu, value in zip(klu_lst, metric_model.add_batch(closes)):
+                klu.rsi = value
+        elif isinstance(metric_model, KDJ):
+            kdj_lst = metric_model.add_batch([klu.high for klu in klu_lst], [klu.low for klu in klu_lst], closes)
+            for klu, item in zip(klu_lst, kdj_lst):
+                klu.kdj = item
@@ -1,13 +1,27 @@
 from typing import Dict, Optional
 
 from ..Common.CEnum import TRADE_INFO_LST
+from ..Common.func_util import set_slots_state
 
 
 class CTradeInfo:
+    # 按 TRADE_INFO_LST 的顺序保存指标值，比每个实例一个字典节省内存
+    __slots__ = ("values",)
+
     def __init__(self, info: Dict[str, float]):
-        self.metric: Dict[str, Optional[float]] = {}
-        for metric_name in TRADE_INFO_LST:
-            self.metric[metric_name] = info.get(metric_name)
+        self.values = tuple([info.get(metric_name) for metric_name in TRADE_INFO_LST])
+
+    def __setstate__(self, state):
+        # 兼容旧版本按 metric 字典保存的对象
+        if isinstance(state, dict) and "metric" in state:
+            metric = state["metric"]
+            self.values = tuple([metric.get(metric_name) for metric_name in TRADE_INFO_LST])
+        else:
+            set_slots_state(self, state)
+
+    @property
+    def metric(self) -> Dict[str, Optional[float]]:
+        return dict(zip(TRADE_INFO_LST, self.values))
 
     def __str__(self):
-        return " ".join([f"{metric_name}:{value}" for metric_name, value in self.metric.items()])
+        return " ".join([f"{metric_name}:{value}" for metric_name, value in zip(TRADE_INFO_LST, self.values)])
@@ -1,28 +1,46 @@
 import math
 
+from ..Common.func_util import set_slots_state
+from .RollingWindow import CRollingMoment
+
 
 def _truncate(x):
     return x if x != 0 else 1e-7
 
 
 class BOLL_Metric:
+    __slots__ = ("theta", "UP", "DOWN", "MID")
+
     def __init__(self, ma, theta):
         self.theta = _truncate(theta)
         self.UP = ma + 2*theta
         self.DOWN = _truncate(ma - 2*theta)
         self.MID = ma
 
+    def __setstate__(self, state):
+        # 兼容加上 __slots__ 之前按 __dict__ 保存的对象
+        set_slots_state(self, state)
+
 
 class BollModel:
     def __init__(self, N=20):
         assert N > 1
         self.N = N
-        self.arr = []
+        self.moment = CRollingMoment(N)
+
+    def __setstate__(self, state):
+        # 兼容按 arr 列表保存窗口的旧版本对象，用保留的窗口值重建滑动窗口
+        if "arr" in state:
+            self.__init__(state["N"])
+            for value in state["arr"]:
+                self.moment.add(value)
+        else:
+            self.__dict__.update(state)
 
     def add(self, value) -> BOLL_Metric:
-        self.arr.append(value)
-        if len(self.arr) > self.N:
-            self.arr = self.arr[-self.N:]
-        ma = sum(self.arr)/len(self.arr)
-        theta = math.sqrt(sum((x-ma)**2 for x in self.arr) / len(self.arr))
-        return BOLL_Metric(ma, theta)
+        self.moment.add(value)
+        return BOLL_Metric(self.moment.mean(), math.sqrt(self.moment.var()))
+
+    def add_batch(self, values) -> list:
+        # 与依次调用 add 的结果和最终状态相同
+        return [self.add(value) for value in values]
@@ -1,27 +1,42 @@
+from ..Common.func_util import set_slots_state
+from .RollingWindow import CRollingExtreme
+
+
 class KDJ_Item:
+    __slots__ = ("k", "d", "j")
+
     def __init__(self, k, d, j):
         self.k = k
         self.d = d
         self.j = j
 
+    def __setstate__(self, state):
+        # 兼容加上 __slots__ 之前按 __dict__ 保存的对象
+        set_slots_state(self, state)
+
 
 class KDJ:
     def __init__(self, period: int = 9):
         super(KDJ, self).__init__()
-        self.arr = []
         self.period = period
+        self.high_window = CRollingExtreme(period, is_max=True)
+        self.low_window = CRollingExtreme(period, is_max=False)
         self.pre_kdj = KDJ_Item(50, 50, 50)
 
+    def __setstate__(self, state):
+        # 兼容按 arr 列表保存窗口的旧版本对象，用保留的最高、最低价重建滑动窗口
+        if "arr" in state:
+            self.__init__(state["period"])
+            for item in state["arr"]:
+                self.high_window.add(item["high"])
+                self.low_window.add(item["low"])
+            self.pre_kdj = state["pre_kdj"]
+        else:
+            self.__dict__.update(state)
+
     def add(self, high, low, close) -> KDJ_Item:
-        self.arr.append({
-            'high': high,
-            'low': low,
-        })
-        if len(self.arr) > self.period:
-            self.arr.pop(0)
-
-        hn = max([x['high'] for x in self.arr])
-        ln = min([x['low'] for x in self.arr])
+        hn = self.high_window.add(high)
+        ln = self.low_window.add(low)
         cn = close
         rsv = 100 * (cn - ln) / (hn - ln) if hn != ln else 0.0
 
@@ -32,3 +47,7 @@ class KDJ:
         self.pre_kdj = cur_kdj
 
         return cur_kdj
+
+    def add_batch(self, highs, lows, closes) -> list:
+        # 与依次调用 add 的结果和最终状态相同
+        return [self.add(high, low, close) for high, low, close in zip(highs, lows, closes)]
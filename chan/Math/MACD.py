@@ -1,7 +1,11 @@
 from typing import List
 
+from ..Common.func_util import set_slots_state
+
 
 class CMACD_item:
+    __slots__ = ("fast_ema", "slow_ema", "DIF", "DEA", "macd")
+
     def __init__(self, fast_ema, slow_ema, DIF, DEA):
         self.fast_ema = fast_ema
         self.slow_ema = slow_ema
@@ -9,6 +13,10 @@ class CMACD_item:
         self.DEA = DEA
         self.macd = 2 * (DIF - DEA)
 
+    def __setstate__(self, state):
+        # 兼容加上 __slots__ 之前按 __dict__ 保存的对象
+        set_slots_state(self, state)
+
 
 class CMACD:
     def __init__(self, fastperiod=12, slowperiod=26, signalperiod=9):
@@ -27,3 +35,22 @@ class CMACD:
             _dea = (2 * _dif + (self.signalperiod - 1) * self.macd_info[-1].DEA) / (self.signalperiod + 1)
             self.macd_info.append(CMACD_item(fast_ema=_fast_ema, slow_ema=_slow_ema, DIF=_dif, DEA=_dea))
         return self.macd_info[-1]
+
+    def add_batch(self, values: List[float]) -> List[CMACD_item]:
+        # 与依次调用 add 的结果和最终状态相同，只是省去每个值的方法调用和列表索引
+        if not values:
+            return []
+        res: List[CMACD_item] = []
+        if not self.macd_info:
+            res.append(CMACD_item(fast_ema=values[0], slow_ema=values[0], DIF=0, DEA=0))
+        last = res[-1] if res else self.macd_info[-1]
+        fast_ema, slow_ema, dea = last.fast_ema, last.slow_ema, last.DEA
+        fastperiod, slowperiod, signalperiod = self.fastperiod, self.slowperiod, self.signalperiod
+        for value in values[len(res):]:
+            fast_ema = (2 * value + (fastperiod - 1) * fast_ema) / (fastperiod + 1)
+            slow_ema = (2 * value + (slowperiod - 1) * slow_ema) / (slowperiod + 1)
+            dif = fast_ema - slow_ema
+            dea = (2 * dif + (signalperiod - 1) * dea) / (signalperiod + 1)
+            res.append(CMACD_item(fast_ema=fast_ema, slow_ema=slow_ema, DIF=dif, DEA=dea))
+        self.macd_info.extend(res)
+        return res
@@ -1,29 +1,55 @@
 class RSI:
     def __init__(self, period: int = 14):
         super(RSI, self).__init__()
-        self.close_arr = []
         self.period = period
-        self.diff = []
-        self.up = []
-        self.down = []
+        self.pre_close = None
+        self.diff_cnt = 0  # 已累计的差值个数
+        self.up = 0.0  # 最近一次的平均上涨幅度
+        self.down = 0.0  # 最近一次的平均下跌幅度
+        self.up_sum = 0.0  # 前 period-1 个差值中上涨幅度之和
+        self.down_sum = 0.0  # 前 period-1 个差值中下跌幅度之和
+
+    def __setstate__(self, state):
+        # 兼容保存全部收盘价、差值和平均涨跌幅列表的旧版本对象，只取出继续计算需要的状态
+        if "close_arr" in state:
+            self.__init__(state["period"])
+            diff = state["diff"]
+            self.pre_close = state["close_arr"][-1] if state["close_arr"] else None
+            self.diff_cnt = len(diff)
+            self.up = state["up"][-1] if state["up"] else 0.0
+            self.down = state["down"][-1] if state["down"] else 0.0
+            self.up_sum = sum(x for x in diff[:self.period-1] if x > 0)
+            self.down_sum = sum(-x for x in diff[:self.period-1] if x < 0)
+        else:
+            self.__dict__.update(state)
 
     def add(self, close):
-        self.close_arr.append(close)
-        if len(self.close_arr) == 1:
+        pre_close, self.pre_close = self.pre_close, close
+        if pre_close is None:
             return 50.0
-        self.diff.append(self.close_arr[-1] - self.close_arr[-2])
-        if len(self.diff) < self.period:
-            self.up.append(sum(x for x in self.diff if x > 0)/self.period)
-            self.down.append(sum(-x for x in self.diff if x < 0)/self.period)
+        diff = close - pre_close
+        self.diff_cnt += 1
+        if self.diff_cnt < self.period:
+            # 差值不足 period 个时按已有差值之和 / period 计算
+            if diff > 0:
+                self.up_sum += diff
+            elif diff < 0:
+                self.down_sum += -diff
+            self.up = self.up_sum/self.period
+            self.down = self.down_sum/self.period
         else:
-            if self.diff[-1] > 0:
-                upval = self.diff[-1]
+            if diff > 0:
+                upval = diff
                 downval = 0.0
             else:
                 upval = 0.0
-                downval = -self.diff[-1]
-            self.up.append((self.up[-1] * (self.period - 1) + upval) / self.period)
-            self.down.append((self.down[-1] * (self.period - 1) + downval) / self.period)
-        rs = self.up[-1] / self.down[-1] if self.down[-1] != 0 else 0
+                downval = -diff
+            self.up = (self.up * (self.period - 1) + upval) / self.period
+            self.down = (self.down * (self.period - 1) + downval) / self.period
+        rs = self.up / self.down if self.down != 0 else 0
         rsi = 100.0 - 100.0 / (1.0 + rs)
         return rsi
+
+    def add_batch(self, closes) -> list:
+        # 与依次调用 add 的结果和最终状态相同
+        return [self.add(close) for close in closes]
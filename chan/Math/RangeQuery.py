@@ -0,0 +1,84 @@
+from typing import List
+
+
+class CPrefixSum:
+    """
+    前缀和，只支持在末尾追加，区间求和 O(1)。
+    """
+    __slots__ = ("prefix",)
+
+    def __init__(self):
+        self.prefix: List[float] = [0.0]  # prefix[i] = 前 i 个值之和
+
+    def __len__(self) -> int:
+        return len(self.prefix) - 1
+
+    def append(self, value) -> None:
+        self.prefix.append(self.prefix[-1] + value)
+
+    def copy(self) -> "CPrefixSum":
+        obj = CPrefixSum()
+        obj.prefix = self.prefix[:]
+        return obj
+
+    def query(self, begin: int, end: int) -> float:
+        """闭区间 [begin, end] 内的和。"""
+        return self.prefix[end + 1] - self.prefix[begin]
+
+
+class CRangeExtreme:
+    """
+    区间最大值（或最小值），只支持在末尾追加。
+
+    按 BLOCK 个值分块：每块写满时记录块内极值，并在块极值上维护稀疏表；
+    查询时两端不完整的块直接对切片求极值（最多 2*BLOCK 个值），中间整块查稀疏表，均为 O(1)。
+    """
+    __slots__ = ("is_max", "arr", "sparse")
+
+    BLOCK = 64
+
+    def __init__(self, is_max: bool = True):
+        self.is_max = is_max
+        self.arr: List[float] = []
+        self.sparse: List[List[float]] = [[]]  # sparse[j][k] = 第 k ~ k+2^j-1 块的极值
+
+    def __len__(self) -> int:
+        return len(self.arr)
+
+    def append(self, value) -> None:
+        self.arr.append(value)
+        if len(self.arr) % self.BLOCK == 0:
+            self.add_block(self.arr[-self.BLOCK:])
+
+    def copy(self) -> "CRangeExtreme":
+        obj = CRangeExtreme(self.is_max)
+        obj.arr = self.arr[:]
+        obj.sparse = [lst[:] for lst in self.sparse]
+        return obj
+
+    def add_block(self, block: List[float]) -> None:
+        func = max if self.is_max else min
+        sparse = self.sparse
+        sparse[0].append(func(block))
+        k, j = len(sparse[0]) - 1, 1
+        while k - (1 << j) + 1 >= 0:
+            if j == len(sparse):
+                sparse.append([])
+            begin = k - (1 << j) + 1
+            sparse[j].append(func(sparse[j-1][begin], sparse[j-1][begin + (1 << (j-1))]))
+            j += 1
+
+    def query(self, begin: int, end: int) -> float:
+        """闭区间 [begin, end] 内的极值。"""
+        func = max if self.is_max else min
+        begin_block = -(-begin // self.BLOCK)  # 第一个完整块
+        end_block = (end + 1) // self.BLOCK  # 最后一个完整块之后
+        if begin_block >= end_block:
+            return func(self.arr[begin:end+1])
+        j = (end_block - begin_block).bit_length() - 1
+        res = func(self.sparse[j][begin_block], self.sparse[j][end_block - (1 << j)])
+        if begin < begin_block * self.BLOCK:
+            res = func(res, func(self.arr[begin:begin_block * self.BLOCK]))
+        if end_block * self.BLOCK <= end:
+            res = func(res, func(self.arr[end_block * self.BLOCK:end+1]))
+        return res
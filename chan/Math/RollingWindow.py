@@ -0,0 +1,142 @@
+from collections import deque
+from typing import List, Optional
+
+
+class CRingBuffer:
+    """
+    定长环形缓冲区，预先分配 N 个位置，只保留最近 N 个值。
+    """
+    __slots__ = ("N", "buf", "cnt")
+
+    def __init__(self, N: int):
+        assert N > 0
+        self.N = N
+        self.buf: List[float] = [0.0] * N
+        self.cnt = 0  # 累计写入的值个数
+
+    def __len__(self) -> int:
+        return min(self.cnt, self.N)
+
+    def push(self, value) -> Optional[float]:
+        """写入一个值，窗口已满时返回被挤出的最旧值，否则返回 None。"""
+        pos = self.cnt % self.N
+        old = self.buf[pos] if self.cnt >= self.N else None
+        self.buf[pos] = value
+        self.cnt += 1
+        return old
+
+    def values(self) -> List[float]:
+        """按时间顺序返回窗口内的值。"""
+        if self.cnt <= self.N:
+            return self.buf[:self.cnt]
+        pos = self.cnt % self.N
+        return self.buf[pos:] + self.buf[:pos]
+
+
+class CRollingMoment:
+    """
+    滑动窗口的和与平方和，每次更新 O(1)。
+
+    累加的是相对参考值 shift 的偏差，降低方差计算中的相消误差；
+    每写入 N 个值按窗口重新精确求和一次并更新 shift，避免浮点误差累积，均摊仍为 O(1)。
+    窗口内各值相同时直接返回该值和 0 方差。
+    """
+    __slots__ = ("window", "with_var", "shift", "s1", "s2", "since_sync", "last", "same_cnt")
+
+    def __init__(self, N: int, with_var: bool = True):
+        self.window = CRingBuffer(N)
+        self.with_var = with_var  # 只求均值时不维护平方和
+        self.shift = 0.0
+        self.s1 = 0.0  # sum(x - shift)
+        self.s2 = 0.0  # sum((x - shift)**2)
+        self.since_sync = 0
+        self.last = None
+        self.same_cnt = 0  # 末尾连续相同值的个数，窗口内全部相同时直接给出精确结果
+
+    def __len__(self) -> int:
+        return len(self.window)
+
+    def add(self, value) -> None:
+        window = self.window
+        if window.cnt == 0:
+            self.shift = value
+        if value == self.last:
+            self.same_cnt += 1
+        else:
+            self.same_cnt = 1
+            self.last = value
+        # 环形缓冲区写入，与 CRingBuffer.push 相同，内联以减少单根K线的调用开销
+        pos = window.cnt % window.N
+        old = window.buf[pos] if window.cnt >= window.N else None
+        window.buf[pos] = value
+        window.cnt += 1
+
+        self.since_sync += 1
+        if self.since_sync >= window.N:
+            self.resync()
+            return
+        shift = self.shift
+        d = value - shift
+        if old is None:
+            self.s1 += d
+            if self.with_var:
+                self.s2 += d * d
+        else:
+            d_old = old - shift
+            self.s1 += d - d_old
+            if self.with_var:
+                self.s2 += d * d - d_old * d_old
+
+    def resync(self) -> None:
+        arr = self.window.values()
+        shift = self.shift = sum(arr) / len(arr)
+        self.s1 = sum([x - shift for x in arr])
+        if self.with_var:
+            self.s2 = sum([(x - shift) ** 2 for x in arr])
+        self.since_sync = 0
+
+    def mean(self) -> float:
+        n = len(self.window)
+        if self.same_cnt >= n:
+            return self.last
+        return self.shift + self.s1 / n
+
+    def var(self) -> float:
+        n = len(self.window)
+        if self.same_cnt >= n:
+            return 0.0
+        m = self.s1 / n
+        return max(self.s2 / n - m * m, 0.0)
+
+
+class CRollingExtreme:
+    """
+    滑动窗口最大值（或最小值），用单调队列实现，每次更新均摊 O(1)。
+
+    队列中最多保留 N 个 (序号, 值)，队首即当前窗口的极值。
+    """
+    __slots__ = ("N", "is_max", "queue", "cnt")
+
+    def __init__(self, N: int, is_max: bool = True):
+        assert N > 0
+        self.N = N
+        self.is_max = is_max
+        self.queue: deque = deque()
+        self.cnt = 0
+
+    def add(self, value) -> float:
+        queue = self.queue
+        if self.is_max:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((self.cnt, value))
+        self.cnt += 1
+        if queue[0][0] <= self.cnt - 1 - self.N:
+            queue.popleft()
+        return queue[0][1]
+
+    def get(self) -> float:
+        return self.queue[0][1]
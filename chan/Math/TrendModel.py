@@ -1,22 +1,36 @@
 from ..Common.CEnum import TREND_TYPE
 from ..Common.ChanException import CChanException, ErrCode
+from .RollingWindow import CRollingExtreme, CRollingMoment
 
 
 class CTrendModel:
     def __init__(self, trend_type: TREND_TYPE, T: int):
         self.T = T
-        self.arr = []
         self.type = trend_type
-
-    def add(self, value) -> float:
-        self.arr.append(value)
-        if len(self.arr) > self.T:
-            self.arr = self.arr[-self.T:]
         if self.type == TREND_TYPE.MEAN:
-            return sum(self.arr)/len(self.arr)
+            self.window = CRollingMoment(T, with_var=False)
         elif self.type == TREND_TYPE.MAX:
-            return max(self.arr)
+            self.window = CRollingExtreme(T, is_max=True)
         elif self.type == TREND_TYPE.MIN:
-            return min(self.arr)
+            self.window = CRollingExtreme(T, is_max=False)
         else:
             raise CChanException(f"Unknown trendModel Type = {self.type}", ErrCode.PARA_ERROR)
+
+    def __setstate__(self, state):
+        # 兼容按 arr 列表保存窗口的旧版本对象，用保留的窗口值重建滑动窗口
+        if "arr" in state:
+            self.__init__(state["type"], state["T"])
+            for value in state["arr"]:
+                self.window.add(value)
+        else:
+            self.__dict__.update(state)
+
+    def add(self, value) -> float:
+        if self.type == TREND_TYPE.MEAN:
+            self.window.add(value)
+            return self.window.mean()
+        return self.window.add(value)
+
+    def add_batch(self, values) -> list:
+        # 与依次调用 add 的结果和最终状态相同
+        return [self.add(value) for value in values]
@@ -3,6 +3,7 @@ from typing import Generic, List, Optional, Self, TypeVar
 from ..Bi.Bi import CBi
 from ..Common.CEnum import BI_DIR, MACD_ALGO, TREND_LINE_SIDE
 from ..Common.ChanException import CChanException, ErrCode
+from ..Common.snapshot import share_or_deepcopy
 from ..KLine.KLine_Unit import CKLine_Unit
 from ..Math.TrendLine import CTrendLine
 
@@ -42,6 +43,9 @@ class CSeg(Generic[LINE_TYPE]):
 
         self.ele_inside_is_sure = False
 
+    def __deepcopy__(self, memo):
+        return share_or_deepcopy(self, memo)
+
     def set_seg_idx(self, idx):
         self.seg_idx = idx
 
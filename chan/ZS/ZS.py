@@ -4,6 +4,7 @@ from ..Bi.Bi import CBi
 from ..BuySellPoint.BSPointConfig import CPointConfig
 from ..Common.ChanException import CChanException, ErrCode
 from ..Common.func_util import has_overlap
+from ..Common.snapshot import share_or_deepcopy
 from ..KLine.KLine_Unit import CKLine_Unit
 from ..Seg.Seg import CSeg
 
@@ -41,6 +42,9 @@ class CZS(Generic[LINE_TYPE]):
 
         self.__bi_lst: List[LINE_TYPE] = []  # begin_bi~end_bi之间的笔，在update_zs_in_seg函数中更新
 
+    def __deepcopy__(self, memo):
+        return share_or_deepcopy(self, memo)
+
     def clean_cache(self):
         self._memoize_cache = {}
 
@@ -21,7 +21,7 @@ class CZSList:
 
     def update_last_pos(self, seg_list: CSegListComm):
         self.last_sure_pos = -1
-        for seg in seg_list[::-1]:
+        for seg in reversed(seg_list):
             if seg.is_sure:
                 self.last_sure_pos = seg.start_bi.idx
                 return
@@ -29,6 +29,13 @@ class CZSList:
     def seg_need_cal(self, seg: CSeg):
         return seg.start_bi.idx >= self.last_sure_pos
 
+    def first_cal_seg_idx(self, seg_list: CSegListComm) -> int:
+        # seg_need_cal 随线段序号单调，从尾部往前找到第一个需要计算的线段
+        idx = len(seg_list)
+        while idx > 0 and self.seg_need_cal(seg_list[idx-1]):
+            idx -= 1
+        return idx
+
     def add_to_free_lst(self, item, is_sure, zs_algo):
         if len(self.free_item_lst) != 0 and item.idx == self.free_item_lst[-1].idx:
             # 防止笔新高或新低的更新带来bug
@@ -86,9 +93,7 @@ class CZSList:
         while self.zs_lst and self.zs_lst[-1].begin_bi.idx >= self.last_sure_pos:
             self.zs_lst.pop()
         if self.config.zs_algo == "normal":
-            for seg in seg_lst:
-                if not self.seg_need_cal(seg):
-                    continue
+            for seg in seg_lst[self.first_cal_seg_idx(seg_lst):]:
                 self.clear_free_lst()
                 seg_bi_lst = bi_lst[seg.start_bi.idx:seg.end_bi.idx+1]
                 self.add_zs_from_bi_range(seg_bi_lst, seg.dir, seg.is_sure)
@@ -152,4 +157,4 @@ class CZSList:
         if not self.config.need_combine:
             return
         while len(self.zs_lst) >= 2 and self.zs_lst[-2].combine(self.zs_lst[-1], combine_mode=self.config.zs_combine_mode):
-            self.zs_lst = self.zs_lst[:-1]  # 合并后删除最后一个
+            self.zs_lst.pop()  # 合并后删除最后一个
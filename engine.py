@@ -1,14 +1,21 @@
+import ast
 import importlib
+import os
+import pickle
+import sys
 import traceback
-from collections import defaultdict
+from threading import Thread, get_ident
+from time import perf_counter, perf_counter_ns, sleep
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 from types import ModuleType
-from typing import Any, Callable, Dict, List, Optional, Type
-from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from datetime import datetime, time, timedelta
 from concurrent.futures import ThreadPoolExecutor
-from copy import copy
+from functools import partial
 from glob import glob
 from concurrent.futures import Future
+from logging import INFO
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -27,7 +34,8 @@ from vnpy.trader.object import (
 from vnpy.trader.event import (
     EVENT_TICK,
     EVENT_ORDER,
-    EVENT_TRADE
+    EVENT_TRADE,
+    EVENT_TIMER
 )
 from vnpy.trader.constant import (
     Direction,
@@ -37,7 +45,7 @@ from vnpy.trader.constant import (
     Offset,
     Status
 )
-from vnpy.trader.utility import load_json, save_json, extract_vt_symbol, round_to
+from vnpy.trader.utility import load_json, save_json, extract_vt_symbol, round_to, get_folder_path
 from vnpy.trader.database import BaseDatabase, get_database, DB_TZ
 from vnpy.trader.datafeed import BaseDatafeed, get_datafeed
 
@@ -46,12 +54,22 @@ from .base import (
     EVENT_CTA_LOG,
     EVENT_CTA_STRATEGY,
     EVENT_CTA_STOPORDER,
+    EVENT_CTA_TICK,
+    EVENT_CTA_PROCESS,
+    BudgetPolicy,
+    CallbackBudget,
     EngineType,
+    OrderLeg,
     StopOrder,
     StopOrderStatus,
+    TickPolicy,
     STOPORDER_PREFIX
 )
 from .template import CtaTemplate, TargetPosTemplate
+from .utility import BarAggregator, BoundedIdSet, LatencyHistogram
+from .recorder import TickRecorder
+from .process import StrategyProcess, TickRing, create_strategy_proxy
+from .log import LogSink
 from .locale import _
 
 # 停止单状态映射
@@ -65,6 +83,15 @@ STOP_STATUS_MAP: Dict[Status, StopOrderStatus] = {
 }
 
 
+def to_db_tz(dt: datetime) -> datetime:
+    """
+    Convert datetime into database timezone.
+    """
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=DB_TZ)
+    return dt.astimezone(DB_TZ)
+
+
 class CtaEngine(BaseEngine):
     """"""
 
@@ -72,6 +99,8 @@ class CtaEngine(BaseEngine):
 
     setting_filename: str = "cta_strategy_setting.json"
     data_filename: str = "cta_strategy_data.json"
+    snapshot_foldername: str = "cta_strategy_snapshot"
+    class_filename: str = "cta_strategy_class.json"
 
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine) -> None:
         """"""
@@ -81,6 +110,8 @@ class CtaEngine(BaseEngine):
         self.strategy_data: dict = {}                                   # strategy_name: dict
 
         self.classes: dict = {}                                         # class_name: stategy_class
+        self.class_modules: Dict[str, str] = {}                         # class_name: module_name (not imported)
+        self.class_manifest: dict = {}                                  # filepath: scan result
         self.strategies: dict = {}                                      # strategy_name: strategy
 
         self.symbol_strategy_map: defaultdict = defaultdict(list)       # vt_symbol: strategy list
@@ -92,13 +123,54 @@ class CtaEngine(BaseEngine):
 
         self.init_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
 
-        self.vt_tradeids: set = set()                                   # for filtering duplicate trade
+        self.vt_tradeids: BoundedIdSet = BoundedIdSet()                 # for filtering duplicate trade
+
+        self.inactive_orderids: OrderedDict = OrderedDict()             # vt_orderid: finish time
+        self.order_retention: float = 60                                # seconds to keep finished order
+        self.max_inactive_orders: int = 10_000
 
         self.database: BaseDatabase = get_database()
         self.datafeed: BaseDatafeed = get_datafeed()
 
+        self.history_cache: bool = True                                 # fill database gaps only
+        self.history_ranges: Dict[tuple, list] = {}                     # (symbol, exchange, interval): [(start, end)]
+        self.history_ranges_loaded: bool = False
+
+        self.latency_enabled: bool = False                              # latency monitor switch
+        self.latency_log_interval: int = 60                             # seconds between summary logs
+        self.latency_timer_count: int = 0
+        self.latency_stats: defaultdict = defaultdict(dict)             # strategy_name: {name: histogram}
+        self.queue_histogram: LatencyHistogram = LatencyHistogram()     # tick event queue wait
+        self.tick_start: int = 0                                        # perf counter of tick in process
+
+        self.callback_budgets: Dict[str, CallbackBudget] = {}           # strategy_name: budget
+        self.tick_policies: Dict[str, TickPolicy] = {}                  # strategy_name: policy
+        self.tick_intervals: Dict[str, float] = {}                      # strategy_name: sample interval
+        self.pending_ticks: Dict[str, TickData] = {}                    # strategy_name: latest tick
+        self.last_tick_delivery: Dict[str, float] = {}                  # strategy_name: perf counter
+
+        self.running_call: Optional[tuple] = None                       # callback watched by watchdog
+        self.sampled_call: Optional[tuple] = None
+        self.sampled_stack: str = ""
+        self.watchdog_interval: float = 0.05
+        self.watchdog_active: bool = False
+        self.watchdog_thread: Optional[Thread] = None
+
+        self.bar_aggregators: Dict[str, BarAggregator] = {}             # vt_symbol: aggregator
+        self.bar_subscriptions: defaultdict = defaultdict(list)         # (vt_symbol, window, interval, daily_end): [(strategy, callback)]
+
+        self.tick_recorder: Optional[TickRecorder] = None               # archive ticks of strategy symbols
+
+        self.strategy_processes: Dict[str, StrategyProcess] = {}        # strategy_name: worker process
+        self.tick_rings: Dict[str, TickRing] = {}                       # vt_symbol: shared memory ring
+        self.tick_ring_size: int = 4096
+
+        self.log_sink: LogSink = LogSink(event_engine)                  # started in init_engine
+
     def init_engine(self) -> None:
         """"""
+        self.log_sink.start()
+
         self.init_datafeed()
         self.load_strategy_class()
         self.load_strategy_setting()
@@ -108,13 +180,34 @@ class CtaEngine(BaseEngine):
 
     def close(self) -> None:
         """"""
+        # Strategies still trading are saved in stop_strategy
+        for strategy in list(self.strategies.values()):
+            if strategy.inited and not strategy.trading:
+                self.save_strategy_snapshot(strategy)
+
         self.stop_all_strategies()
 
+        if self.tick_recorder:
+            self.tick_recorder.stop()
+
+        for strategy_name in list(self.strategy_processes.keys()):
+            self.stop_strategy_process(strategy_name)
+
+        self.watchdog_active = False
+        if self.watchdog_thread:
+            self.watchdog_thread.join()
+            self.watchdog_thread = None
+
+        self.log_sink.stop()
+
     def register_event(self) -> None:
         """"""
         self.event_engine.register(EVENT_TICK, self.process_tick_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
+        self.event_engine.register(EVENT_TIMER, self.process_timer_event)
+        self.event_engine.register(EVENT_CTA_TICK, self.process_pending_tick_event)
+        self.event_engine.register(EVENT_CTA_PROCESS, self.process_strategy_process_event)
 
     def init_datafeed(self) -> None:
         """
@@ -148,11 +241,107 @@ class CtaEngine(BaseEngine):
         if not strategies:
             return
 
+        if self.latency_enabled:
+            self.tick_start = perf_counter_ns()
+
+            localtime: Optional[datetime] = getattr(tick, "localtime", None)
+            if localtime:
+                wait: timedelta = datetime.now() - localtime
+                self.queue_histogram.add(int(wait.total_seconds() * 1_000_000_000))
+
+        if self.tick_recorder:
+            self.tick_recorder.record(tick)
+
+        ring: Optional[TickRing] = self.tick_rings.get(tick.vt_symbol, None)
+        if ring:
+            ring.write(tick)
+
         self.check_stop_order(tick)
 
+        aggregator: Optional[BarAggregator] = self.bar_aggregators.get(tick.vt_symbol, None)
+        if aggregator:
+            aggregator.update_tick(tick)
+
         for strategy in strategies:
-            if strategy.inited:
+            if not strategy.inited:
+                continue
+
+            policy: Optional[TickPolicy] = self.tick_policies.get(strategy.strategy_name, None)
+            if not policy:
                 self.call_strategy_func(strategy, strategy.on_tick, tick)
+            elif policy == TickPolicy.LATEST:
+                self.conflate_tick(strategy, tick)
+            else:
+                self.sample_tick(strategy, tick)
+
+        self.tick_start = 0
+
+    def conflate_tick(self, strategy: CtaTemplate, tick: TickData) -> None:
+        """
+        Keep only the latest tick and deliver it after queued events.
+        """
+        if strategy.strategy_name not in self.pending_ticks:
+            event: Event = Event(EVENT_CTA_TICK, strategy)
+            self.event_engine.put(event)
+
+        self.pending_ticks[strategy.strategy_name] = tick
+
+    def sample_tick(self, strategy: CtaTemplate, tick: TickData) -> None:
+        """
+        Deliver tick at most once per sample interval.
+        """
+        strategy_name: str = strategy.strategy_name
+
+        now: float = perf_counter()
+        last: float = self.last_tick_delivery.get(strategy_name, 0)
+        if now - last < self.tick_intervals[strategy_name]:
+            return
+        self.last_tick_delivery[strategy_name] = now
+
+        self.call_strategy_func(strategy, strategy.on_tick, tick)
+
+    def set_tick_policy(
+        self, strategy_name: str, policy: TickPolicy, interval: float = 1
+    ) -> None:
+        """
+        Set how ticks are delivered to on_tick of a strategy.
+
+        ALL delivers every tick, LATEST delivers only the latest tick once
+        the strategy catches up with event queue, INTERVAL delivers at most
+        one tick per interval seconds. Stop orders always check every tick.
+        """
+        self.tick_intervals.pop(strategy_name, None)
+        self.last_tick_delivery.pop(strategy_name, None)
+
+        if policy == TickPolicy.ALL:
+            self.tick_policies.pop(strategy_name, None)
+            return
+
+        if policy == TickPolicy.INTERVAL:
+            self.tick_intervals[strategy_name] = interval
+
+        self.tick_policies[strategy_name] = policy
+
+    def get_tick_policy(self, strategy_name: str) -> TickPolicy:
+        """
+        Get tick delivery policy of a strategy.
+        """
+        return self.tick_policies.get(strategy_name, TickPolicy.ALL)
+
+    def process_pending_tick_event(self, event: Event) -> None:
+        """"""
+        strategy: CtaTemplate = event.data
+
+        tick: Optional[TickData] = self.pending_ticks.pop(strategy.strategy_name, None)
+        if not tick or not strategy.inited:
+            return
+
+        if self.latency_enabled:
+            self.tick_start = perf_counter_ns()
+
+        self.call_strategy_func(strategy, strategy.on_tick, tick)
+
+        self.tick_start = 0
 
     def process_order_event(self, event: Event) -> None:
         """"""
@@ -167,6 +356,12 @@ class CtaEngine(BaseEngine):
         if order.vt_orderid in vt_orderids and not order.is_active():
             vt_orderids.remove(order.vt_orderid)
 
+            # Trade push may arrive after order finished, so keep the
+            # relationship for a while before evicting it.
+            self.inactive_orderids[order.vt_orderid] = perf_counter()
+            if len(self.inactive_orderids) > self.max_inactive_orders:
+                self.evict_inactive_orders()
+
         # For server stop order, call strategy on_stop_order function
         if order.type == OrderType.STOP:
             so: StopOrder = StopOrder(
@@ -213,6 +408,108 @@ class CtaEngine(BaseEngine):
         # Update GUI
         self.put_strategy_event(strategy)
 
+    def subscribe_bar(
+        self,
+        strategy: CtaTemplate,
+        callback: Callable[[BarData], None],
+        window: int = 1,
+        interval: Interval = Interval.MINUTE,
+        daily_end: Optional[time] = None
+    ) -> None:
+        """
+        Subscribe bar series aggregated from tick data of strategy's vt_symbol.
+
+        Bar series of the same (vt_symbol, window, interval, daily_end) is
+        generated only once and the same BarData object is pushed to all
+        subscribers.
+        """
+        vt_symbol: str = strategy.vt_symbol
+
+        # daily_end is only used by daily bar series
+        if interval != Interval.DAILY:
+            daily_end = None
+
+        aggregator: Optional[BarAggregator] = self.bar_aggregators.get(vt_symbol, None)
+        if not aggregator:
+            aggregator = BarAggregator(partial(self.process_aggregated_bar, vt_symbol))
+            self.bar_aggregators[vt_symbol] = aggregator
+
+        aggregator.add_window(window, interval, daily_end)
+
+        subscribers: list = self.bar_subscriptions[(vt_symbol, window, interval, daily_end)]
+        if (strategy, callback) not in subscribers:
+            subscribers.append((strategy, callback))
+
+    def unsubscribe_bar(self, strategy: CtaTemplate) -> None:
+        """
+        Remove all bar subscriptions of a strategy.
+        """
+        for key, subscribers in list(self.bar_subscriptions.items()):
+            subscribers[:] = [s for s in subscribers if s[0] is not strategy]
+            if subscribers:
+                continue
+
+            self.bar_subscriptions.pop(key)
+
+            vt_symbol, window, interval, daily_end = key
+            aggregator: Optional[BarAggregator] = self.bar_aggregators.get(vt_symbol, None)
+            if aggregator:
+                aggregator.remove_window(window, interval, daily_end)
+
+        vt_symbols: set = {key[0] for key in self.bar_subscriptions.keys()}
+        for vt_symbol in list(self.bar_aggregators.keys()):
+            if vt_symbol not in vt_symbols:
+                self.bar_aggregators.pop(vt_symbol)
+
+    def process_aggregated_bar(self, vt_symbol: str, key: tuple, bar: BarData) -> None:
+        """
+        Push aggregated bar to subscribed strategies.
+        """
+        subscribers: Optional[list] = self.bar_subscriptions.get((vt_symbol, *key), None)
+        if not subscribers:
+            return
+
+        for strategy, callback in subscribers:
+            if strategy.inited:
+                self.call_strategy_func(strategy, callback, bar)
+
+    def replay_subscribed_bar(self, strategy: CtaTemplate, bars: List[BarData]) -> None:
+        """
+        Push history 1 minute bars into bar series subscribed by a strategy.
+
+        A temporary aggregator is used so that shared bar series are not affected.
+        Series subscribed only by this strategy then continue from the history,
+        so that the first live window bar also includes the minutes loaded.
+        """
+        subscriptions: Dict[tuple, list] = defaultdict(list)
+        for (vt_symbol, *key), subscribers in self.bar_subscriptions.items():
+            for subscriber, callback in subscribers:
+                if subscriber is strategy:
+                    subscriptions[tuple(key)].append(callback)
+
+        if not subscriptions:
+            return
+
+        def on_bar(key: tuple, bar: BarData) -> None:
+            for callback in subscriptions.get(key, []):
+                callback(bar)
+
+        aggregator: BarAggregator = BarAggregator(on_bar)
+        for key in subscriptions.keys():
+            aggregator.add_window(*key)
+
+        for bar in bars:
+            aggregator.update_bar(bar)
+
+        shared: Optional[BarAggregator] = self.bar_aggregators.get(strategy.vt_symbol, None)
+        if not shared:
+            return
+
+        for key in subscriptions.keys():
+            subscribers: list = self.bar_subscriptions[(strategy.vt_symbol, *key)]
+            if all(subscriber is strategy for subscriber, _ in subscribers):
+                shared.copy_window_state(key, aggregator)
+
     def check_stop_order(self, tick: TickData) -> None:
         """"""
         for stop_order in list(self.stop_orders.values()):
@@ -323,6 +620,9 @@ class CtaEngine(BaseEngine):
 
             self.main_engine.update_order_request(req, vt_orderid, contract.gateway_name)
 
+            if self.tick_start:
+                self.record_latency(strategy, "tick_to_order", perf_counter_ns() - self.tick_start)
+
             # Save relationship between orderid and strategy.
             self.orderid_strategy_map[vt_orderid] = strategy
             self.strategy_orderid_map[strategy.strategy_name].add(vt_orderid)
@@ -509,8 +809,93 @@ class CtaEngine(BaseEngine):
         if not vt_orderids:
             return
 
-        for vt_orderid in copy(vt_orderids):
-            self.cancel_order(strategy, vt_orderid)
+        self.cancel_orders(strategy, list(vt_orderids))
+
+    def send_orders(self, strategy: CtaTemplate, legs: List[OrderLeg]) -> List[list]:
+        """
+        Send a batch of orders and return vt_orderids of each leg.
+
+        Legs are converted and sent one by one through main engine, so that
+        risk checks hooked on MainEngine.send_order apply to every leg, and
+        position frozen by a closing leg is seen when converting the next.
+        Contract lookup, orderid mapping and strategy event are done once
+        for the whole batch.
+        """
+        results: List[list] = [[] for _ in legs]
+
+        contract: Optional[ContractData] = self.main_engine.get_contract(strategy.vt_symbol)
+        if not contract:
+            self.write_log(_("委托失败，找不到合约：{}").format(strategy.vt_symbol), strategy)
+            return results
+
+        strategy_map: Dict[str, CtaTemplate] = {}
+
+        for i, leg in enumerate(legs):
+            price: float = round_to(leg.price, contract.pricetick)
+            volume: float = round_to(leg.volume, contract.min_volume)
+
+            if leg.stop and not contract.stop_supported:
+                results[i] = self.send_local_stop_order(
+                    strategy, leg.direction, leg.offset, price, volume, leg.lock, leg.net
+                )
+                continue
+
+            original_req: OrderRequest = OrderRequest(
+                symbol=contract.symbol,
+                exchange=contract.exchange,
+                direction=leg.direction,
+                offset=leg.offset,
+                type=OrderType.STOP if leg.stop else OrderType.LIMIT,
+                price=price,
+                volume=volume,
+                reference=f"{APP_NAME}_{strategy.strategy_name}"
+            )
+
+            req_list: List[OrderRequest] = self.main_engine.convert_order_request(
+                original_req,
+                contract.gateway_name,
+                leg.lock,
+                leg.net
+            )
+
+            for req in req_list:
+                vt_orderid: str = self.main_engine.send_order(req, contract.gateway_name)
+                if not vt_orderid:
+                    continue
+
+                results[i].append(vt_orderid)
+                strategy_map[vt_orderid] = strategy
+
+                # Freeze position before converting next leg
+                self.main_engine.update_order_request(req, vt_orderid, contract.gateway_name)
+
+        # Save relationship between orderid and strategy at once.
+        if strategy_map:
+            if self.tick_start:
+                self.record_latency(strategy, "tick_to_order", perf_counter_ns() - self.tick_start)
+
+            self.orderid_strategy_map.update(strategy_map)
+            self.strategy_orderid_map[strategy.strategy_name].update(strategy_map.keys())
+
+        self.put_strategy_event(strategy)
+        return results
+
+    def cancel_orders(self, strategy: CtaTemplate, vt_orderids: List[str]) -> None:
+        """
+        Cancel a batch of orders, each through main engine.
+        """
+        for vt_orderid in vt_orderids:
+            if vt_orderid.startswith(STOPORDER_PREFIX):
+                self.cancel_local_stop_order(strategy, vt_orderid)
+                continue
+
+            order: Optional[OrderData] = self.main_engine.get_order(vt_orderid)
+            if not order:
+                self.write_log(_("撤单失败，找不到委托{}").format(vt_orderid), strategy)
+                continue
+
+            req: CancelRequest = order.create_cancel_request()
+            self.main_engine.cancel_order(req, order.gateway_name)
 
     def get_engine_type(self) -> EngineType:
         """"""
@@ -554,34 +939,128 @@ class CtaEngine(BaseEngine):
 
         # Pass gateway and datafeed if use_database set to True
         if not use_database:
-            # Query bars from gateway if available
-            contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
-
-            if contract and contract.history_data:
-                req: HistoryRequest = HistoryRequest(
-                    symbol=symbol,
-                    exchange=exchange,
-                    interval=interval,
-                    start=start,
-                    end=end
-                )
-                bars: List[BarData] = self.main_engine.query_history(req, contract.gateway_name)
-
-            # Try to query bars from datafeed, if not found, load from database.
+            if self.history_cache:
+                bars = self.update_bar_history(vt_symbol, interval, start, end)
             else:
-                bars: List[BarData] = self.query_bar_from_datafeed(symbol, exchange, interval, start, end)
+                bars = self.query_bar_from_source(vt_symbol, interval, start, end)
 
-        if not bars:
-            bars: List[BarData] = self.database.load_bar_data(
+        # Serve the whole range from database once missing parts are filled.
+        if self.history_cache or not bars:
+            db_bars: List[BarData] = self.database.load_bar_data(
                 symbol=symbol,
                 exchange=exchange,
                 interval=interval,
                 start=start,
                 end=end,
             )
+            if db_bars:
+                bars = db_bars
 
         return bars
 
+    def query_bar_from_source(
+        self, vt_symbol: str, interval: Interval, start: datetime, end: datetime
+    ) -> List[BarData]:
+        """
+        Query bar data from gateway if available, otherwise from datafeed.
+        """
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+        contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
+
+        if contract and contract.history_data:
+            req: HistoryRequest = HistoryRequest(
+                symbol=symbol,
+                exchange=exchange,
+                interval=interval,
+                start=start,
+                end=end
+            )
+            bars: Optional[List[BarData]] = self.main_engine.query_history(req, contract.gateway_name)
+        else:
+            bars: Optional[List[BarData]] = self.query_bar_from_datafeed(symbol, exchange, interval, start, end)
+
+        return bars or []
+
+    def get_history_ranges(
+        self, symbol: str, exchange: Exchange, interval: Interval
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Get sorted datetime ranges of bar data already stored in database.
+        """
+        if not self.history_ranges_loaded:
+            for overview in self.database.get_bar_overview():
+                if not overview.count:
+                    continue
+
+                key: tuple = (overview.symbol, overview.exchange, overview.interval)
+                self.history_ranges[key] = [
+                    (to_db_tz(overview.start), to_db_tz(overview.end))
+                ]
+
+            self.history_ranges_loaded = True
+
+        return self.history_ranges.get((symbol, exchange, interval), [])
+
+    def update_bar_history(
+        self, vt_symbol: str, interval: Interval, start: datetime, end: datetime
+    ) -> List[BarData]:
+        """
+        Download bar data missing in database and save it.
+
+        Only the head and tail ranges not covered by database are queried
+        from gateway/datafeed, the queried bars are returned.
+        """
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+        ranges: List[tuple] = list(self.get_history_ranges(symbol, exchange, interval))
+
+        # Gaps between stored ranges within [start, end], a gap with no
+        # stored range after it is queried up to the last bar returned.
+        missing: List[tuple] = []
+        gap_start: datetime = start
+        for range_start, range_end in ranges:
+            if range_end < gap_start:
+                continue
+            if range_start > end:
+                break
+
+            if gap_start < range_start:
+                missing.append((gap_start, range_start, True))
+            gap_start = range_end
+
+        # Query from last stored bar so that it gets refreshed too.
+        if gap_start <= end:
+            missing.append((gap_start, end, False))
+
+        bars: List[BarData] = []
+        for missing_start, missing_end, bounded in missing:
+            missing_bars: List[BarData] = self.query_bar_from_source(
+                vt_symbol, interval, missing_start, missing_end
+            )
+            if not missing_bars:
+                continue
+            bars.extend(missing_bars)
+
+            covered_start: datetime = min(missing_start, to_db_tz(missing_bars[0].datetime))
+            covered_end: datetime = missing_end if bounded else to_db_tz(missing_bars[-1].datetime)
+            ranges.append((covered_start, covered_end))
+
+        if not bars:
+            return bars
+
+        self.database.save_bar_data(bars)
+
+        # Merge overlapping ranges, ranges not touched by this query are kept.
+        merged: List[tuple] = []
+        for range_start, range_end in sorted(ranges):
+            if merged and range_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+        self.history_ranges[(symbol, exchange, interval)] = merged
+
+        self.write_log(_("{}历史数据增量更新{}条").format(vt_symbol, len(bars)))
+        return bars
+
     def load_tick(
         self,
         vt_symbol: str,
@@ -604,33 +1083,447 @@ class CtaEngine(BaseEngine):
 
     def call_strategy_func(
         self, strategy: CtaTemplate, func: Callable, params: Any = None
-    ) -> None:
+    ) -> bool:
         """
         Call function of a strategy and catch any exception raised.
+
+        Return False if exception was raised.
         """
+        latency_enabled: bool = self.latency_enabled
+        budget: Optional[CallbackBudget] = self.callback_budgets.get(strategy.strategy_name, None)
+
+        if latency_enabled or budget:
+            # Callbacks such as functools.partial have no __name__
+            func_name: str = getattr(func, "__name__", repr(func))
+            start: int = perf_counter_ns()
+
+            if budget:
+                previous_call: Optional[tuple] = self.running_call
+                call: tuple = (strategy.strategy_name, func_name, start, get_ident(), budget)
+                self.running_call = call
+
+        success: bool = True
+
         try:
             if params:
                 func(params)
             else:
                 func()
         except Exception:
+            success = False
             strategy.trading = False
             strategy.inited = False
 
             msg: str = _("触发异常已停止\n{}").format(traceback.format_exc())
             self.write_log(msg, strategy)
 
+        if latency_enabled or budget:
+            elapsed: int = perf_counter_ns() - start
+
+            if latency_enabled:
+                self.record_latency(strategy, func_name, elapsed)
+
+            if budget:
+                self.running_call = previous_call
+
+                if elapsed > budget.budget * 1_000_000:
+                    self.process_budget_overrun(budget, strategy, func_name, elapsed, call)
+
+        return success
+
+    def set_callback_budget(
+        self,
+        strategy_name: str,
+        budget: float,
+        policy: BudgetPolicy = BudgetPolicy.LOG,
+        max_breaches: int = 3,
+        throttle_interval: float = 1
+    ) -> None:
+        """
+        Set time budget (in milliseconds) of strategy callbacks.
+
+        Policy is applied once the budget is breached max_breaches times
+        without a pause longer than breach window.
+        """
+        self.callback_budgets[strategy_name] = CallbackBudget(
+            strategy_name=strategy_name,
+            budget=budget,
+            policy=policy,
+            max_breaches=max_breaches,
+            throttle_interval=throttle_interval
+        )
+
+        self.start_watchdog()
+
+    def remove_callback_budget(self, strategy_name: str) -> None:
+        """
+        Remove time budget of a strategy.
+
+        Tick policy already applied is kept, use set_tick_policy to restore.
+        """
+        self.callback_budgets.pop(strategy_name, None)
+
+    def get_budget_report(self, strategy_name: str = "") -> dict:
+        """
+        Get callback overrun report of strategies.
+        """
+        report: dict = {}
+
+        for budget in list(self.callback_budgets.values()):
+            if strategy_name and budget.strategy_name != strategy_name:
+                continue
+
+            report[budget.strategy_name] = {
+                "budget": budget.budget,
+                "policy": budget.policy.value,
+                "overruns": dict(budget.overruns),
+                "max_elapsed": dict(budget.max_elapsed),
+                "last_stack": budget.last_stack,
+            }
+
+        return report
+
+    def process_budget_overrun(
+        self,
+        budget: CallbackBudget,
+        strategy: CtaTemplate,
+        name: str,
+        elapsed: int,
+        call: tuple
+    ) -> None:
+        """
+        Track callback overrun and apply budget policy.
+        """
+        elapsed_ms: float = elapsed / 1_000_000
+
+        count: int = budget.overruns.get(name, 0) + 1
+        budget.overruns[name] = count
+        budget.max_elapsed[name] = max(budget.max_elapsed.get(name, 0), elapsed_ms)
+
+        if self.sampled_call is call:
+            budget.last_stack = self.sampled_stack
+
+        now: float = perf_counter()
+        if now - budget.last_breach > budget.breach_window:
+            budget.breach_count = 0
+        budget.breach_count += 1
+        budget.last_breach = now
+
+        if count == 1:
+            msg: str = _("{}耗时{:.1f}毫秒，超出预算{}毫秒\n{}").format(
+                name, elapsed_ms, budget.budget, budget.last_stack
+            )
+            self.write_log(msg, strategy)
+
+        if budget.breach_count < budget.max_breaches:
+            return
+        budget.breach_count = 0
+
+        msg: str = _("{}连续{}次超出预算{}毫秒，执行策略：{}\n{}").format(
+            name, budget.max_breaches, budget.budget, budget.policy.value, budget.last_stack
+        )
+        self.write_log(msg, strategy)
+
+        strategy_name: str = strategy.strategy_name
+
+        if budget.policy == BudgetPolicy.THROTTLE:
+            self.set_tick_policy(strategy_name, TickPolicy.INTERVAL, budget.throttle_interval)
+        elif budget.policy == BudgetPolicy.CONFLATE:
+            self.set_tick_policy(strategy_name, TickPolicy.LATEST)
+        elif budget.policy == BudgetPolicy.STOP:
+            self.stop_strategy(strategy_name)
+
+            strategy.inited = False
+            self.put_strategy_event(strategy)
+
+    def start_watchdog(self) -> None:
+        """
+        Start thread for sampling stack of callbacks running over budget.
+        """
+        if self.watchdog_thread:
+            return
+
+        self.watchdog_active = True
+        self.watchdog_thread = Thread(target=self.run_watchdog, daemon=True)
+        self.watchdog_thread.start()
+
+    def run_watchdog(self) -> None:
+        """"""
+        while self.watchdog_active:
+            sleep(self.watchdog_interval)
+
+            call: Optional[tuple] = self.running_call
+            if not call or call is self.sampled_call:
+                continue
+
+            __, __, start, thread_id, budget = call
+            if perf_counter_ns() - start < budget.budget * 1_000_000:
+                continue
+
+            frame = sys._current_frames().get(thread_id, None)
+            if not frame:
+                continue
+
+            self.sampled_stack = "".join(traceback.format_stack(frame))
+            self.sampled_call = call
+
+    def record_latency(self, strategy: CtaTemplate, name: str, value: int) -> None:
+        """
+        Record a latency sample (in nanoseconds) of a strategy.
+        """
+        histograms: dict = self.latency_stats[strategy.strategy_name]
+
+        histogram: Optional[LatencyHistogram] = histograms.get(name, None)
+        if not histogram:
+            histogram = LatencyHistogram()
+            histograms[name] = histogram
+
+        histogram.add(value)
+
+    def enable_latency_monitor(self, enabled: bool, log_interval: int = 60) -> None:
+        """
+        Enable or disable latency monitor.
+
+        Summary of latency is written into log every log_interval seconds,
+        set log_interval to 0 to disable summary log.
+        """
+        self.latency_enabled = enabled
+        self.latency_log_interval = log_interval
+        self.latency_timer_count = 0
+        self.tick_start = 0
+
+    def get_latency_stats(self, strategy_name: str = "") -> dict:
+        """
+        Get latency summary in microseconds.
+
+        Return summary of all strategies if strategy_name is not given.
+        The tick event queue wait time is stored under key "queue_wait".
+        """
+        if strategy_name:
+            histograms: dict = self.latency_stats.get(strategy_name, {})
+            return {name: h.get_summary() for name, h in histograms.items()}
+
+        stats: dict = {
+            name: {n: h.get_summary() for n, h in histograms.items()}
+            for name, histograms in self.latency_stats.items()
+        }
+        stats["queue_wait"] = self.queue_histogram.get_summary()
+        return stats
+
+    def reset_latency_stats(self) -> None:
+        """
+        Clear all latency samples collected.
+        """
+        self.latency_stats.clear()
+        self.queue_histogram.clear()
+
+    def evict_inactive_orders(self) -> None:
+        """
+        Remove finished orders from orderid strategy map after retention time.
+        """
+        now: float = perf_counter()
+        inactive_orderids: OrderedDict = self.inactive_orderids
+
+        while inactive_orderids:
+            vt_orderid, finish_time = next(iter(inactive_orderids.items()))
+            if (
+                now - finish_time < self.order_retention
+                and len(inactive_orderids) <= self.max_inactive_orders
+            ):
+                break
+
+            inactive_orderids.popitem(last=False)
+            self.orderid_strategy_map.pop(vt_orderid, None)
+
+    def get_bookkeeping_stats(self) -> dict:
+        """
+        Get size of order/trade bookkeeping data of each strategy.
+        """
+        stats: dict = {
+            name: {"active_orders": 0, "mapped_orders": 0, "stop_orders": 0}
+            for name in self.strategies.keys()
+        }
+
+        for name, vt_orderids in list(self.strategy_orderid_map.items()):
+            if name in stats:
+                stats[name]["active_orders"] = len(vt_orderids)
+
+        for strategy in list(self.orderid_strategy_map.values()):
+            if strategy.strategy_name in stats:
+                stats[strategy.strategy_name]["mapped_orders"] += 1
+
+        for stop_order in list(self.stop_orders.values()):
+            if stop_order.strategy_name in stats:
+                stats[stop_order.strategy_name]["stop_orders"] += 1
+
+        stats["engine"] = {
+            "orderid_strategy_map": len(self.orderid_strategy_map),
+            "inactive_orderids": len(self.inactive_orderids),
+            "vt_tradeids": len(self.vt_tradeids),
+        }
+        return stats
+
+    def enable_tick_recorder(
+        self,
+        enabled: bool,
+        folder: str = "",
+        batch_size: int = 1000,
+        flush_interval: float = 5
+    ) -> None:
+        """
+        Enable or disable recording ticks of strategy symbols into archive.
+
+        Archive files are saved under folder (default cta_tick_archive of
+        trader folder) and can be loaded by BacktestingEngine in tick mode.
+        """
+        if self.tick_recorder:
+            self.tick_recorder.stop()
+            self.tick_recorder = None
+
+        if not enabled:
+            self.write_log(_("行情录制已停止"))
+            return
+
+        recorder: TickRecorder = TickRecorder(
+            Path(folder) if folder else None,
+            batch_size,
+            flush_interval
+        )
+        recorder.start()
+        self.tick_recorder = recorder
+
+        self.write_log(_("行情录制已启动，保存路径：{}").format(recorder.folder))
+
+    def check_tick_recorder(self) -> None:
+        """
+        Flush buffered ticks and report write error or file repair of recorder.
+        """
+        recorder: TickRecorder = self.tick_recorder
+        recorder.check_flush()
+
+        if recorder.error:
+            self.write_log(_("行情录制写入失败：{}").format(recorder.error))
+            recorder.error = ""
+
+        if recorder.warning:
+            self.write_log(_("行情录制文件已修复：{}").format(recorder.warning))
+            recorder.warning = ""
+
+    def start_strategy_process(self, strategy: CtaTemplate) -> None:
+        """
+        Run strategy in a worker process.
+
+        Ticks are passed through shared memory ring of the vt_symbol,
+        which is shared by all worker processes trading the same symbol.
+        """
+        ring: Optional[TickRing] = self.tick_rings.get(strategy.vt_symbol, None)
+        if not ring:
+            ring = TickRing(self.tick_ring_size)
+            self.tick_rings[strategy.vt_symbol] = ring
+
+        process: StrategyProcess = StrategyProcess(self, strategy, ring)
+        process.start()
+        self.strategy_processes[strategy.strategy_name] = process
+
+        self.write_log(_("策略进程启动成功"), strategy)
+
+    def stop_strategy_process(self, strategy_name: str) -> None:
+        """
+        Stop worker process of strategy and release unused tick ring.
+        """
+        process: Optional[StrategyProcess] = self.strategy_processes.pop(strategy_name, None)
+        if not process:
+            return
+        process.close()
+
+        vt_symbol: str = process.strategy.vt_symbol
+        for p in self.strategy_processes.values():
+            if p.strategy.vt_symbol == vt_symbol:
+                return
+
+        ring: TickRing = self.tick_rings.pop(vt_symbol)
+        ring.close()
+        ring.unlink()
+
+    def process_strategy_process_event(self, event: Event) -> None:
+        """
+        Process message sent by strategy worker process.
+        """
+        process, msg = event.data
+
+        if self.strategy_processes.get(process.strategy.strategy_name, None) is process:
+            process.process_message(msg)
+
+    def process_timer_event(self, event: Event) -> None:
+        """"""
+        if self.inactive_orderids:
+            self.evict_inactive_orders()
+
+        if self.tick_recorder:
+            self.check_tick_recorder()
+
+        if not self.latency_enabled or not self.latency_log_interval:
+            return
+
+        self.latency_timer_count += 1
+        if self.latency_timer_count < self.latency_log_interval:
+            return
+        self.latency_timer_count = 0
+
+        self.write_latency_summary()
+
+    def write_latency_summary(self) -> None:
+        """
+        Write latency summary into log.
+        """
+        queue = getattr(self.event_engine, "_queue", None)
+        if queue is not None:
+            qsize: int = queue.qsize()
+        else:
+            qsize: int = 0
+
+        summary: dict = self.queue_histogram.get_summary()
+        self.write_log(
+            _("事件队列长度{}，行情排队耗时(us) p50:{:.0f} p99:{:.0f} max:{:.0f}").format(
+                qsize, summary["p50"], summary["p99"], summary["max"]
+            )
+        )
+
+        for strategy_name, histograms in list(self.latency_stats.items()):
+            strategy: Optional[CtaTemplate] = self.strategies.get(strategy_name, None)
+            if not strategy:
+                continue
+
+            for name, histogram in list(histograms.items()):
+                summary: dict = histogram.get_summary()
+                msg: str = _("{}耗时(us) 次数:{} 均值:{:.0f} p50:{:.0f} p99:{:.0f} max:{:.0f}").format(
+                    name,
+                    summary["count"],
+                    summary["mean"],
+                    summary["p50"],
+                    summary["p99"],
+                    summary["max"]
+                )
+                self.write_log(msg, strategy)
+
     def add_strategy(
-        self, class_name: str, strategy_name: str, vt_symbol: str, setting: dict
+        self,
+        class_name: str,
+        strategy_name: str,
+        vt_symbol: str,
+        setting: dict,
+        process: bool = False
     ) -> None:
         """
         Add a new strategy.
+
+        Set process to True to run the strategy in a worker process.
         """
         if strategy_name in self.strategies:
             self.write_log(_("创建策略失败，存在重名{}").format(strategy_name))
             return
 
-        strategy_class: Optional[Type[CtaTemplate]] = self.classes.get(class_name, None)
+        strategy_class: Optional[Type[CtaTemplate]] = self.get_strategy_class(class_name)
         if not strategy_class:
             self.write_log(_("创建策略失败，找不到策略类{}").format(class_name))
             return
@@ -644,13 +1537,20 @@ class CtaEngine(BaseEngine):
             self.write_log(_("创建策略失败，本地代码的交易所后缀不正确"))
             return
 
-        strategy: CtaTemplate = strategy_class(self, strategy_name, vt_symbol, setting)
+        # Strategy in worker process is built there, only a proxy is kept here
+        if process:
+            strategy: CtaTemplate = create_strategy_proxy(self, strategy_class, strategy_name, vt_symbol, setting)
+        else:
+            strategy: CtaTemplate = strategy_class(self, strategy_name, vt_symbol, setting)
         self.strategies[strategy_name] = strategy
 
         # Add vt_symbol to strategy map.
         strategies: list = self.symbol_strategy_map[vt_symbol]
         strategies.append(strategy)
 
+        if process:
+            self.start_strategy_process(strategy)
+
         # Update to setting file.
         self.update_strategy_setting(strategy_name, setting)
 
@@ -674,8 +1574,17 @@ class CtaEngine(BaseEngine):
 
         self.write_log(_("{}开始执行初始化").format(strategy_name))
 
-        # Call on_init function of strategy
-        self.call_strategy_func(strategy, strategy.on_init)
+        # Restore heavy state from snapshot, so that on_init only replays missed bars
+        self.load_strategy_snapshot(strategy)
+
+        # Call on_init function of strategy, strategy stays uninited if failed
+        success: bool = self.call_strategy_func(strategy, strategy.on_init)
+        strategy.snapshot_datetime = None
+
+        if not success:
+            self.put_strategy_event(strategy)
+            self.write_log(_("{}初始化失败").format(strategy_name))
+            return
 
         # Restore strategy data(variables)
         data: Optional[dict] = self.strategy_data.get(strategy_name, None)
@@ -737,6 +1646,9 @@ class CtaEngine(BaseEngine):
         # Sync strategy variables to data file
         self.sync_strategy_data(strategy)
 
+        # Save strategy state for warm restart
+        self.save_strategy_snapshot(strategy)
+
         # Update GUI
         self.put_strategy_event(strategy)
 
@@ -777,32 +1689,138 @@ class CtaEngine(BaseEngine):
 
         # Remove from strategies
         self.strategies.pop(strategy_name)
+        self.latency_stats.pop(strategy_name, None)
+        self.remove_callback_budget(strategy_name)
+        self.set_tick_policy(strategy_name, TickPolicy.ALL)
+        self.pending_ticks.pop(strategy_name, None)
+        self.unsubscribe_bar(strategy)
+        self.stop_strategy_process(strategy_name)
 
         self.write_log(_("策略{}移除成功").format(strategy.strategy_name))
         return True
 
-    def load_strategy_class(self) -> None:
+    def load_strategy_class(self, reload: bool = False) -> None:
         """
         Load strategy class from source code.
+
+        Source files are scanned statically and imported only when a class
+        is needed. Set reload to True to import and reload all files now.
         """
+        self.class_manifest = load_json(self.class_filename)
+        self.class_modules.clear()
+
         path1: Path = Path(__file__).parent.joinpath("strategies")
-        self.load_strategy_class_from_folder(path1, "vnpy_ctastrategy.strategies")
+        self.load_strategy_class_from_folder(path1, "vnpy_ctastrategy.strategies", reload)
 
         path2: Path = Path.cwd().joinpath("strategies")
-        self.load_strategy_class_from_folder(path2, "strategies")
+        self.load_strategy_class_from_folder(path2, "strategies", reload)
+
+        save_json(self.class_filename, self.class_manifest)
 
-    def load_strategy_class_from_folder(self, path: Path, module_name: str = "") -> None:
+    def load_strategy_class_from_folder(
+        self, path: Path, module_name: str = "", reload: bool = False
+    ) -> None:
         """
         Load strategy class from certain folder.
         """
+        source_classes: Dict[str, list] = {}        # module_name: [(class_name, bases)]
+
         for suffix in ["py", "pyd", "so"]:
             pathname: str = str(path.joinpath(f"*.{suffix}"))
             for filepath in glob(pathname):
                 filename = Path(filepath).stem
                 name: str = f"{module_name}.{filename}"
-                self.load_strategy_class_from_module(name)
 
-    def load_strategy_class_from_module(self, module_name: str) -> None:
+                # Binary modules can only be inspected by importing
+                if suffix != "py" or reload:
+                    self.load_strategy_class_from_module(name)
+                else:
+                    source_classes[name] = self.scan_strategy_file(filepath)
+
+        # Find classes inherited from template directly or via other strategy class
+        bases: set = {"CtaTemplate", "TargetPosTemplate"}
+        bases.update(self.classes.keys())
+        found: bool = True
+
+        while found:
+            found = False
+            for class_list in source_classes.values():
+                for class_name, base_names in class_list:
+                    if class_name not in bases and bases.intersection(base_names):
+                        bases.add(class_name)
+                        found = True
+
+        for name, class_list in source_classes.items():
+            for class_name, base_names in class_list:
+                if (
+                    class_name in bases
+                    and class_name not in self.classes
+                    and class_name not in {"CtaTemplate", "TargetPosTemplate"}
+                ):
+                    self.class_modules[class_name] = name
+
+    def scan_strategy_file(self, filepath: str) -> list:
+        """
+        Get (class_name, base_names) of classes defined in source file.
+
+        Result is cached in manifest file and reused if file is not modified.
+        """
+        stat: os.stat_result = os.stat(filepath)
+
+        cache: Optional[dict] = self.class_manifest.get(filepath, None)
+        if cache and cache["mtime"] == stat.st_mtime and cache["size"] == stat.st_size:
+            return cache["classes"]
+
+        classes: list = []
+        try:
+            with open(filepath, "rb") as f:
+                tree: ast.Module = ast.parse(f.read(), filepath)
+        except Exception:
+            msg: str = _("策略文件{}加载失败，触发异常：\n{}").format(filepath, traceback.format_exc())
+            self.write_log(msg)
+            return classes
+
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+
+            base_names: list = []
+            for base in node.bases:
+                if isinstance(base, ast.Name):
+                    base_names.append(base.id)
+                elif isinstance(base, ast.Attribute):
+                    base_names.append(base.attr)
+
+            classes.append([node.name, base_names])
+
+        self.class_manifest[filepath] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "classes": classes
+        }
+        return classes
+
+    def get_strategy_class(self, class_name: str) -> Optional[Type[CtaTemplate]]:
+        """
+        Get strategy class, import its module if not imported yet.
+        """
+        strategy_class: Optional[Type[CtaTemplate]] = self.classes.get(class_name, None)
+        if strategy_class:
+            return strategy_class
+
+        module_name: Optional[str] = self.class_modules.get(class_name, None)
+        if not module_name:
+            return None
+
+        self.load_strategy_class_from_module(module_name, reload=False)
+
+        # Remove class failed to import, so that it is not listed any more
+        strategy_class = self.classes.get(class_name, None)
+        if not strategy_class:
+            self.class_modules.pop(class_name, None)
+        return strategy_class
+
+    def load_strategy_class_from_module(self, module_name: str, reload: bool = True) -> None:
         """
         Load strategy class from module file.
         """
@@ -810,7 +1828,8 @@ class CtaEngine(BaseEngine):
             module: ModuleType = importlib.import_module(module_name)
 
             # 重载模块，确保如果策略文件中有任何修改，能够立即生效。
-            importlib.reload(module)
+            if reload:
+                importlib.reload(module)
 
             for name in dir(module):
                 value = getattr(module, name)
@@ -820,6 +1839,7 @@ class CtaEngine(BaseEngine):
                     and value not in {CtaTemplate, TargetPosTemplate}
                 ):
                     self.classes[value.__name__] = value
+                    self.class_modules.pop(value.__name__, None)
         except:  # noqa
             msg: str = _("策略文件{}加载失败，触发异常：\n{}").format(module_name, traceback.format_exc())
             self.write_log(msg)
@@ -841,17 +1861,86 @@ class CtaEngine(BaseEngine):
         self.strategy_data[strategy.strategy_name] = data
         save_json(self.data_filename, self.strategy_data)
 
+    def get_snapshot_path(self, strategy_name: str) -> Path:
+        """
+        Get file path of strategy snapshot.
+        """
+        return get_folder_path(self.snapshot_foldername).joinpath(f"{strategy_name}.pkl")
+
+    def save_strategy_snapshot(self, strategy: CtaTemplate) -> None:
+        """
+        Save snapshot of strategy state into file.
+        """
+        try:
+            snapshot: Optional[dict] = strategy.get_snapshot()
+            if not snapshot:
+                return
+
+            data: dict = {
+                "class_name": strategy.__class__.__name__,
+                "vt_symbol": strategy.vt_symbol,
+                "parameters": strategy.get_parameters(),
+                "snapshot": snapshot,
+            }
+
+            path: Path = self.get_snapshot_path(strategy.strategy_name)
+            temp_path: Path = path.with_suffix(".tmp")
+            with open(temp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            temp_path.replace(path)
+        except Exception:
+            msg: str = _("策略快照保存失败，触发异常：\n{}").format(traceback.format_exc())
+            self.write_log(msg, strategy)
+
+    def load_strategy_snapshot(self, strategy: CtaTemplate) -> bool:
+        """
+        Restore strategy state from snapshot file.
+        """
+        path: Path = self.get_snapshot_path(strategy.strategy_name)
+        if not path.exists():
+            return False
+
+        try:
+            with open(path, "rb") as f:
+                data: dict = pickle.load(f)
+
+            if (
+                data["class_name"] != strategy.__class__.__name__
+                or data["vt_symbol"] != strategy.vt_symbol
+                or data["parameters"] != strategy.get_parameters()
+            ):
+                self.write_log(_("策略快照与当前配置不一致，忽略快照"), strategy)
+                return False
+
+            snapshot: dict = data["snapshot"]
+            if not strategy.load_snapshot(snapshot):
+                return False
+        except Exception:
+            msg: str = _("策略快照加载失败，触发异常：\n{}").format(traceback.format_exc())
+            self.write_log(msg, strategy)
+            return False
+
+        strategy.snapshot_datetime = snapshot.get("datetime", None)
+        self.write_log(_("策略快照加载成功，快照时间{}").format(strategy.snapshot_datetime), strategy)
+        return True
+
     def get_all_strategy_class_names(self) -> list:
         """
         Return names of strategy classes loaded.
         """
-        return list(self.classes.keys())
+        names: set = set(self.classes.keys())
+        names.update(self.class_modules.keys())
+        return list(names)
 
-    def get_strategy_class_parameters(self, class_name: str) -> dict:
+    def get_strategy_class_parameters(self, class_name: str) -> Optional[dict]:
         """
         Get default parameters of a strategy class.
         """
-        strategy_class: Type[CtaTemplate] = self.classes[class_name]
+        strategy_class: Optional[Type[CtaTemplate]] = self.get_strategy_class(class_name)
+        if not strategy_class:
+            self.write_log(_("找不到策略类{}").format(class_name))
+            return None
 
         parameters: dict = {}
         for name in strategy_class.parameters:
@@ -897,7 +1986,8 @@ class CtaEngine(BaseEngine):
                 strategy_config["class_name"],
                 strategy_name,
                 strategy_config["vt_symbol"],
-                strategy_config["setting"]
+                strategy_config["setting"],
+                strategy_config.get("process", False)
             )
 
     def update_strategy_setting(self, strategy_name: str, setting: dict) -> None:
@@ -911,6 +2001,9 @@ class CtaEngine(BaseEngine):
             "vt_symbol": strategy.vt_symbol,
             "setting": setting,
         }
+        if strategy_name in self.strategy_processes:
+            self.strategy_setting[strategy_name]["process"] = True
+
         save_json(self.setting_filename, self.strategy_setting)
 
     def remove_strategy_setting(self, strategy_name: str) -> None:
@@ -926,6 +2019,10 @@ class CtaEngine(BaseEngine):
         self.strategy_data.pop(strategy_name, None)
         save_json(self.data_filename, self.strategy_data)
 
+        path: Path = self.get_snapshot_path(strategy_name)
+        if path.exists():
+            path.unlink()
+
     def put_stop_order_event(self, stop_order: StopOrder) -> None:
         """
         Put an event to update stop order status.
@@ -941,17 +2038,31 @@ class CtaEngine(BaseEngine):
         event: Event = Event(EVENT_CTA_STRATEGY, data)
         self.event_engine.put(event)
 
-    def write_log(self, msg: str, strategy: CtaTemplate = None) -> None:
+    def write_log(self, msg: str, strategy: CtaTemplate = None, level: int = INFO) -> None:
         """
         Create cta engine log event.
+
+        Once engine is inited, log is handled by log sink thread, which
+        saves it into file and pushes event only for level INFO or above.
         """
+        if self.log_sink.active:
+            strategy_name: str = strategy.strategy_name if strategy else ""
+            self.log_sink.write(msg, strategy_name, level)
+            return
+
         if strategy:
             msg: str = f"[{strategy.strategy_name}]  {msg}"
 
-        log: LogData = LogData(msg=msg, gateway_name=APP_NAME)
+        log: LogData = LogData(msg=msg, gateway_name=APP_NAME, level=level)
         event: Event = Event(type=EVENT_CTA_LOG, data=log)
         self.event_engine.put(event)
 
+    def set_log_level(self, strategy_name: str, level: int) -> None:
+        """
+        Set minimum log level of a strategy, records below are dropped.
+        """
+        self.log_sink.set_level(strategy_name, level)
+
     def send_email(self, msg: str, strategy: CtaTemplate = None) -> None:
         """
         Send email to default receiver.
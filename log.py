@@ -0,0 +1,210 @@
+"""
+Asynchronous log sink of CtaEngine.
+
+Log records are put into a queue by write_log and handled in batches by a
+background thread, which applies level filter and rate limit, appends them
+into one file per strategy per day, and pushes log events for UI.
+"""
+
+from datetime import date, datetime
+from logging import DEBUG, INFO, getLevelName
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Thread
+from time import monotonic
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.object import LogData
+from vnpy.trader.utility import get_folder_path
+
+from .base import APP_NAME, EVENT_CTA_LOG
+from .locale import _
+
+
+class LogSink:
+    """
+    Batched log pipeline running in its own thread.
+
+    Records at or above file_level are saved into file, and those at or
+    above event_level are also pushed as EVENT_CTA_LOG for UI. Each
+    strategy can push at most rate_limit log events per second on average
+    (with burst of rate_burst), excess ones are only saved into file.
+    """
+
+    def __init__(
+        self,
+        event_engine: EventEngine,
+        folder: Optional[Path] = None,
+        file_level: int = DEBUG,
+        event_level: int = INFO,
+        rate_limit: float = 50,
+        rate_burst: int = 200,
+        flush_interval: float = 0.5
+    ) -> None:
+        """"""
+        self.event_engine: EventEngine = event_engine
+        self.folder: Path = Path(folder) if folder else get_folder_path("cta_strategy_log")
+
+        self.file_level: int = file_level
+        self.event_level: int = event_level
+        self.levels: Dict[str, int] = {}                # strategy_name: level
+
+        self.rate_limit: float = rate_limit
+        self.rate_burst: int = rate_burst
+        self.tokens: Dict[str, Tuple[float, float]] = {}    # name: (tokens, update time)
+        self.dropped: Dict[str, int] = {}                    # name: dropped event count
+
+        self.flush_interval: float = flush_interval
+        self.files: Dict[str, Tuple[date, TextIO]] = {}      # name: (day, file)
+
+        self.queue: Queue = Queue()
+        self.active: bool = False
+        self.thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """"""
+        if self.active:
+            return
+
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Write all queued records and close files.
+        """
+        if not self.active:
+            return
+
+        self.active = False
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def write(self, msg: str, strategy_name: str = "", level: int = INFO) -> None:
+        """
+        Put a log record into queue, called by any thread.
+        """
+        self.queue.put((datetime.now(), level, strategy_name, msg))
+
+    def set_level(self, strategy_name: str, level: int) -> None:
+        """
+        Set minimum log level of a strategy, records below are dropped.
+        """
+        self.levels[strategy_name] = level
+
+    def run(self) -> None:
+        """"""
+        stop: bool = False
+
+        while not stop:
+            try:
+                records: list = [self.queue.get(timeout=self.flush_interval)]
+            except Empty:
+                self.report_dropped()
+                continue
+
+            while True:
+                try:
+                    records.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            if None in records:
+                stop = True
+                records = [r for r in records if r]
+
+            self.process_records(records)
+            self.report_dropped()
+
+        for __, f in self.files.values():
+            f.close()
+        self.files.clear()
+
+    def process_records(self, records: List[tuple]) -> None:
+        """
+        Filter records and write them into files and events.
+        """
+        written: set = set()
+
+        for dt, level, strategy_name, msg in records:
+            if level < self.levels.get(strategy_name, DEBUG):
+                continue
+
+            if level >= self.file_level and self.write_file(strategy_name, dt, level, msg):
+                written.add(strategy_name)
+
+            if level >= self.event_level and self.check_rate(strategy_name, monotonic()):
+                self.put_event(strategy_name, msg, level)
+
+        for name in written:
+            self.files[name][1].flush()
+
+    def check_rate(self, name: str, now: float) -> bool:
+        """
+        Check rate limit with token bucket.
+        """
+        if not self.rate_limit:
+            return True
+
+        tokens, last = self.tokens.get(name, (self.rate_burst, now))
+        tokens = min(self.rate_burst, tokens + (now - last) * self.rate_limit)
+
+        if tokens < 1:
+            self.tokens[name] = (tokens, now)
+            self.dropped[name] = self.dropped.get(name, 0) + 1
+            return False
+
+        self.tokens[name] = (tokens - 1, now)
+        return True
+
+    def report_dropped(self) -> None:
+        """
+        Report count of log events dropped by rate limit.
+        """
+        if not self.dropped:
+            return
+
+        dropped: Dict[str, int] = self.dropped
+        self.dropped = {}
+
+        for name, count in dropped.items():
+            msg: str = _("日志推送过于频繁，{}条日志仅写入文件").format(count)
+            if self.write_file(name, datetime.now(), INFO, msg):
+                self.files[name][1].flush()
+            self.put_event(name, msg, INFO)
+
+    def write_file(self, name: str, dt: datetime, level: int, msg: str) -> bool:
+        """
+        Append record into file of strategy (or engine if name is empty).
+        """
+        day: date = dt.date()
+
+        item: Optional[tuple] = self.files.get(name, None)
+        if not item or item[0] != day:
+            if item:
+                item[1].close()
+                self.files.pop(name)
+
+            filename: str = f"{name or APP_NAME}_{day.strftime('%Y%m%d')}.log"
+            try:
+                f: TextIO = open(self.folder.joinpath(filename), "a", encoding="utf-8")
+            except OSError:
+                return False
+
+            item = (day, f)
+            self.files[name] = item
+
+        item[1].write(f"{dt:%Y-%m-%d %H:%M:%S.%f} {getLevelName(level)} {msg}\n")
+        return True
+
+    def put_event(self, name: str, msg: str, level: int) -> None:
+        """"""
+        if name:
+            msg = f"[{name}]  {msg}"
+
+        log: LogData = LogData(msg=msg, gateway_name=APP_NAME, level=level)
+        event: Event = Event(type=EVENT_CTA_LOG, data=log)
+        self.event_engine.put(event)
@@ -0,0 +1,806 @@
+"""
+Host strategies in worker processes.
+
+Ticks of each vt_symbol are written once by CtaEngine into a TickRing in
+shared memory, and read by all worker processes trading the vt_symbol.
+Other callbacks (on_order, on_trade ...) and requests of strategy
+(send_order, cancel_order, load_bar, write_log ...) are passed as
+messages through a Pipe, so strategy code needs no change.
+"""
+
+import importlib
+import struct
+import sys
+import traceback
+from collections import deque
+from datetime import datetime, time
+from logging import INFO
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from threading import Event as ThreadEvent, Lock, Thread
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from vnpy.event import Event
+from vnpy.trader.constant import Direction, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import BarData, OrderData, TickData, TradeData
+from vnpy.trader.utility import extract_vt_symbol
+
+from .base import EVENT_CTA_PROCESS, EngineType, OrderLeg, StopOrder
+from .recorder import TICK_FIELDS
+from .template import CtaTemplate
+from .utility import BarAggregator
+from .locale import _
+
+if TYPE_CHECKING:
+    from .engine import CtaEngine
+
+
+# Requests executed in reader thread, since they may take a long time
+# and are not related to order bookkeeping of event thread.
+THREAD_REQUESTS: set = {"load_bar", "load_tick", "get_pricetick", "get_size"}
+
+# Strategy methods replaced in main process
+PROXY_METHODS: List[str] = [
+    "on_init",
+    "on_start",
+    "on_stop",
+    "on_tick",
+    "on_bar",
+    "on_order",
+    "on_trade",
+    "on_stop_order",
+    "update_setting",
+    "get_snapshot",
+    "load_snapshot",
+]
+
+# Variables maintained by CtaEngine in main process
+ENGINE_VARIABLES: set = {"inited", "trading", "pos"}
+
+
+def create_strategy_proxy(
+    cta_engine: "CtaEngine",
+    strategy_class: type,
+    strategy_name: str,
+    vt_symbol: str,
+    setting: dict
+) -> CtaTemplate:
+    """
+    Create strategy object of main process for a worker process strategy.
+
+    Only CtaTemplate.__init__ is run, so heavy state built in __init__ of
+    strategy class (indicators, data structures ...) exists in worker
+    process only. Variables are reported back by worker process.
+    """
+    strategy: CtaTemplate = strategy_class.__new__(strategy_class)
+    CtaTemplate.__init__(strategy, cta_engine, strategy_name, vt_symbol, setting)
+
+    # Variables only assigned in __init__ are unknown until worker reports them
+    for name in strategy.variables:
+        if not hasattr(strategy, name):
+            setattr(strategy, name, None)
+
+    return strategy
+
+
+class TickRing:
+    """
+    Single writer ring buffer of tick data in shared memory.
+
+    Header saves total count of ticks written. Readers keep their own
+    position and check after reading that the slot was not overwritten.
+    """
+
+    header: struct.Struct = struct.Struct("<q")
+    record: struct.Struct = struct.Struct("<" + "d" * (len(TICK_FIELDS) + 1))
+    header_size: int = 64
+
+    def __init__(self, size: int = 4096, name: str = "") -> None:
+        """
+        Create a new ring if name is empty, otherwise attach to existing one.
+        """
+        self.size: int = size
+        nbytes: int = self.header_size + self.record.size * size
+
+        if name:
+            self.shm: SharedMemory = attach_shared_memory(name)
+        else:
+            self.shm: SharedMemory = SharedMemory(create=True, size=nbytes)
+            self.header.pack_into(self.shm.buf, 0, 0)
+
+        self.name: str = self.shm.name
+        self.count: int = self.get_count()
+
+    def get_count(self) -> int:
+        """"""
+        return self.header.unpack_from(self.shm.buf, 0)[0]
+
+    def write(self, tick: TickData) -> None:
+        """
+        Write tick into next slot and then publish it.
+        """
+        values: list = [tick.datetime.timestamp()]
+        for name in TICK_FIELDS:
+            values.append(getattr(tick, name) or 0)
+
+        offset: int = self.header_size + (self.count % self.size) * self.record.size
+        self.record.pack_into(self.shm.buf, offset, *values)
+
+        self.count += 1
+        self.header.pack_into(self.shm.buf, 0, self.count)
+
+    def read(self, position: int) -> Optional[tuple]:
+        """
+        Read values of tick at position, return None if overwritten.
+        """
+        offset: int = self.header_size + (position % self.size) * self.record.size
+        values: tuple = self.record.unpack_from(self.shm.buf, offset)
+
+        if self.get_count() - position >= self.size:
+            return None
+        return values
+
+    def close(self) -> None:
+        """"""
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """"""
+        self.shm.unlink()
+
+
+def attach_shared_memory(name: str) -> SharedMemory:
+    """
+    Attach to shared memory created by main process.
+
+    Spawned worker process shares resource tracker with main process, so
+    registering the name again is harmless, while unregistering it would
+    drop the registration of main process.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)
+    return SharedMemory(name)
+
+
+class TickRingReader:
+    """
+    Read new ticks of one vt_symbol from TickRing.
+    """
+
+    def __init__(self, ring: TickRing, vt_symbol: str, gateway_name: str) -> None:
+        """"""
+        self.ring: TickRing = ring
+        self.symbol, self.exchange = extract_vt_symbol(vt_symbol)
+        self.gateway_name: str = gateway_name
+
+        self.position: int = ring.get_count()
+        self.dropped: int = 0
+
+    def skip(self) -> None:
+        """
+        Skip all ticks not read yet.
+        """
+        self.position = self.ring.get_count()
+
+    def read(self) -> List[TickData]:
+        """"""
+        count: int = self.ring.get_count()
+        if count == self.position:
+            return []
+
+        # Reader fell behind and older ticks are overwritten
+        if count - self.position > self.ring.size:
+            self.dropped += count - self.position - self.ring.size
+            self.position = count - self.ring.size
+
+        ticks: List[TickData] = []
+        while self.position < count:
+            values: Optional[tuple] = self.ring.read(self.position)
+            self.position += 1
+
+            if values is None:
+                self.dropped += 1
+                continue
+
+            tick: TickData = TickData(
+                symbol=self.symbol,
+                exchange=self.exchange,
+                datetime=datetime.fromtimestamp(values[0], DB_TZ),
+                gateway_name=self.gateway_name,
+                **dict(zip(TICK_FIELDS, values[1:]))
+            )
+            ticks.append(tick)
+
+        return ticks
+
+
+class StrategyProcess:
+    """
+    Run a strategy in worker process on behalf of CtaEngine.
+
+    Callbacks of the strategy object in main process are replaced, so that
+    CtaEngine can manage it like other strategies, while the real strategy
+    object runs in worker process and reports its variables back.
+    """
+
+    def __init__(self, cta_engine: "CtaEngine", strategy: CtaTemplate, ring: TickRing) -> None:
+        """"""
+        self.cta_engine: "CtaEngine" = cta_engine
+        self.strategy: CtaTemplate = strategy
+        self.ring: TickRing = ring
+
+        self.conn: Optional[Connection] = None
+        self.process = None
+        self.thread: Optional[Thread] = None
+
+        self.lock: Lock = Lock()
+        self.request_count: int = 0
+        self.replies: Dict[int, list] = {}          # request_id: [event, result]
+
+    def start(self) -> None:
+        """
+        Start worker process and replace strategy callbacks.
+        """
+        strategy: CtaTemplate = self.strategy
+
+        contract = self.cta_engine.main_engine.get_contract(strategy.vt_symbol)
+        gateway_name: str = contract.gateway_name if contract else ""
+
+        context = get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+
+        self.process = context.Process(
+            target=run_worker,
+            args=(
+                child_conn,
+                strategy.__class__.__module__,
+                strategy.__class__.__name__,
+                strategy.strategy_name,
+                strategy.vt_symbol,
+                strategy.get_parameters(),
+                self.ring.name,
+                self.ring.size,
+                gateway_name
+            ),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+        for name in PROXY_METHODS:
+            setattr(strategy, name, getattr(self, name))
+
+    def close(self) -> None:
+        """
+        Stop worker process.
+        """
+        if not self.process:
+            return
+
+        try:
+            self.send("exit", ())
+        except OSError:
+            pass
+
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+
+        self.conn.close()
+        self.process = None
+
+    def send(self, *msg) -> None:
+        """"""
+        with self.lock:
+            self.conn.send(msg)
+
+    def call(self, *msg) -> Any:
+        """
+        Send message and wait for reply of worker process.
+        """
+        with self.lock:
+            self.request_count += 1
+            request_id: int = self.request_count
+
+        reply: list = [ThreadEvent(), None]
+        self.replies[request_id] = reply
+        self.send("request", request_id, *msg)
+
+        while not reply[0].wait(1):
+            if not self.process or not self.process.is_alive():
+                break
+
+        self.replies.pop(request_id, None)
+        return reply[1]
+
+    def run(self) -> None:
+        """
+        Receive messages from worker process.
+        """
+        while True:
+            try:
+                msg: tuple = self.conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if msg[0] == "reply":
+                __, request_id, result = msg
+                reply: Optional[list] = self.replies.get(request_id, None)
+                if reply:
+                    reply[1] = result
+                    reply[0].set()
+            elif msg[0] == "request" and msg[2] in THREAD_REQUESTS:
+                self.process_request(*msg[1:])
+            else:
+                event: Event = Event(EVENT_CTA_PROCESS, (self, msg))
+                self.cta_engine.event_engine.put(event)
+
+        # Unblock callers waiting for reply of dead worker process
+        for reply in list(self.replies.values()):
+            reply[0].set()
+
+    def process_message(self, msg: tuple) -> None:
+        """
+        Process message from worker process in event thread.
+        """
+        if msg[0] == "request":
+            self.process_request(*msg[1:])
+            return
+
+        method, args = msg
+        engine: "CtaEngine" = self.cta_engine
+        strategy: CtaTemplate = self.strategy
+
+        if method == "cancel_order":
+            engine.cancel_order(strategy, *args)
+        elif method == "cancel_orders":
+            engine.cancel_orders(strategy, *args)
+        elif method == "cancel_all":
+            engine.cancel_all(strategy)
+        elif method == "write_log":
+            engine.write_log(args[0], strategy, *args[1:])
+        elif method == "send_email":
+            engine.send_email(args[0], strategy)
+        elif method == "put_strategy_event":
+            self.update_variables(args[0])
+            engine.put_strategy_event(strategy)
+        elif method == "sync_strategy_data":
+            self.update_variables(args[0])
+            if strategy.inited:
+                engine.sync_strategy_data(strategy)
+        elif method == "error":
+            strategy.trading = False
+            strategy.inited = False
+            engine.write_log(_("触发异常已停止\n{}").format(args[0]), strategy)
+            engine.put_strategy_event(strategy)
+
+    def process_request(self, request_id: int, method: str, args: tuple) -> None:
+        """"""
+        engine: "CtaEngine" = self.cta_engine
+        strategy: CtaTemplate = self.strategy
+        result: Any = None
+
+        try:
+            if method == "send_order":
+                result = engine.send_order(strategy, *args)
+            elif method == "send_orders":
+                result = engine.send_orders(strategy, *args)
+            elif method == "load_bar":
+                vt_symbol, days, interval, use_database = args
+                result = engine.load_bar(vt_symbol, days, interval, None, use_database)
+            elif method == "load_tick":
+                vt_symbol, days = args
+                result = engine.load_tick(vt_symbol, days, None)
+            elif method == "get_pricetick":
+                result = engine.get_pricetick(strategy)
+            elif method == "get_size":
+                result = engine.get_size(strategy)
+        except Exception:
+            engine.write_log(traceback.format_exc(), strategy)
+
+        try:
+            self.send("reply", request_id, result)
+        except OSError:
+            pass
+
+    def update_variables(self, variables: dict) -> None:
+        """"""
+        for name, value in variables.items():
+            if name not in ENGINE_VARIABLES:
+                setattr(self.strategy, name, value)
+
+    def on_init(self) -> None:
+        """
+        Init strategy in worker process and wait until finished.
+        """
+        data: Optional[dict] = self.cta_engine.strategy_data.get(self.strategy.strategy_name, None)
+        variables: Optional[dict] = self.call("init", (data,))
+
+        # Worker replies None if on_init failed (traceback is reported by error
+        # message), and no reply is received if worker process exited. Raise so
+        # that engine keeps the strategy uninited.
+        if variables is None:
+            raise RuntimeError(_("策略进程初始化失败：{}").format(self.strategy.strategy_name))
+
+        self.update_variables(variables)
+
+    def on_start(self) -> None:
+        """"""
+        self.send("start", ())
+
+    def on_stop(self) -> None:
+        """"""
+        self.send("stop", ())
+
+    def on_tick(self, tick: TickData) -> None:
+        """
+        Tick data is delivered by TickRing.
+        """
+        pass
+
+    def on_bar(self, bar: BarData) -> None:
+        """"""
+        pass
+
+    def on_order(self, order: OrderData) -> None:
+        """"""
+        self.send("order", (order,))
+
+    def on_trade(self, trade: TradeData) -> None:
+        """"""
+        self.send("trade", (trade,))
+
+    def on_stop_order(self, stop_order: StopOrder) -> None:
+        """"""
+        self.send("stop_order", (stop_order,))
+
+    def update_setting(self, setting: dict) -> None:
+        """"""
+        CtaTemplate.update_setting(self.strategy, setting)
+        self.send("setting", (setting,))
+
+    def get_snapshot(self) -> None:
+        """
+        Snapshot is not supported, since strategy state is in worker process.
+        """
+        return None
+
+    def load_snapshot(self, snapshot: dict) -> bool:
+        """"""
+        return False
+
+
+class WorkerEngine:
+    """
+    Engine of strategy running in worker process.
+
+    Provides the CtaEngine functions used by CtaTemplate and forwards
+    them to main process.
+    """
+
+    engine_type: EngineType = EngineType.LIVE
+    poll_interval: float = 0.001
+
+    def __init__(self, conn: Connection, reader: TickRingReader) -> None:
+        """"""
+        self.conn: Connection = conn
+        self.reader: TickRingReader = reader
+        self.strategy: Optional[CtaTemplate] = None
+
+        self.request_count: int = 0
+        self.messages: deque = deque()          # messages received while waiting for reply
+        self.active: bool = False
+
+        self.pricetick: Optional[float] = None
+        self.size: Optional[int] = None
+
+        self.bar_aggregator: Optional[BarAggregator] = None
+        self.bar_subscriptions: Dict[tuple, list] = {}      # (window, interval, daily_end): callbacks
+
+    def notify(self, method: str, *args) -> None:
+        """"""
+        self.conn.send((method, args))
+
+    def request(self, method: str, *args) -> Any:
+        """
+        Send request to main process and wait for reply.
+        """
+        self.request_count += 1
+        request_id: int = self.request_count
+        self.conn.send(("request", request_id, method, args))
+
+        while True:
+            msg: tuple = self.conn.recv()
+            if msg[0] == "reply" and msg[1] == request_id:
+                return msg[2]
+            self.messages.append(msg)
+
+    def run(self) -> None:
+        """
+        Process tick data and messages until exit.
+        """
+        self.active = True
+
+        while self.active:
+            ticks: List[TickData] = self.reader.read()
+            for tick in ticks:
+                self.process_tick(tick)
+
+            if self.reader.dropped:
+                self.write_log(_("策略进程处理过慢，丢弃Tick数量：{}").format(self.reader.dropped))
+                self.reader.dropped = 0
+
+            while self.messages and self.active:
+                self.process_message(self.messages.popleft())
+
+            timeout: float = 0 if ticks else self.poll_interval
+            try:
+                while self.active and self.conn.poll(timeout):
+                    self.process_message(self.conn.recv())
+                    timeout = 0
+            except (EOFError, OSError):
+                break
+
+    def process_tick(self, tick: TickData) -> None:
+        """"""
+        strategy: CtaTemplate = self.strategy
+        if not strategy.inited:
+            return
+
+        if self.bar_aggregator:
+            self.bar_aggregator.update_tick(tick)
+
+        self.call_strategy_func(strategy.on_tick, tick)
+
+    def process_message(self, msg: tuple) -> None:
+        """"""
+        strategy: CtaTemplate = self.strategy
+
+        if msg[0] == "request":
+            __, request_id, method, args = msg
+            result: Optional[dict] = None
+
+            if method == "init":
+                result = self.init_strategy(*args)
+            self.conn.send(("reply", request_id, result))
+            return
+
+        method, args = msg
+
+        if method == "start":
+            self.call_strategy_func(strategy.on_start)
+            strategy.trading = strategy.inited
+            self.put_strategy_event(strategy)
+        elif method == "stop":
+            self.call_strategy_func(strategy.on_stop)
+            strategy.trading = False
+            self.sync_strategy_data(strategy)
+            self.put_strategy_event(strategy)
+        elif method == "order":
+            self.call_strategy_func(strategy.on_order, args[0])
+        elif method == "trade":
+            trade: TradeData = args[0]
+            if trade.direction == Direction.LONG:
+                strategy.pos += trade.volume
+            else:
+                strategy.pos -= trade.volume
+
+            self.call_strategy_func(strategy.on_trade, trade)
+            self.sync_strategy_data(strategy)
+            self.put_strategy_event(strategy)
+        elif method == "stop_order":
+            self.call_strategy_func(strategy.on_stop_order, args[0])
+        elif method == "setting":
+            strategy.update_setting(args[0])
+            self.put_strategy_event(strategy)
+        elif method == "exit":
+            self.active = False
+
+    def init_strategy(self, data: Optional[dict]) -> Optional[dict]:
+        """
+        Init strategy and return its variables, or None if failed.
+        """
+        strategy: CtaTemplate = self.strategy
+
+        if not self.call_strategy_func(strategy.on_init):
+            return None
+
+        if data:
+            for name in strategy.variables:
+                value = data.get(name, None)
+                if value is not None:
+                    setattr(strategy, name, value)
+
+        strategy.inited = True
+        self.reader.skip()
+        return strategy.get_variables()
+
+    def call_strategy_func(self, func: Callable, params: Any = None) -> bool:
+        """
+        Call function of strategy and report any exception raised.
+        """
+        try:
+            if params:
+                func(params)
+            else:
+                func()
+            return True
+        except Exception:
+            self.strategy.trading = False
+            self.strategy.inited = False
+            self.notify("error", traceback.format_exc())
+            return False
+
+    def send_order(
+        self,
+        strategy: CtaTemplate,
+        direction,
+        offset,
+        price: float,
+        volume: float,
+        stop: bool,
+        lock: bool,
+        net: bool
+    ) -> list:
+        """"""
+        vt_orderids: Optional[list] = self.request(
+            "send_order", direction, offset, price, volume, stop, lock, net
+        )
+        return vt_orderids or []
+
+    def cancel_order(self, strategy: CtaTemplate, vt_orderid: str) -> None:
+        """"""
+        self.notify("cancel_order", vt_orderid)
+
+    def send_orders(self, strategy: CtaTemplate, legs: List[OrderLeg]) -> List[list]:
+        """"""
+        results: Optional[List[list]] = self.request("send_orders", legs)
+        return results or [[] for _ in legs]
+
+    def cancel_orders(self, strategy: CtaTemplate, vt_orderids: List[str]) -> None:
+        """"""
+        self.notify("cancel_orders", vt_orderids)
+
+    def cancel_all(self, strategy: CtaTemplate) -> None:
+        """"""
+        self.notify("cancel_all")
+
+    def write_log(self, msg: str, strategy: CtaTemplate = None, level: int = INFO) -> None:
+        """"""
+        self.notify("write_log", msg, level)
+
+    def send_email(self, msg: str, strategy: CtaTemplate = None) -> None:
+        """"""
+        self.notify("send_email", msg)
+
+    def get_engine_type(self) -> EngineType:
+        """"""
+        return self.engine_type
+
+    def get_pricetick(self, strategy: CtaTemplate) -> float:
+        """"""
+        if self.pricetick is None:
+            self.pricetick = self.request("get_pricetick")
+        return self.pricetick
+
+    def get_size(self, strategy: CtaTemplate) -> int:
+        """"""
+        if self.size is None:
+            self.size = self.request("get_size")
+        return self.size
+
+    def load_bar(
+        self,
+        vt_symbol: str,
+        days: int,
+        interval: Interval,
+        callback: Callable[[BarData], None],
+        use_database: bool
+    ) -> List[BarData]:
+        """"""
+        return self.request("load_bar", vt_symbol, days, interval, use_database) or []
+
+    def load_tick(
+        self,
+        vt_symbol: str,
+        days: int,
+        callback: Callable[[TickData], None]
+    ) -> List[TickData]:
+        """"""
+        return self.request("load_tick", vt_symbol, days) or []
+
+    def subscribe_bar(
+        self,
+        strategy: CtaTemplate,
+        callback: Callable[[BarData], None],
+        window: int = 1,
+        interval: Interval = Interval.MINUTE,
+        daily_end: Optional[time] = None
+    ) -> None:
+        """
+        Aggregate bars from tick data read by this worker process.
+        """
+        if not self.bar_aggregator:
+            self.bar_aggregator = BarAggregator(self.process_aggregated_bar)
+
+        # daily_end is only used by daily bar series
+        if interval != Interval.DAILY:
+            daily_end = None
+
+        self.bar_aggregator.add_window(window, interval, daily_end)
+
+        callbacks: list = self.bar_subscriptions.setdefault((window, interval, daily_end), [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def process_aggregated_bar(self, key: tuple, bar: BarData) -> None:
+        """"""
+        for callback in self.bar_subscriptions.get(key, []):
+            self.call_strategy_func(callback, bar)
+
+    def replay_subscribed_bar(self, strategy: CtaTemplate, bars: List[BarData]) -> None:
+        """"""
+        if not self.bar_aggregator:
+            return
+
+        def on_bar(key: tuple, bar: BarData) -> None:
+            for callback in self.bar_subscriptions.get(key, []):
+                callback(bar)
+
+        aggregator: BarAggregator = BarAggregator(on_bar)
+        for key in self.bar_aggregator.window_generators.keys():
+            aggregator.add_window(*key)
+
+        for bar in bars:
+            aggregator.update_bar(bar)
+
+        # Continue bar series from history, only one strategy subscribes here
+        for key in aggregator.window_generators.keys():
+            self.bar_aggregator.copy_window_state(key, aggregator)
+
+    def put_strategy_event(self, strategy: CtaTemplate) -> None:
+        """"""
+        self.notify("put_strategy_event", strategy.get_variables())
+
+    def sync_strategy_data(self, strategy: CtaTemplate) -> None:
+        """"""
+        self.notify("sync_strategy_data", strategy.get_variables())
+
+
+def run_worker(
+    conn: Connection,
+    module_name: str,
+    class_name: str,
+    strategy_name: str,
+    vt_symbol: str,
+    setting: dict,
+    ring_name: str,
+    ring_size: int,
+    gateway_name: str
+) -> None:
+    """
+    Entry function of worker process.
+    """
+    ring: TickRing = TickRing(ring_size, ring_name)
+    reader: TickRingReader = TickRingReader(ring, vt_symbol, gateway_name)
+    engine: WorkerEngine = WorkerEngine(conn, reader)
+
+    try:
+        module = importlib.import_module(module_name)
+        strategy_class: type = getattr(module, class_name)
+        engine.strategy = strategy_class(engine, strategy_name, vt_symbol, setting)
+        engine.run()
+    except Exception:
+        try:
+            engine.notify("error", traceback.format_exc())
+        except OSError:
+            pass
+    finally:
+        ring.close()
+        conn.close()
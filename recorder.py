@@ -0,0 +1,474 @@
+"""
+Compact tick archive recorded by CtaEngine and loaded by BacktestingEngine.
+
+Ticks are saved into one append only file per vt_symbol per day:
+
+    file header:  magic, version, column count, (name, decimals) per column
+    block:        magic, tick count, payload size, crc32 of payload
+    payload:      per column, int64 first value + delta array of count - 1
+
+Float fields are saved as fixed point integers with decimals of the column,
+and each delta array uses the narrowest integer type of the block, so that
+blocks can be decoded from memory map with numpy without parsing rows.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Thread
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import TickData
+from vnpy.trader.utility import get_folder_path
+
+
+FILE_MAGIC: bytes = b"VNTK"
+FILE_VERSION: int = 1
+BLOCK_MAGIC: bytes = b"TBLK"
+FILE_SUFFIX: str = ".tick"
+
+FILE_HEADER: struct.Struct = struct.Struct("<4sHH")
+COLUMN_HEADER: struct.Struct = struct.Struct("<qB")
+BLOCK_HEADER: struct.Struct = struct.Struct("<4sIII")
+
+# Delta arrays are saved with the narrowest of these types
+DELTA_TYPES: List[np.dtype] = [
+    np.dtype("<i1"),
+    np.dtype("<i2"),
+    np.dtype("<i4"),
+    np.dtype("<i8"),
+]
+
+# Column name and decimals, datetime is saved as microseconds since epoch
+PRICE_DECIMALS: int = 8
+VOLUME_DECIMALS: int = 6
+TICK_COLUMNS: List[Tuple[str, int]] = [
+    ("datetime", 0),
+    ("last_price", PRICE_DECIMALS),
+    ("last_volume", VOLUME_DECIMALS),
+    ("volume", VOLUME_DECIMALS),
+    ("turnover", 2),
+    ("open_interest", VOLUME_DECIMALS),
+    ("limit_up", PRICE_DECIMALS),
+    ("limit_down", PRICE_DECIMALS),
+    ("open_price", PRICE_DECIMALS),
+    ("high_price", PRICE_DECIMALS),
+    ("low_price", PRICE_DECIMALS),
+    ("pre_close", PRICE_DECIMALS),
+]
+for _n in range(1, 6):
+    TICK_COLUMNS.extend([
+        (f"bid_price_{_n}", PRICE_DECIMALS),
+        (f"ask_price_{_n}", PRICE_DECIMALS),
+        (f"bid_volume_{_n}", VOLUME_DECIMALS),
+        (f"ask_volume_{_n}", VOLUME_DECIMALS),
+    ])
+
+TICK_FIELDS: List[str] = [name for name, _ in TICK_COLUMNS[1:]]
+
+
+def get_archive_folder() -> Path:
+    """"""
+    return get_folder_path("cta_tick_archive")
+
+
+def get_archive_path(folder: Path, vt_symbol: str, day: date) -> Path:
+    """
+    Get archive file path of vt_symbol and day.
+    """
+    return folder.joinpath(vt_symbol, day.strftime("%Y%m%d") + FILE_SUFFIX)
+
+
+def encode_file_header(columns: List[Tuple[str, int]]) -> bytes:
+    """"""
+    data: bytearray = bytearray(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(columns)))
+    for name, decimals in columns:
+        buf: bytes = name.encode()
+        data += struct.pack("<B", len(buf)) + buf + struct.pack("<B", decimals)
+    return bytes(data)
+
+
+def decode_file_header(buf) -> Tuple[List[Tuple[str, int]], int]:
+    """
+    Decode file header and return columns with header size.
+    """
+    magic, version, count = FILE_HEADER.unpack_from(buf, 0)
+    if magic != FILE_MAGIC or version > FILE_VERSION:
+        raise ValueError(f"unsupported tick archive header: {magic!r} {version}")
+
+    offset: int = FILE_HEADER.size
+    columns: List[Tuple[str, int]] = []
+    for _ in range(count):
+        size: int = buf[offset]
+        name: str = bytes(buf[offset + 1: offset + 1 + size]).decode()
+        decimals: int = buf[offset + 1 + size]
+        columns.append((name, decimals))
+        offset += size + 2
+
+    return columns, offset
+
+
+def encode_block(rows: List[tuple], columns: List[Tuple[str, int]]) -> bytes:
+    """
+    Encode rows of raw values into one block.
+    """
+    scales: np.ndarray = np.array([10 ** d for _, d in columns], dtype=np.float64)
+    values: np.ndarray = np.rint(np.array(rows, dtype=np.float64) * scales).astype(np.int64)
+
+    payload: bytearray = bytearray()
+    for i in range(len(columns)):
+        column: np.ndarray = values[:, i]
+        deltas: np.ndarray = np.diff(column)
+
+        bound: int = int(np.abs(deltas).max()) if len(deltas) else 0
+        for code, dtype in enumerate(DELTA_TYPES):
+            if bound <= np.iinfo(dtype).max:
+                break
+
+        payload += COLUMN_HEADER.pack(int(column[0]), code)
+        payload += deltas.astype(dtype).tobytes()
+
+    header: bytes = BLOCK_HEADER.pack(BLOCK_MAGIC, len(rows), len(payload), zlib.crc32(payload))
+    return header + bytes(payload)
+
+
+def check_block(buf, offset: int) -> int:
+    """
+    Return end offset of the block at offset, or -1 if the block is
+    incomplete or corrupted.
+    """
+    size: int = len(buf)
+    if offset + BLOCK_HEADER.size > size:
+        return -1
+
+    magic, _, payload_size, crc = BLOCK_HEADER.unpack_from(buf, offset)
+    start: int = offset + BLOCK_HEADER.size
+    end: int = start + payload_size
+
+    if magic != BLOCK_MAGIC or end > size or zlib.crc32(buf[start:end]) != crc:
+        return -1
+    return end
+
+
+def decode_blocks(buf, offset: int, column_count: int) -> List[np.ndarray]:
+    """
+    Decode all complete blocks from offset into int64 column arrays.
+
+    Decoding stops at the first incomplete or corrupted block. Such a
+    block is left at the end of file by an interrupted write, and is
+    truncated by repair_tick_file before the recorder appends again.
+    """
+    parts: List[List[np.ndarray]] = [[] for _ in range(column_count)]
+
+    while True:
+        end: int = check_block(buf, offset)
+        if end < 0:
+            break
+
+        count: int = BLOCK_HEADER.unpack_from(buf, offset)[1]
+        pos: int = offset + BLOCK_HEADER.size
+        for i in range(column_count):
+            first, code = COLUMN_HEADER.unpack_from(buf, pos)
+            pos += COLUMN_HEADER.size
+
+            dtype: np.dtype = DELTA_TYPES[code]
+            deltas: np.ndarray = np.frombuffer(buf, dtype, count - 1, pos)
+            pos += dtype.itemsize * (count - 1)
+
+            column: np.ndarray = np.empty(count, dtype=np.int64)
+            column[0] = first
+            np.cumsum(deltas, dtype=np.int64, out=column[1:])
+            column[1:] += first
+            parts[i].append(column)
+
+            del deltas
+
+        offset = end
+
+    return [
+        np.concatenate(p) if p else np.empty(0, dtype=np.int64)
+        for p in parts
+    ]
+
+
+def repair_tick_file(path: Path) -> int:
+    """
+    Truncate archive file to the end of its last complete block, so that
+    blocks appended after an interrupted write stay readable.
+
+    A file with incomplete header is truncated to empty, while a file of
+    unknown format or newer version is kept. Return the number of bytes
+    removed.
+    """
+    with open(path, "r+b") as f:
+        size: int = os.fstat(f.fileno()).st_size
+        if not size:
+            return 0
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            try:
+                _, offset = decode_file_header(buf)
+            except ValueError:
+                return 0        # not written by this version, keep it untouched
+            except (IndexError, struct.error):
+                offset = 0
+
+            if offset > size:
+                offset = 0
+            elif offset:
+                while True:
+                    end: int = check_block(buf, offset)
+                    if end < 0:
+                        break
+                    offset = end
+
+        if offset < size:
+            f.truncate(offset)
+            f.flush()
+            os.fsync(f.fileno())
+
+    return size - offset
+
+
+def read_tick_file(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Read archive file with memory map into column arrays.
+
+    Datetime column is int64 microseconds and others are float64.
+    """
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return {}
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            columns, offset = decode_file_header(buf)
+            arrays: List[np.ndarray] = decode_blocks(buf, offset, len(columns))
+
+    data: Dict[str, np.ndarray] = {}
+    for (name, decimals), array in zip(columns, arrays):
+        if decimals:
+            data[name] = array / (10 ** decimals)
+        else:
+            data[name] = array
+    return data
+
+
+def load_tick_archive(
+    symbol: str,
+    exchange: Exchange,
+    start: datetime,
+    end: datetime,
+    folder: Optional[Path] = None
+) -> List[TickData]:
+    """
+    Load tick data of all archive files between start and end.
+    """
+    if not folder:
+        folder = get_archive_folder()
+
+    vt_symbol: str = f"{symbol}.{exchange.value}"
+    start_us: int = int(convert_tz(start).timestamp() * 1_000_000)
+    end_us: int = int(convert_tz(end).timestamp() * 1_000_000)
+
+    ticks: List[TickData] = []
+    day: date = start.date()
+
+    while day <= end.date():
+        path: Path = get_archive_path(folder, vt_symbol, day)
+        day += timedelta(days=1)
+
+        if not path.exists():
+            continue
+
+        data: Dict[str, np.ndarray] = read_tick_file(path)
+        if not data:
+            continue
+
+        timestamps: np.ndarray = data["datetime"]
+        mask: np.ndarray = (timestamps >= start_us) & (timestamps <= end_us)
+        if not mask.any():
+            continue
+
+        fields: List[str] = [name for name in TICK_FIELDS if name in data]
+        values: List[list] = [data[name][mask].tolist() for name in fields]
+
+        for ts, row in zip(timestamps[mask].tolist(), zip(*values)):
+            tick: TickData = TickData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=datetime.fromtimestamp(ts / 1_000_000, DB_TZ),
+                gateway_name="ARCHIVE",
+                **dict(zip(fields, row))
+            )
+            ticks.append(tick)
+
+    return ticks
+
+
+def convert_tz(dt: datetime) -> datetime:
+    """
+    Treat naive datetime as in database timezone.
+    """
+    if not dt.tzinfo:
+        return dt.replace(tzinfo=DB_TZ)
+    return dt
+
+
+class TickRecorder:
+    """
+    Record tick data into archive files with a background thread.
+
+    Ticks are buffered in memory and encoded into one block per vt_symbol
+    when batch_size is reached or flush_interval seconds passed. Blocks
+    are written by the thread, and each file is synced once per batch.
+    """
+
+    def __init__(
+        self,
+        folder: Optional[Path] = None,
+        batch_size: int = 1000,
+        flush_interval: float = 5
+    ) -> None:
+        """"""
+        if not folder:
+            folder = get_archive_folder()
+        self.folder: Path = Path(folder)
+
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+
+        self.buffers: Dict[Tuple[str, date], List[tuple]] = {}     # (vt_symbol, day): rows
+        self.last_flush: float = monotonic()
+        self.tick_count: int = 0
+        self.block_count: int = 0
+        self.error: str = ""
+        self.warning: str = ""
+
+        self.repaired: set = set()      # files checked for torn block before first append
+
+        self.queue: Queue = Queue()
+        self.active: bool = False
+        self.thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """"""
+        if self.active:
+            return
+
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Flush all buffered ticks and wait until they are written.
+        """
+        if not self.active:
+            return
+
+        self.flush()
+        self.active = False
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def record(self, tick: TickData) -> None:
+        """
+        Add tick into buffer of its vt_symbol and day.
+        """
+        key: tuple = (tick.vt_symbol, tick.datetime.date())
+
+        buffer: Optional[List[tuple]] = self.buffers.get(key, None)
+        if buffer is None:
+            buffer = self.buffers[key] = []
+
+        row: list = [tick.datetime.timestamp() * 1_000_000]
+        for name in TICK_FIELDS:
+            row.append(getattr(tick, name) or 0)
+        buffer.append(row)
+
+        if len(buffer) >= self.batch_size:
+            self.queue.put([(key, self.buffers.pop(key))])
+
+    def check_flush(self) -> None:
+        """
+        Flush buffers if flush interval passed, called by timer.
+        """
+        if monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Hand over all buffered ticks to writer thread.
+        """
+        self.last_flush = monotonic()
+
+        if not self.buffers:
+            return
+
+        buffers: Dict[tuple, List[tuple]] = self.buffers
+        self.buffers = {}
+        self.queue.put(list(buffers.items()))
+
+    def run(self) -> None:
+        """"""
+        while True:
+            batches: list = [self.queue.get()]
+
+            # Drain queue so that each file is synced once per round
+            while True:
+                try:
+                    batches.append(self.queue.get_nowait())
+                except Empty:
+                    break
+
+            stop: bool = None in batches
+            items: list = [item for batch in batches if batch for item in batch]
+            if items:
+                self.write(items)
+
+            if stop:
+                return
+
+    def write(self, items: List[tuple]) -> None:
+        """
+        Encode and append blocks, then sync each file once.
+        """
+        blocks: Dict[Path, List[bytes]] = {}
+
+        for (vt_symbol, day), rows in items:
+            path: Path = get_archive_path(self.folder, vt_symbol, day)
+            blocks.setdefault(path, []).append(encode_block(rows, TICK_COLUMNS))
+            self.tick_count += len(rows)
+
+        for path, data in blocks.items():
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+                if path not in self.repaired:
+                    if path.exists():
+                        removed: int = repair_tick_file(path)
+                        if removed:
+                            self.warning = f"{path}: removed {removed} bytes of incomplete block"
+                    self.repaired.add(path)
+
+                with open(path, "ab") as f:
+                    if not f.tell():
+                        f.write(encode_file_header(TICK_COLUMNS))
+                    for block in data:
+                        f.write(block)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self.block_count += len(data)
+            except OSError as ex:
+                self.error = f"{path}: {ex}"
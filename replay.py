@@ -0,0 +1,554 @@
+"""
+Deterministic replay harness for running CtaEngine without real gateway.
+
+Tick stream (recorded or synthetic) is fed into CtaEngine through a local
+event engine processed synchronously, while a stand-in gateway acknowledges
+orders and fills them against later ticks. In threaded mode a real
+EventEngine is used instead, so that event queue depth and queue wait are
+measured as in live trading.
+"""
+
+from collections import defaultdict
+from copy import copy
+from datetime import datetime, timedelta
+from random import Random
+from threading import Event as ThreadEvent, Lock
+from time import perf_counter, sleep
+from typing import Dict, Iterable, List, Optional, Type
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Direction, Product, Status
+from vnpy.trader.event import EVENT_ORDER, EVENT_TICK, EVENT_TIMER, EVENT_TRADE
+from vnpy.trader.object import (
+    BarData,
+    CancelRequest,
+    ContractData,
+    HistoryRequest,
+    OrderData,
+    OrderRequest,
+    SubscribeRequest,
+    TickData,
+    TradeData
+)
+from vnpy.trader.utility import extract_vt_symbol
+from vnpy.trader.database import DB_TZ
+
+from .base import EVENT_CTA_LOG
+from .engine import CtaEngine
+from .template import CtaTemplate
+
+
+GATEWAY_NAME: str = "REPLAY"
+EVENT_REPLAY_FLUSH: str = "eReplayFlush"
+
+
+class ReplayEventEngine(EventEngine):
+    """
+    Event engine without worker threads, events are processed by calling
+    process_all so that replay result is deterministic.
+    """
+
+    def start(self) -> None:
+        """"""
+        pass
+
+    def stop(self) -> None:
+        """"""
+        pass
+
+    def process_all(self) -> int:
+        """
+        Process all events in queue, return number of events processed.
+        """
+        count: int = 0
+        while not self._queue.empty():
+            event: Event = self._queue.get(block=False)
+            self._process(event)
+            count += 1
+        return count
+
+
+class ReplayGateway:
+    """
+    Stand-in gateway which acknowledges orders immediately and fills limit
+    orders when crossed by following ticks.
+    """
+
+    def __init__(self, event_engine: EventEngine) -> None:
+        """"""
+        self.event_engine: EventEngine = event_engine
+        self.gateway_name: str = GATEWAY_NAME
+
+        self.order_count: int = 0
+        self.trade_count: int = 0
+
+        self.orders: Dict[str, OrderData] = {}
+        self.active_orders: Dict[str, OrderData] = {}
+        self.ticks: Dict[str, TickData] = {}
+
+        # Ticks are matched in feeding thread while orders are sent from event thread
+        self.lock: Lock = Lock()
+
+    def send_order(self, req: OrderRequest) -> str:
+        """"""
+        with self.lock:
+            self.order_count += 1
+
+            order: OrderData = req.create_order_data(str(self.order_count), self.gateway_name)
+            order.status = Status.NOTTRADED
+            order.datetime = self.get_datetime(req.vt_symbol)
+
+            self.orders[order.vt_orderid] = order
+            self.active_orders[order.vt_orderid] = order
+            self.put_order(order)
+
+        return order.vt_orderid
+
+    def cancel_order(self, req: CancelRequest) -> None:
+        """"""
+        vt_orderid: str = f"{self.gateway_name}.{req.orderid}"
+
+        with self.lock:
+            order: Optional[OrderData] = self.active_orders.pop(vt_orderid, None)
+            if not order:
+                return
+
+            order.status = Status.CANCELLED
+            self.put_order(order)
+
+    def update_tick(self, tick: TickData) -> None:
+        """
+        Match active orders with new tick.
+        """
+        with self.lock:
+            self.match_orders(tick)
+
+    def match_orders(self, tick: TickData) -> None:
+        """"""
+        self.ticks[tick.vt_symbol] = tick
+
+        for order in list(self.active_orders.values()):
+            if order.vt_symbol != tick.vt_symbol:
+                continue
+
+            if order.direction == Direction.LONG:
+                market_price: float = tick.ask_price_1 or tick.last_price
+                if order.price < market_price:
+                    continue
+            else:
+                market_price: float = tick.bid_price_1 or tick.last_price
+                if order.price > market_price:
+                    continue
+
+            self.active_orders.pop(order.vt_orderid)
+
+            order.traded = order.volume
+            order.status = Status.ALLTRADED
+            self.put_order(order)
+
+            self.trade_count += 1
+            trade: TradeData = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=str(self.trade_count),
+                direction=order.direction,
+                offset=order.offset,
+                price=market_price,
+                volume=order.volume,
+                datetime=tick.datetime,
+                gateway_name=self.gateway_name
+            )
+            self.event_engine.put(Event(EVENT_TRADE, trade))
+
+    def put_order(self, order: OrderData) -> None:
+        """"""
+        self.event_engine.put(Event(EVENT_ORDER, order))
+
+    def get_datetime(self, vt_symbol: str) -> datetime:
+        """"""
+        tick: Optional[TickData] = self.ticks.get(vt_symbol, None)
+        if tick:
+            return tick.datetime
+        return datetime.now(DB_TZ)
+
+
+class ReplayMainEngine:
+    """
+    Stand-in of MainEngine providing functions used by CtaEngine.
+    """
+
+    def __init__(self, event_engine: EventEngine) -> None:
+        """"""
+        self.event_engine: EventEngine = event_engine
+        self.gateway: ReplayGateway = ReplayGateway(event_engine)
+
+        self.contracts: Dict[str, ContractData] = {}
+        self.history: Dict[tuple, List[BarData]] = defaultdict(list)
+
+    def add_contract(self, contract: ContractData) -> None:
+        """"""
+        self.contracts[contract.vt_symbol] = contract
+
+    def add_history(self, bars: List[BarData]) -> None:
+        """
+        Add bar data returned by query_history.
+        """
+        for bar in bars:
+            self.history[(bar.vt_symbol, bar.interval)].append(bar)
+
+    def get_contract(self, vt_symbol: str) -> Optional[ContractData]:
+        """"""
+        return self.contracts.get(vt_symbol, None)
+
+    def get_gateway(self, gateway_name: str) -> ReplayGateway:
+        """"""
+        return self.gateway
+
+    def get_tick(self, vt_symbol: str) -> Optional[TickData]:
+        """"""
+        return self.gateway.ticks.get(vt_symbol, None)
+
+    def get_order(self, vt_orderid: str) -> Optional[OrderData]:
+        """"""
+        return self.gateway.orders.get(vt_orderid, None)
+
+    def subscribe(self, req: SubscribeRequest, gateway_name: str) -> None:
+        """"""
+        pass
+
+    def convert_order_request(
+        self, req: OrderRequest, gateway_name: str, lock: bool, net: bool = False
+    ) -> List[OrderRequest]:
+        """"""
+        return [req]
+
+    def update_order_request(self, req: OrderRequest, vt_orderid: str, gateway_name: str) -> None:
+        """"""
+        pass
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        """"""
+        return self.gateway.send_order(req)
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str) -> None:
+        """"""
+        self.gateway.cancel_order(req)
+
+    def query_history(self, req: HistoryRequest, gateway_name: str) -> List[BarData]:
+        """"""
+        bars: List[BarData] = self.history.get((req.vt_symbol, req.interval), [])
+        return [bar for bar in bars if req.start <= bar.datetime <= req.end]
+
+    def send_email(self, subject: str, content: str, receiver: str = "") -> None:
+        """"""
+        pass
+
+
+class ReplayCtaEngine(CtaEngine):
+    """
+    CtaEngine which keeps setting, data and snapshot in memory only.
+    """
+
+    def update_strategy_setting(self, strategy_name: str, setting: dict) -> None:
+        """"""
+        strategy: CtaTemplate = self.strategies[strategy_name]
+
+        self.strategy_setting[strategy_name] = {
+            "class_name": strategy.__class__.__name__,
+            "vt_symbol": strategy.vt_symbol,
+            "setting": setting,
+        }
+
+    def remove_strategy_setting(self, strategy_name: str) -> None:
+        """"""
+        self.strategy_setting.pop(strategy_name, None)
+        self.strategy_data.pop(strategy_name, None)
+
+    def sync_strategy_data(self, strategy: CtaTemplate) -> None:
+        """"""
+        data: dict = strategy.get_variables()
+        data.pop("inited")
+        data.pop("trading")
+
+        self.strategy_data[strategy.strategy_name] = data
+
+    def save_strategy_snapshot(self, strategy: CtaTemplate) -> None:
+        """"""
+        pass
+
+    def load_strategy_snapshot(self, strategy: CtaTemplate) -> bool:
+        """"""
+        return False
+
+
+class ReplayHarness:
+    """
+    Drive CtaEngine with tick stream and report live path performance.
+
+    Events are processed synchronously after each tick by default. Set
+    threaded to True to process them in the worker thread of a real
+    EventEngine, where ticks can pile up in the event queue.
+    """
+
+    def __init__(self, output: bool = False, threaded: bool = False) -> None:
+        """"""
+        self.threaded: bool = threaded
+        self.event_count: int = 0
+        self.flushed: ThreadEvent = ThreadEvent()
+
+        if threaded:
+            self.event_engine: EventEngine = EventEngine()
+            self.event_engine.register_general(self.process_general_event)
+        else:
+            self.event_engine = ReplayEventEngine()
+        self.event_engine.register(EVENT_REPLAY_FLUSH, self.process_flush_event)
+
+        self.main_engine: ReplayMainEngine = ReplayMainEngine(self.event_engine)
+
+        self.cta_engine: ReplayCtaEngine = ReplayCtaEngine(self.main_engine, self.event_engine)
+        self.cta_engine.history_cache = False
+        self.cta_engine.register_event()
+        self.cta_engine.enable_latency_monitor(True, 0)
+
+        self.output: bool = output
+        self.logs: List[str] = []
+        self.event_engine.register(EVENT_CTA_LOG, self.process_log_event)
+
+    def process_general_event(self, event: Event) -> None:
+        """"""
+        if event.type != EVENT_REPLAY_FLUSH:
+            self.event_count += 1
+
+    def process_flush_event(self, event: Event) -> None:
+        """"""
+        self.flushed.set()
+
+    def flush(self) -> int:
+        """
+        Wait until all queued events are processed, return number of events
+        processed since last flush.
+        """
+        if not self.threaded:
+            return self.event_engine.process_all()
+
+        self.flushed.clear()
+        self.event_engine.put(Event(EVENT_REPLAY_FLUSH))
+        self.flushed.wait()
+
+        count: int = self.event_count
+        self.event_count = 0
+        return count
+
+    def process_log_event(self, event: Event) -> None:
+        """"""
+        msg: str = event.data.msg
+        self.logs.append(msg)
+
+        if self.output:
+            print(msg)
+
+    def add_contract(
+        self,
+        vt_symbol: str,
+        size: float = 1,
+        pricetick: float = 1,
+        min_volume: float = 1
+    ) -> None:
+        """"""
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+
+        contract: ContractData = ContractData(
+            symbol=symbol,
+            exchange=exchange,
+            name=symbol,
+            product=Product.FUTURES,
+            size=size,
+            pricetick=pricetick,
+            min_volume=min_volume,
+            history_data=True,
+            gateway_name=GATEWAY_NAME
+        )
+        self.main_engine.add_contract(contract)
+
+    def add_history(self, bars: List[BarData]) -> None:
+        """
+        Add history bar data used by load_bar of strategies.
+        """
+        self.main_engine.add_history(bars)
+
+    def add_strategy(
+        self,
+        strategy_class: Type[CtaTemplate],
+        strategy_name: str,
+        vt_symbol: str,
+        setting: dict,
+        process: bool = False
+    ) -> None:
+        """
+        Add strategy, set process to True to run it in a worker process.
+        """
+        if not self.main_engine.get_contract(vt_symbol):
+            self.add_contract(vt_symbol)
+
+        self.cta_engine.classes[strategy_class.__name__] = strategy_class
+        self.cta_engine.add_strategy(strategy_class.__name__, strategy_name, vt_symbol, setting, process)
+
+    def run(
+        self,
+        ticks: Iterable[TickData],
+        realtime: bool = False,
+        speed: float = 1
+    ) -> dict:
+        """
+        Replay ticks through CtaEngine and return performance statistics.
+
+        Ticks are fed at full speed by default, set realtime to True to pace
+        them by tick datetime (divided by speed). Event queue depth is sampled
+        after each tick is put.
+        """
+        self.event_engine.start()
+
+        for strategy_name in list(self.cta_engine.strategies.keys()):
+            self.cta_engine._init_strategy(strategy_name)
+        self.cta_engine.start_all_strategies()
+        self.flush()
+
+        self.cta_engine.reset_latency_stats()
+
+        tick_count: int = 0
+        event_count: int = 0
+        depth_max: int = 0
+        depth_total: int = 0
+        first_dt: Optional[datetime] = None
+        last_second: Optional[datetime] = None
+
+        start: float = perf_counter()
+
+        for tick in ticks:
+            if realtime:
+                if first_dt is None:
+                    first_dt = tick.datetime
+                target: float = (tick.datetime - first_dt).total_seconds() / speed
+                wait: float = target - (perf_counter() - start)
+                if wait > 0:
+                    sleep(wait)
+
+            # Timer event driven by tick time so that result is deterministic,
+            # real event engine generates timer event by itself
+            second: datetime = tick.datetime.replace(microsecond=0)
+            if last_second and second > last_second and not self.threaded:
+                self.event_engine.put(Event(EVENT_TIMER))
+            last_second = second
+
+            # Copy before stamping localtime, ticks passed in are not modified
+            tick = copy(tick)
+            self.main_engine.gateway.update_tick(tick)
+
+            tick.localtime = datetime.now()
+            self.event_engine.put(Event(EVENT_TICK, tick))
+
+            depth: int = self.event_engine._queue.qsize()
+            depth_max = max(depth_max, depth)
+            depth_total += depth
+
+            if not self.threaded:
+                event_count += self.flush()
+            tick_count += 1
+
+        # All ticks fed should also be processed in threaded mode
+        if self.threaded:
+            event_count += self.flush()
+
+        elapsed: float = perf_counter() - start
+
+        self.cta_engine.stop_all_strategies()
+        self.flush()
+        self.event_engine.stop()
+
+        gateway: ReplayGateway = self.main_engine.gateway
+        latency: dict = self.cta_engine.get_latency_stats()
+
+        return {
+            "ticks": tick_count,
+            "events": event_count,
+            "elapsed": elapsed,
+            "throughput": tick_count / elapsed if elapsed else 0,
+            "queue_depth_max": depth_max,
+            "queue_depth_mean": depth_total / tick_count if tick_count else 0,
+            "queue_wait": latency["queue_wait"],
+            "orders": gateway.order_count,
+            "trades": gateway.trade_count,
+            "latency": latency,
+            "pos": {
+                name: strategy.pos
+                for name, strategy in self.cta_engine.strategies.items()
+            },
+        }
+
+
+def generate_ticks(
+    vt_symbol: str,
+    start: datetime,
+    count: int,
+    interval: timedelta = timedelta(milliseconds=500),
+    price: float = 4000,
+    pricetick: float = 1,
+    seed: int = 0
+) -> List[TickData]:
+    """
+    Generate synthetic tick stream of random walk price.
+    """
+    symbol, exchange = extract_vt_symbol(vt_symbol)
+    random: Random = Random(seed)
+
+    ticks: List[TickData] = []
+    dt: datetime = start
+
+    for _ in range(count):
+        price += random.choice((-1, 0, 0, 1)) * pricetick
+
+        tick: TickData = TickData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt,
+            last_price=price,
+            volume=random.randint(1, 100),
+            bid_price_1=price - pricetick,
+            ask_price_1=price + pricetick,
+            bid_volume_1=random.randint(1, 100),
+            ask_volume_1=random.randint(1, 100),
+            bid_price_5=price - pricetick * 5,
+            ask_price_5=price + pricetick * 5,
+            gateway_name=GATEWAY_NAME
+        )
+        ticks.append(tick)
+
+        dt += interval
+
+    return ticks
+
+
+def run_replay(
+    strategy_class: Type[CtaTemplate],
+    setting: dict,
+    ticks: Iterable[TickData],
+    vt_symbol: str = "",
+    strategy_count: int = 1,
+    realtime: bool = False,
+    speed: float = 1,
+    threaded: bool = False
+) -> dict:
+    """
+    Run a strategy class (with multiple instances) through replay harness.
+    """
+    harness: ReplayHarness = ReplayHarness(threaded=threaded)
+
+    ticks = list(ticks)
+    if not vt_symbol and ticks:
+        vt_symbol = ticks[0].vt_symbol
+
+    for i in range(strategy_count):
+        harness.add_strategy(strategy_class, f"{strategy_class.__name__}_{i}", vt_symbol, setting)
+
+    return harness.run(ticks, realtime, speed)
@@ -1,6 +1,7 @@
 # chan_strategy.py
 
-import os
+import io
+
 from vnpy_ctastrategy import (
     CtaTemplate,
     StopOrder,
@@ -17,6 +18,7 @@ from vnpy_ctastrategy.chan.Chan import CChan  # 更新导入路径
 from vnpy_ctastrategy.chan.ChanConfig import CChanConfig
 from vnpy_ctastrategy.chan.KLine.KLine_Unit import CKLine_Unit
 from vnpy_ctastrategy.chan.Common.CTime import CTime
+from vnpy_ctastrategy.chan.Common.checkpoint import load_chan_checkpoint, save_chan_checkpoint
 from vnpy_ctastrategy.chan.DataAPI.vnpyAPI import C_VnpyDataApi
 from vnpy_ctastrategy.chan.Common.CEnum import (
     AUTYPE,
@@ -25,7 +27,7 @@ from vnpy_ctastrategy.chan.Common.CEnum import (
     KL_TYPE,
     DATA_FIELD,
 )
-from datetime import datetime
+from logging import DEBUG
 
 class ChanStrategy(CtaTemplate):
     """
@@ -54,6 +56,7 @@ class ChanStrategy(CtaTemplate):
         self.short_entry_price = 0
         self.long_stoploss_price = 0
         self.short_stoploss_price = 0
+        self.last_bar_datetime = None  # 最后一根已喂入CChan的K线时间
 
         # 初始化 CChan 对象
         config = CChanConfig(
@@ -81,18 +84,42 @@ class ChanStrategy(CtaTemplate):
 
         # 初始化数据源
         C_VnpyDataApi.do_init()
-        # 定义日志文件路径
-        self.log_path = os.path.join(os.path.expanduser('~'), 'Desktop', 'logs', f'{strategy_name}_{datetime.now().strftime("%Y%m%d%H%M%S")}.log')
 
     def write_log_to_file(self, message):
-        """将日志写入文件"""
-        with open(self.log_path, 'a') as f:
-            f.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
+        """写入DEBUG级别日志，由引擎日志线程批量写入策略日志文件"""
+        self.write_log(message, DEBUG)
+
+    def get_snapshot(self):
+        """保存CChan检查点，重启时只需补喂快照之后的K线"""
+        if not self.last_bar_datetime:
+            return None
+
+        # 检查点按列保存K线，链式对象以引用保存，pickle 时不会沿 pre/next 递归
+        buf = io.BytesIO()
+        save_chan_checkpoint(self.chan, buf)
+
+        return {
+            "datetime": self.last_bar_datetime,
+            "chan": buf.getvalue(),
+            "last_b1_price": self.last_b1_price,
+            "last_s1_price": self.last_s1_price,
+        }
+
+    def load_snapshot(self, snapshot):
+        """从快照中的CChan检查点恢复"""
+        if not isinstance(snapshot["chan"], bytes):
+            return False  # 直接 pickle CChan 的旧快照，忽略后重新加载K线
+
+        self.chan = load_chan_checkpoint(snapshot["chan"])
+        self.last_b1_price = snapshot["last_b1_price"]
+        self.last_s1_price = snapshot["last_s1_price"]
+        self.last_bar_datetime = snapshot["datetime"]
+        return True
 
     def on_init(self):
         """策略初始化"""
         self.write_log("策略初始化")
-        self.load_bar(20)  # 加载20根K线
+        self.load_bar(20)  # 加载20根K线，从快照恢复时只补喂快照之后的K线
         # 加载历史数据
         # for klu in self.chan.load():
         #     self.write_log(f"加载K线: {klu}")
@@ -117,7 +144,8 @@ class ChanStrategy(CtaTemplate):
         # 将新的K线数据喂给CChan进行处理
         klu = self.convert_bar_to_klu(bar)
         self.chan.trigger_load({self.k_type: [klu]})
-        self.write_log(f"喂入新K线: {klu}")
+        self.last_bar_datetime = bar.datetime
+        self.write_log(f"喂入新K线: {klu}", DEBUG)
 
         # 获取买卖点列表
         bsp_list = self.chan.get_bsp()
@@ -238,7 +266,7 @@ class ChanStrategy(CtaTemplate):
         """
         kl_dict = {
             DATA_FIELD.FIELD_TIMESTAMP: bar.datetime.timestamp(),
-            DATA_FIELD.FIELD_TIME: bar.datetime,
+            DATA_FIELD.FIELD_TIME: CTime.from_datetime(bar.datetime),
             DATA_FIELD.FIELD_OPEN: float(bar.open_price),
             DATA_FIELD.FIELD_CLOSE: float(bar.close_price),
             DATA_FIELD.FIELD_HIGH: float(bar.high_price),
@@ -1,12 +1,14 @@
 from abc import ABC
 from copy import copy
-from typing import Any, Callable, List
+from datetime import datetime, time, timedelta
+from logging import INFO
+from typing import Any, Callable, List, Optional
 
 from vnpy.trader.constant import Interval, Direction, Offset
 from vnpy.trader.object import BarData, TickData, OrderData, TradeData
 from vnpy.trader.utility import virtual
 
-from .base import StopOrder, EngineType
+from .base import StopOrder, EngineType, OrderLeg
 
 
 class CtaTemplate(ABC):
@@ -32,6 +34,10 @@ class CtaTemplate(ABC):
         self.trading: bool = False
         self.pos: int = 0
 
+        # Set by engine when state restored from snapshot, only bars after
+        # it are replayed by load_bar.
+        self.snapshot_datetime: Optional[datetime] = None
+
         # Copy a new variables list here to avoid duplicate insert when multiple
         # strategy instances are created with the same strategy class.
         self.variables = copy(self.variables)
@@ -91,6 +97,23 @@ class CtaTemplate(ABC):
         }
         return strategy_data
 
+    @virtual
+    def get_snapshot(self) -> Optional[dict]:
+        """
+        Return heavy strategy state (e.g. ArrayManager) for warm restart.
+
+        The dict must contain "datetime" of the last bar processed, bars after
+        it will be replayed on next init. Return None to disable snapshot.
+        """
+        return None
+
+    @virtual
+    def load_snapshot(self, snapshot: dict) -> bool:
+        """
+        Restore strategy state from snapshot, return True if restored.
+        """
+        return False
+
     @virtual
     def on_init(self) -> None:
         """
@@ -266,11 +289,29 @@ class CtaTemplate(ABC):
         if self.trading:
             self.cta_engine.cancel_all(self)
 
-    def write_log(self, msg: str) -> None:
+    def send_orders(self, legs: List[OrderLeg]) -> List[list]:
+        """
+        Send a batch of orders, return vt_orderids of each leg in the same order.
+        """
+        if self.trading:
+            return self.cta_engine.send_orders(self, legs)
+        else:
+            return [[] for _ in legs]
+
+    def cancel_orders(self, vt_orderids: List[str]) -> None:
+        """
+        Cancel a batch of orders.
+        """
+        if self.trading:
+            self.cta_engine.cancel_orders(self, vt_orderids)
+
+    def write_log(self, msg: str, level: int = INFO) -> None:
         """
         Write a log message.
+
+        Messages below INFO level (e.g. DEBUG) are saved into log file only.
         """
-        self.cta_engine.write_log(msg, self)
+        self.cta_engine.write_log(msg, self, level)
 
     def get_engine_type(self) -> EngineType:
         """
@@ -290,6 +331,16 @@ class CtaTemplate(ABC):
         """
         return self.cta_engine.get_size(self)
 
+    def get_load_days(self, days: int) -> int:
+        """
+        Extend history load days to cover all bars after snapshot datetime.
+        """
+        if not self.snapshot_datetime:
+            return days
+
+        missed: timedelta = datetime.now(self.snapshot_datetime.tzinfo) - self.snapshot_datetime
+        return max(days, missed.days + 1)
+
     def load_bar(
         self,
         days: int,
@@ -305,15 +356,51 @@ class CtaTemplate(ABC):
 
         bars: List[BarData] = self.cta_engine.load_bar(
             self.vt_symbol,
-            days,
+            self.get_load_days(days),
             interval,
             callback,
             use_database
         )
 
+        if self.snapshot_datetime:
+            bars = [bar for bar in bars if bar.datetime > self.snapshot_datetime]
+
         for bar in bars:
             callback(bar)
 
+    def subscribe_bar(
+        self,
+        callback: Callable[[BarData], None],
+        window: int = 1,
+        interval: Interval = Interval.MINUTE,
+        daily_end: Optional[time] = None
+    ) -> None:
+        """
+        Subscribe bar series aggregated by engine from tick data.
+
+        Works like BarGenerator(on_bar, window, callback, interval), but the
+        bar series is shared by all strategies trading the same vt_symbol.
+        BarData pushed to callback is shared and should not be modified.
+        """
+        self.cta_engine.subscribe_bar(self, callback, window, interval, daily_end)
+
+    def load_subscribed_bar(self, days: int, use_database: bool = False) -> None:
+        """
+        Load historical 1 minute bar data into subscribed bar series.
+        """
+        bars: List[BarData] = self.cta_engine.load_bar(
+            self.vt_symbol,
+            self.get_load_days(days),
+            Interval.MINUTE,
+            None,
+            use_database
+        )
+
+        if self.snapshot_datetime:
+            bars = [bar for bar in bars if bar.datetime > self.snapshot_datetime]
+
+        self.cta_engine.replay_subscribed_bar(self, bars)
+
     def load_tick(self, days: int) -> None:
         """
         Load historical tick data for initializing strategy.
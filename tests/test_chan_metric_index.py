@@ -0,0 +1,80 @@
+import copy
+import sys
+from datetime import datetime, timedelta
+from random import Random
+from typing import List
+
+import pytest
+
+from vnpy_ctastrategy.chan.Chan import CChan
+from vnpy_ctastrategy.chan.ChanConfig import CChanConfig
+from vnpy_ctastrategy.chan.Common.CEnum import DATA_FIELD, KL_TYPE
+from vnpy_ctastrategy.chan.KLine.KLine_Unit import CKLine_Unit
+
+
+def make_chan(count: int) -> CChan:
+    """Step CChan fed with random walk 1 minute bars, RSI not calculated."""
+    chan: CChan = CChan(
+        code="rb2405",
+        begin_time=None,
+        end_time=None,
+        data_src="custom:vnpyAPI.C_VnpyDataApi",
+        lv_list=[KL_TYPE.K_1M],
+        config=CChanConfig({"trigger_step": True, "print_warning": False}),
+    )
+
+    random: Random = Random(0)
+    price: float = 3500
+    start: datetime = datetime(2024, 3, 1, 9, 0)
+    for i in range(count):
+        close: float = price + random.gauss(0, 3)
+        klu: CKLine_Unit = CKLine_Unit({
+            DATA_FIELD.FIELD_TIME: start + timedelta(minutes=i),
+            DATA_FIELD.FIELD_OPEN: price,
+            DATA_FIELD.FIELD_HIGH: max(price, close) + 1,
+            DATA_FIELD.FIELD_LOW: min(price, close) - 1,
+            DATA_FIELD.FIELD_CLOSE: close,
+            DATA_FIELD.FIELD_VOLUME: 10.0,
+        })
+        chan.trigger_load({KL_TYPE.K_1M: [klu]})
+        price = close
+    return chan
+
+
+def get_metrics(chan: CChan) -> List[tuple]:
+    """"""
+    return [
+        (bi.Cal_MACD_area(), bi.Cal_MACD_peak(), bi.Cal_MACD_diff(), bi.Cal_MACD_half(True), bi.Cal_MACD_half(False))
+        for bi in chan[0].bi_list
+    ]
+
+
+def test_failed_feature_keeps_index() -> None:
+    chan: CChan = make_chan(1000)
+    bi_list = chan[0].bi_list
+    assert len(bi_list) > 10
+
+    with pytest.raises(AttributeError):
+        bi_list[len(bi_list) // 2].Cal_Rsi()
+
+    assert get_metrics(chan) == get_metrics(make_chan(1000))
+
+    with pytest.raises(AttributeError):
+        bi_list[-1].Cal_Rsi()
+    assert bi_list[-1].Cal_MACD_trade_metric(DATA_FIELD.FIELD_VOLUME) > 0
+
+
+def test_deepcopy_chan() -> None:
+    chan: CChan = make_chan(8000)
+
+    # Copying must not recurse along the pre/next links of klus, bis and segs
+    limit: int = sys.getrecursionlimit()
+    sys.setrecursionlimit(200)
+    try:
+        new_chan: CChan = copy.deepcopy(chan)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert get_metrics(new_chan) == get_metrics(chan)
+    assert all(bi.metric_index is new_chan[0].bi_list.metric_index for bi in new_chan[0].bi_list)
+    assert new_chan[0].lst[-1].lst[-1] is not chan[0].lst[-1].lst[-1]
@@ -0,0 +1,56 @@
+import pickle
+
+from vnpy_ctastrategy.chan.Common.CEnum import DATA_FIELD
+from vnpy_ctastrategy.chan.Common.CTime import CTime
+from vnpy_ctastrategy.chan.KLine.KLine_Unit import CKLine_Unit
+from vnpy_ctastrategy.chan.KLine.TradeInfo import CTradeInfo
+from vnpy_ctastrategy.chan.Math.MACD import CMACD_item
+
+
+def make_klu() -> CKLine_Unit:
+    """"""
+    return CKLine_Unit({
+        DATA_FIELD.FIELD_TIME: CTime(2024, 3, 1, 9, 30),
+        DATA_FIELD.FIELD_OPEN: 10.0,
+        DATA_FIELD.FIELD_HIGH: 12.0,
+        DATA_FIELD.FIELD_LOW: 9.0,
+        DATA_FIELD.FIELD_CLOSE: 11.0,
+        DATA_FIELD.FIELD_VOLUME: 100.0,
+    })
+
+
+def test_pickle_round_trip() -> None:
+    klu: CKLine_Unit = make_klu()
+    klu.macd = CMACD_item(1.0, 2.0, 3.0, 1.5)
+
+    loaded: CKLine_Unit = pickle.loads(pickle.dumps(klu))
+    assert loaded.time.epoch == klu.time.epoch
+    assert loaded.trade_info.metric == klu.trade_info.metric
+    assert loaded.macd.macd == klu.macd.macd
+    assert loaded.idx == -1
+
+
+def test_restore_dict_state() -> None:
+    # State saved before CKLine_Unit and CTradeInfo used __slots__
+    trade_info: CTradeInfo = CTradeInfo.__new__(CTradeInfo)
+    trade_info.__setstate__({"metric": {DATA_FIELD.FIELD_VOLUME: 100.0}})
+    assert trade_info.metric[DATA_FIELD.FIELD_VOLUME] == 100.0
+
+    macd: CMACD_item = CMACD_item.__new__(CMACD_item)
+    macd.__setstate__({"fast_ema": 1.0, "slow_ema": 2.0, "DIF": 3.0, "DEA": 1.5, "macd": 3.0})
+
+    # Old __dict__ had the same keys as the slots, including mangled private names
+    state: dict = dict(make_klu().__reduce_ex__(2)[2][1])
+    state.update({
+        "trade_info": trade_info,
+        "macd": macd,
+        "_CKLine_Unit__klc": None,
+        "_CKLine_Unit__idx": 7,
+    })
+
+    klu: CKLine_Unit = CKLine_Unit.__new__(CKLine_Unit)
+    klu.__setstate__(state)
+    assert klu.idx == 7
+    assert klu.high == 12.0
+    assert klu.trade_info.metric[DATA_FIELD.FIELD_VOLUME] == 100.0
+    assert klu.macd.DIF == 3.0
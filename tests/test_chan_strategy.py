@@ -0,0 +1,80 @@
+import pickle
+import sys
+from datetime import datetime, timedelta
+from random import Random
+from typing import List
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+from vnpy_ctastrategy.strategies.chan_strategy import ChanStrategy
+
+
+class DummyEngine:
+    """Accept the engine calls made by ChanStrategy.on_bar."""
+
+    def write_log(self, msg: str, strategy: ChanStrategy = None, level: int = 0) -> None:
+        """"""
+        pass
+
+    def cancel_all(self, strategy: ChanStrategy) -> None:
+        """"""
+        pass
+
+    def send_order(self, strategy: ChanStrategy, *args) -> list:
+        """"""
+        return []
+
+
+def make_bars(count: int) -> List[BarData]:
+    """"""
+    random: Random = Random(0)
+    price: float = 3500
+    bars: List[BarData] = []
+    for i in range(count):
+        close: float = price + random.gauss(0, 3)
+        bar: BarData = BarData(
+            symbol="rb2405",
+            exchange=Exchange.SHFE,
+            datetime=datetime(2024, 3, 1, 9, 0) + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            gateway_name="TEST",
+            open_price=price,
+            high_price=max(price, close) + 1,
+            low_price=min(price, close) - 1,
+            close_price=close,
+            volume=10,
+        )
+        bars.append(bar)
+        price = close
+    return bars
+
+
+def get_bsp(strategy: ChanStrategy) -> List[tuple]:
+    """"""
+    return [(str(bsp.klu.time), bsp.type2str()) for bsp in strategy.chan.get_bsp()]
+
+
+def test_snapshot_round_trip() -> None:
+    bars: List[BarData] = make_bars(5_000)
+    strategy: ChanStrategy = ChanStrategy(DummyEngine(), "chan", "rb2405.SHFE", {})
+    for bar in bars[:4_000]:
+        strategy.on_bar(bar)
+
+    # Snapshot is pickled by CtaEngine without raising the recursion limit
+    limit: int = sys.getrecursionlimit()
+    sys.setrecursionlimit(200)
+    try:
+        data: bytes = pickle.dumps(strategy.get_snapshot())
+        snapshot: dict = pickle.loads(data)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    restored: ChanStrategy = ChanStrategy(DummyEngine(), "chan", "rb2405.SHFE", {})
+    assert restored.load_snapshot(snapshot)
+    assert restored.last_bar_datetime == bars[3_999].datetime
+
+    for bar in bars[4_000:]:
+        strategy.on_bar(bar)
+        restored.on_bar(bar)
+    assert get_bsp(restored) == get_bsp(strategy)
@@ -0,0 +1,79 @@
+from datetime import datetime
+from time import perf_counter, sleep
+from typing import List
+
+from vnpy.event import Event
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import OrderData, TickData
+
+from vnpy_ctastrategy import CtaTemplate
+from vnpy_ctastrategy.replay import ReplayGateway, ReplayHarness, generate_ticks
+
+
+VT_SYMBOL: str = "rb2405.SHFE"
+START: datetime = datetime(2024, 3, 1, 9, 0, tzinfo=DB_TZ)
+TIMEOUT: float = 30
+
+
+class WorkerStrategy(CtaTemplate):
+    """Buy one lot on first tick, state of __init__ exists in worker only."""
+
+    variables = ["tick_count"]
+
+    def __init__(self, cta_engine, strategy_name, vt_symbol, setting) -> None:
+        """"""
+        super().__init__(cta_engine, strategy_name, vt_symbol, setting)
+
+        self.tick_count: int = 0
+        self.history: list = []
+
+    def on_tick(self, tick: TickData) -> None:
+        """"""
+        self.tick_count += 1
+        if self.tick_count == 1:
+            self.buy(tick.ask_price_1, 1)
+        self.put_event()
+
+
+def test_process_round_trip() -> None:
+    harness: ReplayHarness = ReplayHarness()
+    harness.add_strategy(WorkerStrategy, "worker", VT_SYMBOL, {}, process=True)
+
+    engine = harness.cta_engine
+    strategy: WorkerStrategy = engine.strategies["worker"]
+    gateway: ReplayGateway = harness.main_engine.gateway
+
+    # Main process keeps a proxy, __init__ of strategy class runs in worker
+    assert not hasattr(strategy, "history")
+    assert strategy.tick_count is None
+
+    try:
+        engine._init_strategy("worker")
+        engine.start_strategy("worker")
+        harness.flush()
+        assert strategy.inited and strategy.trading
+
+        ticks: List[TickData] = generate_ticks(VT_SYMBOL, START, 1_000)
+        start: float = perf_counter()
+        for tick in ticks:
+            gateway.update_tick(tick)
+            harness.event_engine.put(Event(EVENT_TICK, tick))
+            harness.flush()
+
+            if gateway.orders or perf_counter() - start > TIMEOUT:
+                break
+            sleep(0.01)
+
+        orders: List[OrderData] = list(gateway.orders.values())
+        assert len(orders) == 1
+        assert orders[0].vt_symbol == VT_SYMBOL
+        assert orders[0].volume == 1
+
+        # Variables reported back by worker process
+        while not strategy.tick_count and perf_counter() - start < TIMEOUT:
+            harness.flush()
+            sleep(0.01)
+        assert strategy.tick_count >= 1
+    finally:
+        engine.stop_strategy_process("worker")
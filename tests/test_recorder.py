@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from vnpy.trader.constant import Exchange
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import TickData
+
+from vnpy_ctastrategy.recorder import TickRecorder, get_archive_path, load_tick_archive
+
+
+START: datetime = datetime(2024, 3, 1, 9, 0, tzinfo=DB_TZ)
+
+
+def make_ticks(begin: int, count: int) -> List[TickData]:
+    """"""
+    ticks: List[TickData] = []
+    for i in range(begin, begin + count):
+        tick: TickData = TickData(
+            symbol="rb2405",
+            exchange=Exchange.SHFE,
+            datetime=START + timedelta(seconds=i),
+            gateway_name="TEST",
+            last_price=3500 + i % 7,
+            volume=100 + i,
+            bid_price_1=3499 + i % 7,
+            ask_price_1=3501 + i % 7,
+        )
+        ticks.append(tick)
+    return ticks
+
+
+def record(folder: Path, ticks: List[TickData]) -> TickRecorder:
+    """Record ticks as one block, writing synchronously."""
+    recorder: TickRecorder = TickRecorder(folder)
+    for tick in ticks:
+        recorder.record(tick)
+
+    items: list = list(recorder.buffers.items())
+    recorder.buffers.clear()
+    recorder.write(items)
+    return recorder
+
+
+def load(folder: Path) -> List[TickData]:
+    """"""
+    return load_tick_archive("rb2405", Exchange.SHFE, START, START + timedelta(days=1), folder)
+
+
+def test_record_and_load(tmp_path: Path) -> None:
+    ticks: List[TickData] = make_ticks(0, 50)
+    record(tmp_path, ticks[:20])
+    record(tmp_path, ticks[20:])
+
+    loaded: List[TickData] = load(tmp_path)
+    assert [t.datetime for t in loaded] == [t.datetime for t in ticks]
+    assert [t.last_price for t in loaded] == [t.last_price for t in ticks]
+    assert [t.volume for t in loaded] == [t.volume for t in ticks]
+
+
+def test_append_after_torn_block(tmp_path: Path) -> None:
+    first: List[TickData] = make_ticks(0, 20)
+    torn: List[TickData] = make_ticks(20, 20)
+    after: List[TickData] = make_ticks(40, 20)
+
+    record(tmp_path, first)
+    record(tmp_path, torn)
+
+    # Simulate crash in the middle of writing the second block
+    path: Path = get_archive_path(tmp_path, "rb2405.SHFE", START.date())
+    size: int = path.stat().st_size
+    with open(path, "r+b") as f:
+        f.truncate(size - 30)
+
+    recorder: TickRecorder = record(tmp_path, after)
+    assert recorder.warning
+    assert not recorder.error
+
+    loaded: List[TickData] = load(tmp_path)
+    expected: List[TickData] = first + after
+    assert [t.datetime for t in loaded] == [t.datetime for t in expected]
+    assert [t.last_price for t in loaded] == [t.last_price for t in expected]
+
+
+def test_append_after_torn_header(tmp_path: Path) -> None:
+    record(tmp_path, make_ticks(0, 10))
+
+    path: Path = get_archive_path(tmp_path, "rb2405.SHFE", START.date())
+    with open(path, "r+b") as f:
+        f.truncate(5)
+
+    after: List[TickData] = make_ticks(10, 10)
+    record(tmp_path, after)
+
+    loaded: List[TickData] = load(tmp_path)
+    assert [t.datetime for t in loaded] == [t.datetime for t in after]
@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from functools import partial
+from typing import List
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import BarData, TickData
+
+from vnpy_ctastrategy import CtaTemplate
+from vnpy_ctastrategy.replay import ReplayHarness, generate_ticks, run_replay
+
+
+VT_SYMBOL: str = "rb2405.SHFE"
+START: datetime = datetime(2024, 3, 1, 9, 0, tzinfo=DB_TZ)
+TICK_COUNT: int = 5_000
+STRATEGY_COUNT: int = 4
+
+# Budget of live tick path, loose enough for slow CI machines
+MIN_THROUGHPUT: float = 1_000           # ticks per second
+MAX_ON_TICK_P99: float = 2_000          # microseconds
+MAX_TICK_TO_ORDER_P99: float = 2_000    # microseconds
+
+
+class FlipStrategy(CtaTemplate):
+    """Buy and sell one lot alternately every flip_ticks ticks."""
+
+    flip_ticks: int = 20
+
+    parameters = ["flip_ticks"]
+
+    def __init__(self, cta_engine, strategy_name, vt_symbol, setting) -> None:
+        """"""
+        super().__init__(cta_engine, strategy_name, vt_symbol, setting)
+
+        self.tick_count: int = 0
+
+    def on_tick(self, tick: TickData) -> None:
+        """"""
+        self.tick_count += 1
+        if self.tick_count % self.flip_ticks:
+            return
+
+        if self.pos <= 0:
+            self.buy(tick.ask_price_1, 1)
+        else:
+            self.sell(tick.bid_price_1, 1)
+
+
+def test_replay_budget() -> None:
+    ticks: List[TickData] = generate_ticks(VT_SYMBOL, START, TICK_COUNT)
+    stats: dict = run_replay(FlipStrategy, {}, ticks, strategy_count=STRATEGY_COUNT)
+
+    assert stats["ticks"] == TICK_COUNT
+    assert stats["orders"] and stats["trades"]
+    assert stats["throughput"] >= MIN_THROUGHPUT
+
+    for i in range(STRATEGY_COUNT):
+        latency: dict = stats["latency"][f"FlipStrategy_{i}"]
+        assert latency["on_tick"]["count"] == TICK_COUNT
+        assert latency["on_tick"]["p99"] <= MAX_ON_TICK_P99
+        assert latency["tick_to_order"]["p99"] <= MAX_TICK_TO_ORDER_P99
+
+
+def test_replay_threaded() -> None:
+    ticks: List[TickData] = generate_ticks(VT_SYMBOL, START, TICK_COUNT)
+    stats: dict = run_replay(FlipStrategy, {}, ticks, strategy_count=STRATEGY_COUNT, threaded=True)
+
+    assert stats["ticks"] == TICK_COUNT
+    assert stats["events"] >= TICK_COUNT
+    assert stats["orders"] and stats["trades"]
+    assert stats["throughput"] >= MIN_THROUGHPUT
+    assert stats["queue_wait"]["count"] == TICK_COUNT
+    assert 0 <= stats["queue_depth_mean"] <= stats["queue_depth_max"]
+
+    for i in range(STRATEGY_COUNT):
+        latency: dict = stats["latency"][f"FlipStrategy_{i}"]
+        assert latency["on_tick"]["count"] == TICK_COUNT
+
+
+def test_replay_keeps_ticks() -> None:
+    ticks: List[TickData] = generate_ticks(VT_SYMBOL, START, 100)
+    run_replay(FlipStrategy, {}, ticks)
+
+    assert all(getattr(tick, "localtime", None) is None for tick in ticks)
+
+
+class PartialStrategy(CtaTemplate):
+    """Subscribe bar series with a functools.partial callback."""
+
+    def on_init(self) -> None:
+        """"""
+        self.bars: List[BarData] = []
+        self.subscribe_bar(partial(self.on_window_bar, 5), 5)
+
+    def on_window_bar(self, window: int, bar: BarData) -> None:
+        """"""
+        self.bars.append(bar)
+
+
+def test_replay_partial_callback() -> None:
+    harness: ReplayHarness = ReplayHarness()
+    harness.add_strategy(PartialStrategy, "partial", VT_SYMBOL, {})
+
+    ticks: List[TickData] = generate_ticks(VT_SYMBOL, START, 1_000, timedelta(seconds=1))
+    harness.run(ticks)
+
+    strategy: PartialStrategy = harness.cta_engine.strategies["partial"]
+    assert strategy.inited and strategy.bars
+    assert "partial" in repr(harness.cta_engine.get_latency_stats("partial"))
+
+
+class HistoryWindowStrategy(PartialStrategy):
+    """Load history minutes into the 5 minute bar series before ticks."""
+
+    def on_init(self) -> None:
+        """"""
+        super().on_init()
+        self.load_subscribed_bar(1)
+
+
+def test_replay_history_window() -> None:
+    # History bars cover first 3 minutes of the 5 minute window, ticks the rest
+    start: datetime = datetime.now(DB_TZ).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+    history: List[BarData] = [
+        BarData(
+            symbol="rb2405",
+            exchange=Exchange.SHFE,
+            datetime=start + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            gateway_name="REPLAY",
+            open_price=4000 + i,
+            high_price=4000 + i,
+            low_price=4000 + i,
+            close_price=4000 + i,
+        )
+        for i in range(3)
+    ]
+
+    harness: ReplayHarness = ReplayHarness()
+    harness.add_history(history)
+    harness.add_strategy(HistoryWindowStrategy, "history", VT_SYMBOL, {})
+
+    ticks: List[TickData] = generate_ticks(VT_SYMBOL, start + timedelta(minutes=3), 180, timedelta(seconds=1))
+    harness.run(ticks)
+
+    strategy: HistoryWindowStrategy = harness.cta_engine.strategies["history"]
+    assert [bar.datetime for bar in strategy.bars] == [start]
+    assert strategy.bars[0].open_price == 4000
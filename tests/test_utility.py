@@ -0,0 +1,49 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, List
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import BarData
+
+from vnpy_ctastrategy.utility import BarAggregator
+
+
+def make_bars(day: datetime, count: int) -> List[BarData]:
+    """"""
+    bars: List[BarData] = []
+    for i in range(count):
+        bar: BarData = BarData(
+            symbol="rb2405",
+            exchange=Exchange.SHFE,
+            datetime=day + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            gateway_name="TEST",
+            open_price=3500 + i,
+            high_price=3500 + i,
+            low_price=3500 + i,
+            close_price=3500 + i,
+            volume=1,
+        )
+        bars.append(bar)
+    return bars
+
+
+def test_daily_end_series() -> None:
+    pushed: Dict[tuple, List[BarData]] = defaultdict(list)
+    aggregator: BarAggregator = BarAggregator(lambda key, bar: pushed[key].append(bar))
+
+    aggregator.add_window(1, Interval.DAILY, time(14, 0))
+    aggregator.add_window(1, Interval.DAILY, time(14, 59))
+    aggregator.add_window(1, Interval.DAILY, time(14, 0))
+    assert len(aggregator.window_generators) == 2
+
+    for bar in make_bars(datetime(2024, 3, 1, 13, 0, tzinfo=DB_TZ), 120):
+        aggregator.update_bar(bar)
+
+    assert len(pushed[(1, Interval.MINUTE, None)]) == 120
+    assert [bar.close_price for bar in pushed[(1, Interval.DAILY, time(14, 0))]] == [3560]
+    assert [bar.close_price for bar in pushed[(1, Interval.DAILY, time(14, 59))]] == [3619]
+
+    aggregator.remove_window(1, Interval.DAILY, time(14, 0))
+    assert list(aggregator.window_generators.keys()) == [(1, Interval.DAILY, time(14, 59))]
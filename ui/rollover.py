@@ -1,13 +1,15 @@
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
+from threading import Thread
 from time import sleep
-from typing import TYPE_CHECKING, List, Optional
-from copy import copy
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from vnpy.trader.engine import MainEngine
 from vnpy.trader.constant import OrderType
 from vnpy.trader.object import ContractData, OrderRequest, SubscribeRequest, TickData
 from vnpy.trader.object import Direction, Offset
-from vnpy.trader.ui import QtWidgets
+from vnpy.trader.ui import QtCore, QtGui, QtWidgets
 from vnpy.trader.converter import OffsetConverter, PositionHolding
 
 from ..engine import CtaEngine, APP_NAME
@@ -19,7 +21,20 @@ if TYPE_CHECKING:
 
 
 class RolloverTool(QtWidgets.QDialog):
-    """"""
+    """
+    Roll positions and strategies of one or more contracts.
+
+    Rollover runs in a background thread: positions of different contracts
+    are rolled concurrently, then strategies are re-created and initialized
+    in parallel. Progress and errors are sent back to dialog with signals.
+    """
+
+    signal_log: QtCore.Signal = QtCore.Signal(str)
+    signal_progress: QtCore.Signal = QtCore.Signal(int, int)
+    signal_remove: QtCore.Signal = QtCore.Signal(str)
+    signal_finished: QtCore.Signal = QtCore.Signal()
+
+    tick_timeout: int = 10          # seconds to wait for tick of new symbols
 
     def __init__(self, cta_manager: "CtaManager") -> None:
         """"""
@@ -29,8 +44,15 @@ class RolloverTool(QtWidgets.QDialog):
         self.cta_engine: CtaEngine = cta_manager.cta_engine
         self.main_engine: MainEngine = cta_manager.main_engine
 
+        self.roll_thread: Optional[Thread] = None
+
         self.init_ui()
 
+        self.signal_log.connect(self.write_log)
+        self.signal_progress.connect(self.update_progress)
+        self.signal_remove.connect(self.cta_manager.remove_strategy)
+        self.signal_finished.connect(self.process_finished)
+
     def init_ui(self) -> None:
         """"""
         self.setWindowTitle(_("移仓助手"))
@@ -44,6 +66,18 @@ class RolloverTool(QtWidgets.QDialog):
 
         self.new_symbol_line: QtWidgets.QLineEdit = QtWidgets.QLineEdit()
 
+        add_button: QtWidgets.QPushButton = QtWidgets.QPushButton(_("添加"))
+        add_button.clicked.connect(self.add_task)
+
+        self.task_table: QtWidgets.QTableWidget = QtWidgets.QTableWidget()
+        self.task_table.setColumnCount(2)
+        self.task_table.setHorizontalHeaderLabels([_("移仓合约"), _("目标合约")])
+        self.task_table.verticalHeader().setVisible(False)
+        self.task_table.setEditTriggers(self.task_table.EditTrigger.NoEditTriggers)
+        self.task_table.horizontalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.Stretch
+        )
+
         self.payup_spin: QtWidgets.QSpinBox = QtWidgets.QSpinBox()
         self.payup_spin.setMinimum(5)
 
@@ -52,23 +86,37 @@ class RolloverTool(QtWidgets.QDialog):
         self.max_volume_spin.setMaximum(10000)
         self.max_volume_spin.setValue(100)
 
+        self.worker_spin: QtWidgets.QSpinBox = QtWidgets.QSpinBox()
+        self.worker_spin.setMinimum(1)
+        self.worker_spin.setMaximum(16)
+        self.worker_spin.setValue(4)
+
+        self.progress_bar: QtWidgets.QProgressBar = QtWidgets.QProgressBar()
+
         self.log_edit: QtWidgets.QTextEdit = QtWidgets.QTextEdit()
         self.log_edit.setReadOnly(True)
         self.log_edit.setMinimumWidth(500)
 
-        button: QtWidgets.QPushButton = QtWidgets.QPushButton(_("移仓"))
-        button.clicked.connect(self.roll_all)
-        button.setFixedHeight(button.sizeHint().height() * 2)
+        self.roll_button: QtWidgets.QPushButton = QtWidgets.QPushButton(_("移仓"))
+        self.roll_button.clicked.connect(self.roll_all)
+        self.roll_button.setFixedHeight(self.roll_button.sizeHint().height() * 2)
 
         form: QtWidgets.QFormLayout = QtWidgets.QFormLayout()
         form.addRow(_("移仓合约"), self.old_symbol_combo)
         form.addRow(_("目标合约"), self.new_symbol_line)
+        form.addRow(add_button)
+        form.addRow(self.task_table)
         form.addRow(_("委托超价"), self.payup_spin)
         form.addRow(_("单笔上限"), self.max_volume_spin)
-        form.addRow(button)
+        form.addRow(_("并行任务"), self.worker_spin)
+        form.addRow(self.roll_button)
+        form.addRow(self.progress_bar)
+
+        self.form_widget: QtWidgets.QWidget = QtWidgets.QWidget()
+        self.form_widget.setLayout(form)
 
         hbox: QtWidgets.QHBoxLayout = QtWidgets.QHBoxLayout()
-        hbox.addLayout(form)
+        hbox.addWidget(self.form_widget)
         hbox.addWidget(self.log_edit)
         self.setLayout(hbox)
 
@@ -78,6 +126,69 @@ class RolloverTool(QtWidgets.QDialog):
         text: str = now.strftime("%H:%M:%S\t") + text
         self.log_edit.append(text)
 
+    def output(self, text: str) -> None:
+        """
+        Write log from background thread.
+        """
+        self.signal_log.emit(text)
+
+    def update_progress(self, count: int, total: int) -> None:
+        """"""
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(count)
+
+    def process_finished(self) -> None:
+        """"""
+        self.roll_thread = None
+        self.write_log(_("移仓任务结束"))
+
+    def reject(self) -> None:
+        """
+        Keep dialog open until background rollover finished.
+        """
+        if self.roll_thread:
+            self.write_log(_("移仓任务运行中，请等待结束"))
+            return
+        super().reject()
+
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        """"""
+        if self.roll_thread:
+            self.write_log(_("移仓任务运行中，请等待结束"))
+            event.ignore()
+            return
+        event.accept()
+
+    def add_task(self) -> None:
+        """
+        Add (old symbol, new symbol) into rollover task list.
+        """
+        old_symbol: str = self.old_symbol_combo.currentText()
+        new_symbol: str = self.new_symbol_line.text().strip()
+        if not old_symbol or not new_symbol:
+            return
+
+        for old, __ in self.get_tasks():
+            if old == old_symbol:
+                self.write_log(_("移仓合约{}已在任务列表中").format(old_symbol))
+                return
+
+        row: int = self.task_table.rowCount()
+        self.task_table.insertRow(row)
+        self.task_table.setItem(row, 0, QtWidgets.QTableWidgetItem(old_symbol))
+        self.task_table.setItem(row, 1, QtWidgets.QTableWidgetItem(new_symbol))
+
+        self.new_symbol_line.clear()
+
+    def get_tasks(self) -> List[Tuple[str, str]]:
+        """"""
+        tasks: list = []
+        for row in range(self.task_table.rowCount()):
+            old_symbol: str = self.task_table.item(row, 0).text()
+            new_symbol: str = self.task_table.item(row, 1).text()
+            tasks.append((old_symbol, new_symbol))
+        return tasks
+
     def subscribe(self, vt_symbol: str) -> None:
         """"""
         contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
@@ -88,42 +199,164 @@ class RolloverTool(QtWidgets.QDialog):
         self.main_engine.subscribe(req, contract.gateway_name)
 
     def roll_all(self) -> None:
-        """"""
-        old_symbol: str = self.old_symbol_combo.currentText()
+        """
+        Check tasks and start rollover in background thread.
+        """
+        if self.roll_thread:
+            return
 
-        new_symbol: str = self.new_symbol_line.text()
-        self.subscribe(new_symbol)
-        sleep(1)
+        tasks: List[Tuple[str, str]] = self.get_tasks()
+        if not tasks:
+            self.add_task()
+            tasks = self.get_tasks()
 
-        new_tick: Optional[TickData] = self.main_engine.get_tick(new_symbol)
-        if not new_tick:
-            self.write_log(_("无法获取目标合约{}的盘口数据，请先订阅行情").format(new_symbol))
+        if not tasks:
+            self.write_log(_("请先添加移仓任务"))
             return
 
-        payup: int = self.payup_spin.value()
-
         # Check all strategies inited (pos data loaded from disk json file) and not trading
-        strategies: list = self.cta_engine.symbol_strategy_map[old_symbol]
-        for strategy in strategies:
-            if not strategy.inited:
-                self.write_log(_("策略{}尚未初始化，无法执行移仓").format(strategy.strategy_name))
-                return
+        for old_symbol, __ in tasks:
+            strategies: list = self.cta_engine.symbol_strategy_map[old_symbol]
+            for strategy in strategies:
+                if not strategy.inited:
+                    self.write_log(_("策略{}尚未初始化，无法执行移仓").format(strategy.strategy_name))
+                    return
+
+                if strategy.trading:
+                    self.write_log(_("策略{}正在运行中，无法执行移仓").format(strategy.strategy_name))
+                    return
+
+        # Disable input, rollover can only be run once
+        self.form_widget.setEnabled(False)
+
+        self.roll_thread = Thread(
+            target=self.run_rollover,
+            args=(
+                tasks,
+                self.payup_spin.value(),
+                self.max_volume_spin.value(),
+                self.worker_spin.value()
+            ),
+            daemon=True
+        )
+        self.roll_thread.start()
 
-            if strategy.trading:
-                self.write_log(_("策略{}正在运行中，无法执行移仓").format(strategy.strategy_name))
-                return
+    def run_rollover(
+        self,
+        tasks: List[Tuple[str, str]],
+        payup: int,
+        max_volume: int,
+        workers: int
+    ) -> None:
+        """
+        Run rollover tasks, called in background thread.
+        """
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                self.run_tasks(executor, tasks, payup, max_volume)
+        except Exception:
+            self.output(_("移仓任务异常\n{}").format(traceback.format_exc()))
 
-        # Roll position first
-        self.roll_position(old_symbol, new_symbol, payup)
+        self.signal_finished.emit()
 
-        # Then roll strategy
-        for strategy in copy(strategies):
-            self.roll_strategy(strategy, new_symbol)
+    def run_tasks(
+        self,
+        executor: ThreadPoolExecutor,
+        tasks: List[Tuple[str, str]],
+        payup: int,
+        max_volume: int
+    ) -> None:
+        """"""
+        strategies: Dict[str, list] = {
+            old_symbol: list(self.cta_engine.symbol_strategy_map[old_symbol])
+            for old_symbol, __ in tasks
+        }
 
-        # Disable self
-        self.setEnabled(False)
+        count: int = 0
+        total: int = len(tasks) + sum(len(s) for s in strategies.values())
+        self.signal_progress.emit(count, total)
 
-    def roll_position(self, old_symbol: str, new_symbol: str, payup: int) -> None:
+        # Subscribe all new symbols and wait for their tick data
+        for __, new_symbol in tasks:
+            self.subscribe(new_symbol)
+
+        for __ in range(self.tick_timeout * 10):
+            if all(self.main_engine.get_tick(new) for __, new in tasks):
+                break
+            sleep(0.1)
+
+        # Roll positions of different contracts concurrently
+        futures: Dict[Future, tuple] = {}
+
+        for old_symbol, new_symbol in tasks:
+            if not self.main_engine.get_tick(new_symbol):
+                self.output(_("无法获取目标合约{}的盘口数据，请先订阅行情").format(new_symbol))
+                count += 1 + len(strategies[old_symbol])
+                self.signal_progress.emit(count, total)
+                continue
+
+            future: Future = executor.submit(
+                self.roll_position, old_symbol, new_symbol, payup, max_volume
+            )
+            futures[future] = (old_symbol, new_symbol)
+
+        rolled: List[Tuple[str, str]] = []
+
+        for future in as_completed(futures):
+            old_symbol, new_symbol = futures[future]
+            count += 1
+
+            try:
+                future.result()
+                rolled.append((old_symbol, new_symbol))
+                self.output(_("合约仓位移仓完成{} -> {}").format(old_symbol, new_symbol))
+            except Exception:
+                count += len(strategies[old_symbol])
+                self.output(_("合约仓位移仓失败{}\n{}").format(old_symbol, traceback.format_exc()))
+
+            self.signal_progress.emit(count, total)
+
+        # Replace all strategies first, so that their settings and data files
+        # are no longer modified when inits run
+        names: List[Tuple[str, str]] = []
+
+        for old_symbol, new_symbol in rolled:
+            for strategy in strategies[old_symbol]:
+                name: str = strategy.strategy_name
+
+                try:
+                    self.roll_strategy(strategy, new_symbol)
+                except Exception:
+                    count += 1
+                    self.signal_progress.emit(count, total)
+                    self.output(_("策略移仓失败{}\n{}").format(name, traceback.format_exc()))
+                    continue
+
+                names.append((name, new_symbol))
+
+        # Init through engine, which runs strategy inits one by one
+        futures = {}
+
+        for name, new_symbol in names:
+            future: Future = self.cta_engine.init_strategy(name)
+            futures[future] = (name, new_symbol)
+
+        for future in as_completed(futures):
+            name, new_symbol = futures[future]
+            count += 1
+
+            try:
+                future.result()
+                if self.cta_engine.strategies[name].inited:
+                    self.output(_("初始化策略{}[{}]").format(name, new_symbol))
+                else:
+                    self.output(_("策略初始化失败{}").format(name))
+            except Exception:
+                self.output(_("策略初始化失败{}\n{}").format(name, traceback.format_exc()))
+
+            self.signal_progress.emit(count, total)
+
+    def roll_position(self, old_symbol: str, new_symbol: str, payup: int, max_volume: int) -> None:
         """"""
         contract: ContractData = self.main_engine.get_contract(old_symbol)
         converter: OffsetConverter = self.main_engine.get_converter(contract.gateway_name)
@@ -138,7 +371,8 @@ class RolloverTool(QtWidgets.QDialog):
                 Direction.SHORT,
                 Offset.CLOSE,
                 payup,
-                volume
+                volume,
+                max_volume
             )
 
             self.send_order(
@@ -146,7 +380,8 @@ class RolloverTool(QtWidgets.QDialog):
                 Direction.LONG,
                 Offset.OPEN,
                 payup,
-                volume
+                volume,
+                max_volume
             )
 
         # Roll short postiion
@@ -158,7 +393,8 @@ class RolloverTool(QtWidgets.QDialog):
                 Direction.LONG,
                 Offset.CLOSE,
                 payup,
-                volume
+                volume,
+                max_volume
             )
 
             self.send_order(
@@ -166,14 +402,14 @@ class RolloverTool(QtWidgets.QDialog):
                 Direction.SHORT,
                 Offset.OPEN,
                 payup,
-                volume
+                volume,
+                max_volume
             )
 
     def roll_strategy(self, strategy: CtaTemplate, vt_symbol: str) -> None:
-        """"""
-        if not strategy.inited:
-            self.cta_engine._init_strategy(strategy.strategy_name)
-
+        """
+        Replace strategy with a new one trading vt_symbol, init is done by caller.
+        """
         # Save data of old strategy
         pos = strategy.pos
         name: str = strategy.strategy_name
@@ -182,9 +418,9 @@ class RolloverTool(QtWidgets.QDialog):
         # Remove old strategy
         result: bool = self.cta_engine.remove_strategy(name)
         if result:
-            self.cta_manager.remove_strategy(name)
+            self.signal_remove.emit(name)
 
-        self.write_log(_("移除老策略{}[{}]").format(name, strategy.vt_symbol))
+        self.output(_("移除老策略{}[{}]").format(name, strategy.vt_symbol))
 
         # Add new strategy
         self.cta_engine.add_strategy(
@@ -193,17 +429,13 @@ class RolloverTool(QtWidgets.QDialog):
             vt_symbol,
             parameters
         )
-        self.write_log(_("创建策略{}[{}]").format(name, vt_symbol))
+        self.output(_("创建策略{}[{}]").format(name, vt_symbol))
 
-        # Init new strategy
-        self.cta_engine.init_strategy(name)
-        self.write_log(_("初始化策略{}[{}]").format(name, vt_symbol))
-
-        # Update pos to new strategy
+        # Update pos to new strategy, which is restored again in init
         new_strategy: CtaTemplate = self.cta_engine.strategies[name]
         new_strategy.pos = pos
-        new_strategy.sync_data()
-        self.write_log(_("更新策略仓位{}[{}]").format(name, vt_symbol))
+        self.cta_engine.sync_strategy_data(new_strategy)
+        self.output(_("更新策略仓位{}[{}]").format(name, vt_symbol))
 
     def send_order(
         self,
@@ -212,12 +444,11 @@ class RolloverTool(QtWidgets.QDialog):
         offset: Offset,
         payup: int,
         volume: float,
+        max_volume: int
     ) -> None:
         """
         Send a new order to server.
         """
-        max_volume: int = self.max_volume_spin.value()
-
         contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
         tick: Optional[TickData] = self.main_engine.get_tick(vt_symbol)
 
@@ -247,19 +478,20 @@ class RolloverTool(QtWidgets.QDialog):
                 False
             )
 
-            vt_orderids: list = []
             for req in req_list:
                 vt_orderid: str = self.main_engine.send_order(req, contract.gateway_name)
                 if not vt_orderid:
+                    self.output(_("委托失败{}，{} {}，{}@{}").format(
+                        vt_symbol, direction.value, offset.value, req.volume, price
+                    ))
                     continue
 
-                vt_orderids.append(vt_orderid)
                 self.main_engine.update_order_request(req, vt_orderid, contract.gateway_name)
 
                 msg: str = _("发出委托{}，{} {}，{}@{}").format(
-                    vt_symbol, direction.value, offset.value, volume, price
+                    vt_symbol, direction.value, offset.value, req.volume, price
                 )
-                self.write_log(msg)
+                self.output(msg)
 
             # Check whether all volume sent
             volume = volume - order_volume
@@ -1,15 +1,13 @@
-from typing import Dict
+import csv
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import MainEngine
+from vnpy.trader.object import LogData
 from vnpy.trader.ui import QtCore, QtGui, QtWidgets
-from vnpy.trader.ui.widget import (
-    BaseCell,
-    EnumCell,
-    MsgCell,
-    TimeCell,
-    BaseMonitor
-)
 from ..base import (
     APP_NAME,
     EVENT_CTA_LOG,
@@ -88,6 +86,11 @@ class CtaManager(QtWidgets.QWidget):
         find_button = QtWidgets.QPushButton(_("查找"))
         find_button.clicked.connect(self.find_strategy)
 
+        self.filter_combo: QtWidgets.QComboBox = QtWidgets.QComboBox()
+        self.filter_combo.setMinimumWidth(200)
+        self.filter_combo.addItem(_("全部策略"), "")
+        self.filter_combo.currentIndexChanged.connect(self.filter_strategy)
+
         # Set layout
         hbox1: QtWidgets.QHBoxLayout = QtWidgets.QHBoxLayout()
         hbox1.addWidget(self.class_combo)
@@ -95,6 +98,7 @@ class CtaManager(QtWidgets.QWidget):
         hbox1.addStretch()
         hbox1.addWidget(self.strategy_combo)
         hbox1.addWidget(find_button)
+        hbox1.addWidget(self.filter_combo)
         hbox1.addStretch()
         hbox1.addWidget(init_button)
         hbox1.addWidget(start_button)
@@ -127,6 +131,22 @@ class CtaManager(QtWidgets.QWidget):
         self.strategy_combo.clear()
         self.strategy_combo.addItems(names)
 
+        # Rebuild filter combo and keep current selection if still exists
+        current: str = self.filter_combo.currentData() or ""
+
+        self.filter_combo.blockSignals(True)
+        self.filter_combo.clear()
+        self.filter_combo.addItem(_("全部策略"), "")
+        for name in names:
+            self.filter_combo.addItem(name, name)
+
+        index: int = self.filter_combo.findData(current)
+        self.filter_combo.setCurrentIndex(max(index, 0))
+        self.filter_combo.blockSignals(False)
+
+        if index < 0:
+            self.filter_strategy()
+
     def register_event(self) -> None:
         """"""
         self.signal_strategy.connect(self.process_strategy_event)
@@ -165,7 +185,10 @@ class CtaManager(QtWidgets.QWidget):
         if not class_name:
             return
 
-        parameters: dict = self.cta_engine.get_strategy_class_parameters(class_name)
+        parameters: Optional[dict] = self.cta_engine.get_strategy_class_parameters(class_name)
+        if parameters is None:
+            return
+
         editor: SettingEditor = SettingEditor(parameters, class_name=class_name)
         n: int = editor.exec_()
 
@@ -187,7 +210,16 @@ class CtaManager(QtWidgets.QWidget):
 
     def clear_log(self) -> None:
         """"""
-        self.log_monitor.setRowCount(0)
+        self.log_monitor.clear_data()
+
+    def filter_strategy(self) -> None:
+        """
+        Show stop orders and logs of selected strategy only.
+        """
+        strategy_name: str = self.filter_combo.currentData() or ""
+
+        self.stop_order_monitor.set_strategy_filter(strategy_name)
+        self.log_monitor.set_strategy_filter(strategy_name)
 
     def show(self) -> None:
         """"""
@@ -372,7 +404,369 @@ class DataMonitor(QtWidgets.QTableWidget):
             cell.setText(str(value))
 
 
-class StopOrderMonitor(BaseMonitor):
+def format_text(value: Any) -> str:
+    """"""
+    if value is None:
+        return ""
+    return str(value)
+
+
+def format_enum(value: Optional[Enum]) -> str:
+    """"""
+    if value is None:
+        return ""
+    return value.value
+
+
+def format_time(value: Optional[datetime]) -> str:
+    """
+    Show time in local timezone, with millisecond if not zero.
+    """
+    if value is None:
+        return ""
+
+    value = value.astimezone()
+    timestamp: str = value.strftime("%H:%M:%S")
+
+    millisecond: int = int(value.microsecond / 1000)
+    if millisecond:
+        timestamp = f"{timestamp}.{millisecond}"
+    return timestamp
+
+
+class RingTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model keeping latest data in a fixed-capacity ring buffer.
+
+    Newest data is shown on the top row. Data with the same key (if data_key
+    is given) is updated in place while it is still in buffer. Once buffer is
+    full, the oldest rows are dropped, so memory does not grow over time.
+    """
+
+    def __init__(self, headers: dict, capacity: int, data_key: str = "") -> None:
+        """"""
+        super().__init__()
+
+        self.headers: dict = headers
+        self.names: List[str] = list(headers.keys())
+        self.capacity: int = capacity
+        self.data_key: str = data_key
+
+        self.slots: List[Optional[tuple]] = [None] * capacity   # (data, strategy_name)
+        self.next_seq: int = 0                                     # seq of next new data
+        self.count: int = 0
+        self.keys: Dict[str, int] = {}                             # key: seq
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        """"""
+        if parent.isValid():
+            return 0
+        return self.count
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        """"""
+        if parent.isValid():
+            return 0
+        return len(self.names)
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        """"""
+        if (
+            role == QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == QtCore.Qt.Orientation.Horizontal
+        ):
+            return self.headers[self.names[section]]["display"]
+        return None
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        """"""
+        if not index.isValid():
+            return None
+
+        name: str = self.names[index.column()]
+        setting: dict = self.headers[name]
+
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            return setting.get("align", QtCore.Qt.AlignmentFlag.AlignCenter)
+
+        if role not in {
+            QtCore.Qt.ItemDataRole.DisplayRole,
+            QtCore.Qt.ItemDataRole.ToolTipRole,
+            QtCore.Qt.ItemDataRole.UserRole
+        }:
+            return None
+
+        value: Any = getattr(self.get_row(index.row())[0], name, None)
+
+        # Raw value is used for sorting
+        if role == QtCore.Qt.ItemDataRole.UserRole and isinstance(value, (int, float, str)):
+            return value
+
+        return setting["format"](value)
+
+    def get_row(self, row: int) -> tuple:
+        """
+        Get (data, strategy_name) of row, row 0 is the newest.
+        """
+        seq: int = self.next_seq - 1 - row
+        return self.slots[seq % self.capacity]
+
+    def get_strategy_name(self, row: int) -> str:
+        """"""
+        return self.get_row(row)[1]
+
+    def insert_data(self, items: List[tuple]) -> None:
+        """
+        Insert or update a batch of (data, strategy_name).
+        """
+        new_items: list = []
+        updated: Dict[str, tuple] = {}
+
+        if self.data_key:
+            # Only keep the latest one of same key in this batch
+            latest: Dict[str, tuple] = {}
+            for item in items:
+                latest[getattr(item[0], self.data_key)] = item
+
+            for key, item in latest.items():
+                if key in self.keys:
+                    updated[key] = item
+                else:
+                    new_items.append(item)
+        else:
+            new_items = items
+
+        for key, item in updated.items():
+            seq: int = self.keys[key]
+            self.slots[seq % self.capacity] = item
+
+            row: int = self.next_seq - 1 - seq
+            self.dataChanged.emit(
+                self.index(row, 0),
+                self.index(row, len(self.names) - 1)
+            )
+
+        if not new_items:
+            return
+        new_items = new_items[-self.capacity:]
+        n: int = len(new_items)
+
+        # Drop oldest rows at the bottom first
+        removed: int = self.count + n - self.capacity
+        if removed > 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), self.count - removed, self.count - 1)
+            self.count -= removed
+            self.endRemoveRows()
+
+        # Slots of new items are no longer visible, so write them before insert
+        for i, item in enumerate(new_items):
+            seq: int = self.next_seq + i
+            slot: int = seq % self.capacity
+
+            if self.data_key:
+                old: Optional[tuple] = self.slots[slot]
+                if old:
+                    old_key: str = getattr(old[0], self.data_key)
+                    if self.keys.get(old_key, None) == seq - self.capacity:
+                        self.keys.pop(old_key)
+
+                self.keys[getattr(item[0], self.data_key)] = seq
+
+            self.slots[slot] = item
+
+        self.beginInsertRows(QtCore.QModelIndex(), 0, n - 1)
+        self.next_seq += n
+        self.count += n
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        """"""
+        self.beginResetModel()
+        self.slots = [None] * self.capacity
+        self.count = 0
+        self.keys.clear()
+        self.endResetModel()
+
+
+class StrategyFilterModel(QtCore.QSortFilterProxyModel):
+    """
+    Proxy model for sorting and filtering rows by strategy name.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        super().__init__()
+
+        self.strategy_name: str = ""
+
+        self.setSortRole(QtCore.Qt.ItemDataRole.UserRole)
+
+    def set_strategy_name(self, strategy_name: str) -> None:
+        """
+        Show rows of strategy only, or all rows if strategy_name is empty.
+        """
+        self.strategy_name = strategy_name
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QtCore.QModelIndex) -> bool:
+        """"""
+        if not self.strategy_name:
+            return True
+
+        model: RingTableModel = self.sourceModel()
+        return model.get_strategy_name(source_row) == self.strategy_name
+
+
+class RingMonitor(QtWidgets.QTableView):
+    """
+    Monitor showing latest data of an event type.
+
+    Event data is only queued in event engine thread, and the table is
+    updated with all queued data in one batch on timer. Both the queue and
+    the table have fixed capacity.
+    """
+
+    event_type: str = ""
+    data_key: str = ""
+    sorting: bool = False
+    headers: dict = {}
+
+    capacity: int = 10000
+    refresh_interval: int = 200         # milliseconds
+
+    def __init__(self, main_engine: MainEngine, event_engine: EventEngine) -> None:
+        """"""
+        super().__init__()
+
+        self.main_engine: MainEngine = main_engine
+        self.event_engine: EventEngine = event_engine
+
+        self.queue: deque = deque(maxlen=self.capacity)
+
+        self.init_ui()
+        self.init_menu()
+        self.register_event()
+
+    def init_ui(self) -> None:
+        """"""
+        self.ring_model: RingTableModel = RingTableModel(
+            self.headers, self.capacity, self.data_key
+        )
+
+        self.filter_model: StrategyFilterModel = StrategyFilterModel()
+        self.filter_model.setSourceModel(self.ring_model)
+        self.setModel(self.filter_model)
+
+        self.verticalHeader().setVisible(False)
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.setEditTriggers(self.EditTrigger.NoEditTriggers)
+        self.setAlternatingRowColors(True)
+        self.setWordWrap(False)
+
+        if self.sorting:
+            # Keep insertion order until a header is clicked
+            self.setSortingEnabled(True)
+            self.sortByColumn(-1, QtCore.Qt.SortOrder.AscendingOrder)
+
+        self.timer: QtCore.QTimer = QtCore.QTimer(self)
+        self.timer.setInterval(self.refresh_interval)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    def init_menu(self) -> None:
+        """
+        Create right click menu.
+        """
+        self.menu: QtWidgets.QMenu = QtWidgets.QMenu(self)
+
+        resize_action: QtGui.QAction = QtGui.QAction(_("调整列宽"), self)
+        resize_action.triggered.connect(self.resize_columns)
+        self.menu.addAction(resize_action)
+
+        save_action: QtGui.QAction = QtGui.QAction(_("保存数据"), self)
+        save_action.triggered.connect(self.save_csv)
+        self.menu.addAction(save_action)
+
+    def register_event(self) -> None:
+        """"""
+        if self.event_type:
+            self.event_engine.register(self.event_type, self.process_event)
+
+    def process_event(self, event: Event) -> None:
+        """
+        Queue event data, called in event engine thread.
+        """
+        data: Any = event.data
+        self.queue.append((data, self.get_strategy_name(data)))
+
+    def get_strategy_name(self, data: Any) -> str:
+        """"""
+        return getattr(data, "strategy_name", "")
+
+    def refresh(self) -> None:
+        """
+        Move all queued data into table.
+        """
+        n: int = len(self.queue)
+        if not n:
+            return
+
+        items: list = [self.queue.popleft() for __ in range(n)]
+        self.ring_model.insert_data(items)
+
+    def set_strategy_filter(self, strategy_name: str) -> None:
+        """"""
+        self.filter_model.set_strategy_name(strategy_name)
+
+    def clear_data(self) -> None:
+        """"""
+        self.queue.clear()
+        self.ring_model.clear()
+
+    def resize_columns(self) -> None:
+        """"""
+        self.horizontalHeader().resizeSections(QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+
+    def save_csv(self) -> None:
+        """
+        Save shown rows into csv file.
+        """
+        path, __ = QtWidgets.QFileDialog.getSaveFileName(
+            self, _("保存数据"), "", "CSV(*.csv)")
+
+        if not path:
+            return
+
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+
+            headers: list = [d["display"] for d in self.headers.values()]
+            writer.writerow(headers)
+
+            for row in range(self.filter_model.rowCount()):
+                row_data: list = []
+                for column in range(self.filter_model.columnCount()):
+                    index: QtCore.QModelIndex = self.filter_model.index(row, column)
+                    row_data.append(self.filter_model.data(index))
+                writer.writerow(row_data)
+
+    def contextMenuEvent(self, event: QtGui.QContextMenuEvent) -> None:
+        """
+        Show menu with right click.
+        """
+        self.menu.popup(QtGui.QCursor.pos())
+
+
+class StopOrderMonitor(RingMonitor):
     """
     Monitor for local stop order.
     """
@@ -382,30 +776,22 @@ class StopOrderMonitor(BaseMonitor):
     sorting: bool = True
 
     headers: dict = {
-        "stop_orderid": {
-            "display": _("停止委托号"),
-            "cell": BaseCell,
-            "update": False,
-        },
-        "vt_orderids": {"display": _("限价委托号"), "cell": BaseCell, "update": True},
-        "vt_symbol": {"display": _("本地代码"), "cell": BaseCell, "update": False},
-        "direction": {"display": _("方向"), "cell": EnumCell, "update": False},
-        "offset": {"display": _("开平"), "cell": EnumCell, "update": False},
-        "price": {"display": _("价格"), "cell": BaseCell, "update": False},
-        "volume": {"display": _("数量"), "cell": BaseCell, "update": False},
-        "status": {"display": _("状态"), "cell": EnumCell, "update": True},
-        "datetime": {"display": _("时间"), "cell": TimeCell, "update": False},
-        "lock": {"display": _("锁仓"), "cell": BaseCell, "update": False},
-        "net": {"display": _("净仓"), "cell": BaseCell, "update": False},
-        "strategy_name": {"display": _("策略名"), "cell": BaseCell, "update": False},
+        "stop_orderid": {"display": _("停止委托号"), "format": format_text},
+        "vt_orderids": {"display": _("限价委托号"), "format": format_text},
+        "vt_symbol": {"display": _("本地代码"), "format": format_text},
+        "direction": {"display": _("方向"), "format": format_enum},
+        "offset": {"display": _("开平"), "format": format_enum},
+        "price": {"display": _("价格"), "format": format_text},
+        "volume": {"display": _("数量"), "format": format_text},
+        "status": {"display": _("状态"), "format": format_enum},
+        "datetime": {"display": _("时间"), "format": format_time},
+        "lock": {"display": _("锁仓"), "format": format_text},
+        "net": {"display": _("净仓"), "format": format_text},
+        "strategy_name": {"display": _("策略名"), "format": format_text},
     }
 
-    def __del__(self) -> None:
-        """"""
-        pass
-
 
-class LogMonitor(BaseMonitor):
+class LogMonitor(RingMonitor):
     """
     Monitor for log data.
     """
@@ -415,26 +801,34 @@ class LogMonitor(BaseMonitor):
     sorting: bool = False
 
     headers: dict = {
-        "time": {"display": _("时间"), "cell": TimeCell, "update": False},
-        "msg": {"display": _("信息"), "cell": MsgCell, "update": False},
+        "time": {"display": _("时间"), "format": format_time},
+        "msg": {
+            "display": _("信息"),
+            "format": format_text,
+            "align": QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter
+        },
     }
 
     def init_ui(self) -> None:
         """
         Stretch last column.
         """
-        super(LogMonitor, self).init_ui()
+        super().init_ui()
 
         self.horizontalHeader().setSectionResizeMode(
             1, QtWidgets.QHeaderView.ResizeMode.Stretch
         )
 
-    def insert_new_row(self, data) -> None:
+    def get_strategy_name(self, data: LogData) -> str:
         """
-        Insert a new row at the top of table.
+        Strategy log message starts with [strategy_name].
         """
-        super(LogMonitor, self).insert_new_row(data)
-        self.resizeRowToContents(0)
+        msg: str = data.msg
+        if msg.startswith("["):
+            end: int = msg.find("]")
+            if end > 0:
+                return msg[1:end]
+        return ""
 
 
 class SettingEditor(QtWidgets.QDialog):
@@ -0,0 +1,240 @@
+"""
+Helper objects used by CtaEngine for runtime monitoring and market data.
+"""
+
+from collections import OrderedDict
+from datetime import time
+from functools import partial
+from time import monotonic
+from typing import Callable, Dict, List, Optional
+
+from vnpy.trader.constant import Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import BarGenerator
+
+
+class LatencyHistogram:
+    """
+    Histogram of latency samples in nanoseconds.
+
+    Samples are counted into log-linear buckets (4 buckets per power of two),
+    so that adding a sample is O(1) and memory usage is constant.
+    """
+
+    sub_bits: int = 2
+    bucket_count: int = 64 << 2
+
+    def __init__(self) -> None:
+        """"""
+        self.counts: List[int] = [0] * self.bucket_count
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def add(self, value: int) -> None:
+        """
+        Add a new sample.
+        """
+        if value < 0:
+            value = 0
+
+        self.counts[self.get_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def get_index(self, value: int) -> int:
+        """
+        Get bucket index of value.
+        """
+        n: int = value.bit_length()
+        if n <= self.sub_bits:
+            return value
+
+        sub: int = (value >> (n - self.sub_bits - 1)) & ((1 << self.sub_bits) - 1)
+        return min((n << self.sub_bits) | sub, self.bucket_count - 1)
+
+    def get_upper(self, index: int) -> int:
+        """
+        Get upper bound value of bucket.
+        """
+        n: int = index >> self.sub_bits
+        if n <= self.sub_bits:
+            return index
+
+        sub: int = index & ((1 << self.sub_bits) - 1)
+        return (((1 << self.sub_bits) | sub) + 1) << (n - self.sub_bits - 1)
+
+    def get_percentile(self, percent: float) -> int:
+        """
+        Get approximate value at given percentile (0-100).
+        """
+        if not self.count:
+            return 0
+
+        target: float = self.count * percent / 100
+        cumulative: int = 0
+
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if count and cumulative >= target:
+                return min(self.get_upper(index), self.max)
+
+        return self.max
+
+    def get_summary(self) -> Dict[str, float]:
+        """
+        Get summary statistics in microseconds.
+        """
+        if not self.count:
+            mean: float = 0
+        else:
+            mean: float = self.total / self.count
+
+        return {
+            "count": self.count,
+            "mean": mean / 1000,
+            "p50": self.get_percentile(50) / 1000,
+            "p90": self.get_percentile(90) / 1000,
+            "p99": self.get_percentile(99) / 1000,
+            "max": self.max / 1000,
+        }
+
+    def clear(self) -> None:
+        """"""
+        self.counts = [0] * self.bucket_count
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class BarAggregator:
+    """
+    Aggregate tick data of one symbol into bar series of multiple windows.
+
+    1 minute bars are generated once and then fed into one window generator
+    per (window, interval, daily_end), so the timing is the same as using
+    BarGenerator in each strategy. Bars are pushed to on_bar with key
+    (window, interval, daily_end), 1 minute bars with (1, MINUTE, None).
+    """
+
+    def __init__(self, on_bar: Callable[[tuple, BarData], None]) -> None:
+        """"""
+        self.on_bar: Callable[[tuple, BarData], None] = on_bar
+
+        self.bar_generator: BarGenerator = BarGenerator(self.update_bar)
+        self.window_generators: Dict[tuple, BarGenerator] = {}
+
+    def add_window(
+        self,
+        window: int,
+        interval: Interval = Interval.MINUTE,
+        daily_end: Optional[time] = None
+    ) -> None:
+        """
+        Add a bar series of window and interval.
+        """
+        key: tuple = (window, interval, daily_end)
+        if key == (1, Interval.MINUTE, None) or key in self.window_generators:
+            return
+
+        # on_bar of window generator is never called, since 1 minute
+        # bars are fed into it by update_bar directly.
+        self.window_generators[key] = BarGenerator(
+            self.on_bar,
+            window,
+            partial(self.on_bar, key),
+            interval,
+            daily_end
+        )
+
+    def remove_window(
+        self,
+        window: int,
+        interval: Interval = Interval.MINUTE,
+        daily_end: Optional[time] = None
+    ) -> None:
+        """
+        Remove a bar series of window and interval.
+        """
+        self.window_generators.pop((window, interval, daily_end), None)
+
+    def copy_window_state(self, key: tuple, source: "BarAggregator") -> None:
+        """
+        Continue unfinished window bar of key from another aggregator, which
+        is usually fed with history bars before live ticks start.
+        """
+        generator: Optional[BarGenerator] = self.window_generators.get(key, None)
+        source_generator: Optional[BarGenerator] = source.window_generators.get(key, None)
+        if not generator or not source_generator:
+            return
+
+        # State kept by BarGenerator between 1 minute bars
+        for name in ("window_bar", "hour_bar", "daily_bar", "interval_count"):
+            setattr(generator, name, getattr(source_generator, name))
+
+    def update_tick(self, tick: TickData) -> None:
+        """
+        Update new tick data into 1 minute bar generator.
+        """
+        self.bar_generator.update_tick(tick)
+
+    def update_bar(self, bar: BarData) -> None:
+        """
+        Update new 1 minute bar data into window generators.
+        """
+        self.on_bar((1, Interval.MINUTE, None), bar)
+
+        for generator in list(self.window_generators.values()):
+            generator.update_bar(bar)
+
+
+class BoundedIdSet:
+    """
+    Set of ids bounded by count and age.
+
+    Oldest ids are evicted first once max_size is reached or they are
+    older than max_age seconds, so memory usage stays bounded.
+    """
+
+    def __init__(self, max_size: int = 100_000, max_age: float = 86400) -> None:
+        """"""
+        self.max_size: int = max_size
+        self.max_age: float = max_age
+
+        self.ids: OrderedDict = OrderedDict()        # id: add time
+
+    def __contains__(self, id_: str) -> bool:
+        """"""
+        return id_ in self.ids
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.ids)
+
+    def add(self, id_: str) -> None:
+        """
+        Add a new id and evict expired ones.
+        """
+        now: float = monotonic()
+        self.ids[id_] = now
+
+        while len(self.ids) > self.max_size:
+            self.ids.popitem(last=False)
+
+        self.evict(now)
+
+    def evict(self, now: float = 0) -> None:
+        """
+        Evict ids older than max age.
+        """
+        if not now:
+            now = monotonic()
+
+        ids: OrderedDict = self.ids
+        while ids:
+            id_, add_time = next(iter(ids.items()))
+            if now - add_time <= self.max_age:
+                break
+            ids.popitem(last=False)